@@ -16,27 +16,46 @@ Completely self-contained package - no external dependencies!
 """
 
 import os
+import bisect
+import hashlib
 import json
+import mmap
+import struct
 import subprocess
 import random
 import glob
+import heapq
+import itertools
 import shutil
 import tempfile
 import logging
 import sys
 import time
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 
+# NumPy is optional - only the audio overlap aligner needs it
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(__file__)
+# Logs, caches and quarantine reports (LOGS_DIR overrides, e.g. to keep test runs out of the install)
+LOGS_DIR = os.environ.get('LOGS_DIR') or os.path.join(SCRIPT_DIR, "logs")
 
 # Set up enhanced logging
 def setup_logging():
     """Set up logging with both file and console output"""
     
     # Create logs directory if it doesn't exist
-    logs_dir = os.path.join(SCRIPT_DIR, "logs")
+    logs_dir = LOGS_DIR
     os.makedirs(logs_dir, exist_ok=True)
     
     # Create log filename with timestamp
@@ -103,16 +122,41 @@ FFPROBE_PATH = os.path.join(SCRIPT_DIR, "ffmpeg", "ffprobe.exe")
 # Primary path configuration - now supports GUI configuration
 VIDEO_INPUT_PATH = os.environ.get('VIDEO_INPUT_PATH', os.path.expanduser(r"~/Videos/Captures"))
 VIDEO_OUTPUT_PATH = os.environ.get('VIDEO_OUTPUT_PATH', os.path.expanduser(r"~/Downloads"))
+VIDEO_CLOCK_OFFSET = float(os.environ.get('VIDEO_CLOCK_OFFSET', '0'))  # Seconds added to this machine's capture times
+EXTRA_VIDEO_INPUTS = os.environ.get('EXTRA_VIDEO_INPUTS', '')  # More capture folders: "path@offset;path@offset"
 
 # Video configuration options - can be set by GUI
 TRIM_SECONDS = int(os.environ.get('TRIM_SECONDS', '15'))  # Default to 15 seconds like S+ working version
 MUSIC_SELECTION = os.environ.get('MUSIC_SELECTION', '')
 INTRO_SELECTION = os.environ.get('INTRO_SELECTION', '')
+PROBE_WORKERS = int(os.environ.get('PROBE_WORKERS', '0'))  # 0 = one probe per CPU core
+COMPILE_SINCE = os.environ.get('COMPILE_SINCE', '')  # "last" = since last compile, or an ISO date/time
+COMPILE_UNTIL = os.environ.get('COMPILE_UNTIL', '')  # ISO date/time, empty = up to now
+MAX_CLIPS = int(os.environ.get('MAX_CLIPS', '0'))  # 0 = no limit
+MAX_TOTAL_DURATION = float(os.environ.get('MAX_TOTAL_DURATION', '0'))  # Seconds of footage, 0 = no limit
+TIME_WINDOW_HOURS = float(os.environ.get('TIME_WINDOW_HOURS', '0'))  # e.g. 6 = last 6 hours, 0 = no limit
+TARGET_DURATION = float(os.environ.get('TARGET_DURATION', '0'))  # Seconds incl. intro, e.g. 180 = 3-minute compilation
+COMPILE_MODE = os.environ.get('COMPILE_MODE', 'full')  # full | new (footage after the last manifest) | append
+SESSION_GAP_MINUTES = float(os.environ.get('SESSION_GAP_MINUTES', '0'))  # 0 = one compilation for everything
+SESSION_WORKERS = int(os.environ.get('SESSION_WORKERS', '2'))  # Sessions rendered at the same time
+AUDIO_ALIGN = os.environ.get('AUDIO_ALIGN', '1') != '0'  # Align overlapping replay saves on their audio (needs NumPy)
+EXPORT_PLAN = os.environ.get('EXPORT_PLAN', '')  # Path: write the render plan there instead of rendering
+RENDER_PLAN = os.environ.get('RENDER_PLAN', '')  # Path: render a saved plan without scanning or probing
+STREAM_COPY = os.environ.get('STREAM_COPY', '1') != '0'  # Remux captures already in the output profile instead of re-encoding
+SMART_CUT = os.environ.get('SMART_CUT', '1') != '0'  # Re-encode only the partial GOP before the first keyframe of a copied clip
+RENDER_BACKEND = os.environ.get('RENDER_BACKEND', 'clips')  # "clips" (extract + join) or "graph" (one ffmpeg pass)
+EXTRACT_JOBS = int(os.environ.get('EXTRACT_JOBS', '0'))  # ffmpeg encodes at the same time, 0 = one per 4 CPU cores
+EXTRACT_BENCHMARK = os.environ.get('EXTRACT_BENCHMARK', '')  # e.g. "1,2,4": time clip extraction at each job count instead of rendering
 # Resolution automatically detected - no GUI option needed for universal compatibility
 
 CONFIG = {
     # Video source folder (where your game recordings are saved)
     "video_folder": VIDEO_INPUT_PATH,
+    "video_clock_offset": VIDEO_CLOCK_OFFSET,
+    
+    # Extra capture folders from other machines (e.g. OBS on a second PC, synced over),
+    # each with the clock offset in seconds that lines its timestamps up with this machine
+    "extra_video_folders": EXTRA_VIDEO_INPUTS,
     
     # Music folder (background music for compilations) - Using included music
     "music_folder": os.path.join(os.path.dirname(__file__), "Music"),
@@ -144,7 +188,43 @@ CONFIG = {
     "output_resolution": "2560x1056",  # S+ working resolution for wide compilations
     "output_fps": 30,
     "video_bitrate": "5000k",
-    "audio_bitrate": "192k"
+    "audio_bitrate": "192k",
+    
+    # Performance settings
+    "probe_workers": PROBE_WORKERS or os.cpu_count() or 4,  # Concurrent ffprobe processes
+    "seek_repair": True,        # Remux captures without a seek index (crashed OBS sessions) once and reuse them
+    "seek_repair_max_gb": 20,   # Indexed copies kept at most - the least recently used are deleted beyond this
+    "stream_copy": STREAM_COPY, # H.264 captures at the output size and frame rate are cut on keyframes and copied
+    "smart_cut": SMART_CUT,     # Frame-accurate copies: encode from the in-point to the next keyframe, copy the rest
+    "render_backend": RENDER_BACKEND,  # "graph": one filter graph and one encode, no intermediate files
+    "extract_jobs": EXTRACT_JOBS,      # Clips extracted / normalized in parallel; the CPU cores are split between them
+    
+    # Capture selection (answered from the capture catalog)
+    "compile_since": COMPILE_SINCE,
+    "compile_until": COMPILE_UNTIL,
+    
+    # Planning limits - captures are walked newest first and probing stops once one is reached
+    "max_clips": MAX_CLIPS,
+    "max_total_duration": MAX_TOTAL_DURATION,
+    "time_window_hours": TIME_WINDOW_HOURS,
+    "target_duration": TARGET_DURATION,  # 0 = one clip per capture; otherwise the planner fills this budget
+    
+    # Incremental compilation - "new" compiles only footage after the last manifest,
+    # "append" also stream-copies it onto the end of that compilation instead of writing a new file
+    "compile_mode": COMPILE_MODE,
+    
+    # Sessions - captures separated by more than this idle time become separate compilations
+    "session_gap_minutes": SESSION_GAP_MINUTES,
+    "session_workers": SESSION_WORKERS,
+    
+    # Overlap alignment - adjacent replay saves are lined up on their audio instead of file timestamps
+    "audio_align": AUDIO_ALIGN,
+    "audio_align_min_confidence": 0.8,  # Normalized cross-correlation peak needed to trust an offset
+    
+    # Render plans - plan on one machine (export), render on another or later (render)
+    "export_plan": EXPORT_PLAN,
+    "render_plan": RENDER_PLAN,
+    "extract_benchmark": EXTRACT_BENCHMARK,
 }
 # ===== END CONFIGURATION SECTION =====
 
@@ -280,357 +360,2720 @@ def run_ffmpeg_command(command, timeout=60):
     except subprocess.CalledProcessError as e:
         return False, e.stdout, e.stderr
 
-def get_video_info(video_path):
-    """Get video information using ffprobe"""
-    command = f'"{FFPROBE_PATH}" -v quiet -print_format json -show_format -show_streams "{video_path}"'
-    success, stdout, stderr = run_ffmpeg_command(command)
-    
-    if success:
-        try:
-            data = json.loads(stdout)
-            video_streams = [stream for stream in data['streams'] if stream['codec_type'] == 'video']
-            if video_streams:
-                video_stream = video_streams[0]
-                width = int(video_stream['width'])
-                height = int(video_stream['height'])
-                duration = float(video_stream.get('duration', data['format'].get('duration', 0)))
-                return width, height, duration
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
-            print(f"Error parsing video info for {video_path}: {e}")
-    
-    return None, None, None
+def _parse_frame_rate(rate):
+    """Parse an ffprobe frame rate string like '30000/1001' into a float"""
+    try:
+        if '/' in rate:
+            num, den = rate.split('/', 1)
+            return float(num) / float(den) if float(den) else None
+        return float(rate) or None
+    except (TypeError, ValueError):
+        return None
 
-def detect_optimal_resolution(video_folder):
+class MediaInfo:
     """
-    Smart resolution detection - analyzes user's videos to determine optimal output resolution
-    This makes the script universal across different gaming setups and monitor configurations
+    Compact probe record for one media file.
+    Probed once and passed through the whole pipeline (planning, extraction, audio validation)
+    instead of re-running ffprobe at every step.
     """
-    resolution_counts = {}
-    video_extensions = ['.mp4', '.avi', '.mov', '.mkv']
-    sample_count = 0
-    max_samples = 10  # Analyze up to 10 recent videos for performance
+    __slots__ = (
+        "width", "height", "duration", "fps",
+        "video_codec", "audio_codec", "pix_fmt",
+        "has_audio", "sample_rate", "start_time",
+        "has_index", "duration_known", "channels",
+    )
     
-    safe_print("[SEARCH] Analyzing your video resolution patterns...")
+    def __init__(self, width=None, height=None, duration=None, fps=None,
+                 video_codec=None, audio_codec=None, pix_fmt=None,
+                 has_audio=False, sample_rate=None, start_time=0.0,
+                 has_index=None, duration_known=True, channels=None):
+        self.width = width
+        self.height = height
+        self.duration = duration
+        self.fps = fps
+        self.video_codec = video_codec
+        self.audio_codec = audio_codec
+        self.pix_fmt = pix_fmt
+        self.has_audio = has_audio
+        self.sample_rate = sample_rate
+        self.start_time = start_time
+        self.has_index = has_index            # Seek index present (MP4 sample tables, Matroska Cues); None = unknown
+        self.duration_known = duration_known  # False for unfinalized recordings (e.g. after an OBS crash)
+        self.channels = channels
     
-    try:
-        # Get recent video files for analysis
-        video_files = []
-        for ext in video_extensions:
-            files = Path(video_folder).glob(f"*{ext}")
-            video_files.extend([(f, os.path.getctime(f)) for f in files])
-        
-        # Sort by creation time (newest first) and limit samples
-        video_files.sort(key=lambda x: x[1], reverse=True)
-        video_files = video_files[:max_samples]
-        
-        for video_file, _ in video_files:
-            width, height, duration = get_video_info(str(video_file))
-            if width and height:
-                # Normalize resolution to standard aspect ratios
-                aspect_ratio = width / height
-                
-                if aspect_ratio > 2.3:  # Ultra-wide (21:9, 32:9, etc)
-                    if width >= 3440:
-                        resolution = "3440x1440"  # UWQHD
-                    elif width >= 2560:
-                        resolution = "2560x1080"  # Ultra-wide standard
-                    else:
-                        resolution = "2560x1080"
-                elif aspect_ratio > 1.7:  # Wide aspect ratios (16:9, 16:10)
-                    if width >= 2560:
-                        resolution = "2560x1440"  # 1440p
-                    elif width >= 1920:
-                        resolution = "1920x1080"  # 1080p
-                    else:
-                        resolution = "1280x720"   # 720p
-                else:  # Standard/square ratios
-                    resolution = "1920x1080"  # Default fallback
-                
-                resolution_counts[resolution] = resolution_counts.get(resolution, 0) + 1
-                sample_count += 1
-                
-                safe_print(f"   [VIDEO] {Path(video_file).name}: {width}x{height} -> {resolution}")
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"MediaInfo({fields})"
     
-    except Exception as e:
-        safe_print(f"[WARNING] Resolution detection error: {e}")
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
     
-    # Determine optimal resolution
-    if resolution_counts:
-        # Use the most common resolution found
-        optimal_resolution = max(resolution_counts.items(), key=lambda x: x[1])[0]
-        confidence = resolution_counts[optimal_resolution] / sample_count * 100
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+    
+    @classmethod
+    def from_ffprobe(cls, data):
+        """Build a record from ffprobe -show_format -show_streams JSON"""
+        streams = data.get('streams', [])
+        fmt = data.get('format', {})
+        # Cover art in music files shows up as a video stream - ignore it
+        video = next((s for s in streams if s.get('codec_type') == 'video'
+                      and not s.get('disposition', {}).get('attached_pic')), None)
+        audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
         
-        safe_print(f"[OK] Detected optimal resolution: {optimal_resolution} ({confidence:.0f}% confidence)")
-        safe_print(f"   Analysis based on {sample_count} recent videos")
-        return optimal_resolution
-    else:
-        # Fallback to a versatile standard
-        fallback_resolution = "1920x1080"
-        safe_print(f"[WARNING] No videos found for analysis, using fallback: {fallback_resolution}")
-        return fallback_resolution
+        info = cls(has_audio=audio is not None)
+        
+        duration = None
+        if video is not None:
+            info.width = int(video['width'])
+            info.height = int(video['height'])
+            info.video_codec = video.get('codec_name')
+            info.pix_fmt = video.get('pix_fmt')
+            info.fps = _parse_frame_rate(video.get('avg_frame_rate')) or _parse_frame_rate(video.get('r_frame_rate'))
+            duration = video.get('duration')
+        if audio is not None:
+            info.audio_codec = audio.get('codec_name')
+            if audio.get('sample_rate'):
+                info.sample_rate = int(audio['sample_rate'])
+            info.channels = audio.get('channels')
+            if duration is None and video is None:
+                duration = audio.get('duration')
+        if duration is None:
+            duration = fmt.get('duration', 0)
+        info.duration = float(duration)
+        info.duration_known = info.duration > 0
+        info.start_time = float(fmt.get('start_time', 0) or 0)
+        return info
 
-def has_audio_stream(video_path):
-    """Check if video has audio stream using ffprobe"""
-    command = f'"{FFPROBE_PATH}" -v quiet -print_format json -show_streams "{video_path}"'
-    success, stdout, stderr = run_ffmpeg_command(command)
+def run_ffprobe(file_path, timeout=60):
+    """Run ffprobe on a file and return the parsed JSON (format + streams), or None"""
+    command = f'"{FFPROBE_PATH}" -v quiet -print_format json -show_format -show_streams "{file_path}"'
+    success, stdout, stderr = run_ffmpeg_command(command, timeout=timeout)
+    if not success:
+        return None
     
-    if success:
-        try:
-            data = json.loads(stdout)
-            audio_streams = [stream for stream in data['streams'] if stream['codec_type'] == 'audio']
-            return len(audio_streams) > 0
-        except (json.JSONDecodeError, KeyError, ValueError):
-            return False
-    return False
+    try:
+        return json.loads(stdout)
+    except json.JSONDecodeError as e:
+        print(f"Error parsing probe output for {file_path}: {e}")
+        return None
 
-def extract_intro_clip(input_path, output_path, max_duration=7.0):
-    """Extract intro clip from the beginning of a video (not the end like gameplay clips)"""
-    
-    width, height, total_duration = get_video_info(input_path)
+# ===== NATIVE CONTAINER READERS =====
+# Container headers already hold duration, resolution and track types. Reading a few KB of
+# box headers takes microseconds, versus 50-150 ms for every ffprobe process launch.
+# Readers return None for anything they cannot parse so the caller can fall back to ffprobe.
+
+MP4_EXTENSIONS = (".mp4", ".mov", ".m4v", ".m4a", ".3gp")
+MP4_CONTAINER_BOXES = (b'moov', b'trak', b'mdia', b'minf', b'stbl')
+MP4_CODEC_NAMES = {
+    b'avc1': 'h264', b'avc3': 'h264', b'hvc1': 'hevc', b'hev1': 'hevc',
+    b'av01': 'av1', b'vp09': 'vp9', b'mp4v': 'mpeg4',
+    b'mp4a': 'aac', b'.mp3': 'mp3', b'Opus': 'opus', b'ac-3': 'ac3', b'ec-3': 'eac3',
+    b'alac': 'alac', b'sowt': 'pcm_s16le', b'twos': 'pcm_s16be', b'lpcm': 'pcm',
+}
+
+def _iter_mp4_boxes(buf, start, end):
+    """Yield (type, payload_start, box_end) for each ISO-BMFF box between start and end"""
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', buf, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos  # Box runs to the end of its parent
+        if size < header or pos + size > end:
+            raise ValueError(f"Truncated or corrupt '{box_type!r}' box at offset {pos}")
+        yield box_type, pos + header, pos + size
+        pos += size
+
+def _find_mp4_box(buf, start, end, box_type):
+    """Return (payload_start, box_end) of the first child box of the given type, or None"""
+    for child_type, payload, child_end in _iter_mp4_boxes(buf, start, end):
+        if child_type == box_type:
+            return payload, child_end
+    return None
+
+def _read_mp4_time_header(buf, payload):
+    """Read (timescale, duration) from an mvhd/mdhd payload (version 0 or 1)"""
+    version = buf[payload]
+    if version == 1:
+        timescale, duration = struct.unpack_from('>IQ', buf, payload + 20)
+    else:
+        timescale, duration = struct.unpack_from('>II', buf, payload + 12)
+    return timescale, duration
+
+def _read_mp4_esds_codec(buf, payload, end):
+    """Map the esds objectTypeIndication of an mp4a entry to a codec name (AAC unless stated otherwise)"""
+    pos = payload + 4  # version/flags
+    while pos < end:
+        tag = buf[pos]
+        pos += 1
+        length = 0
+        for _ in range(4):  # Expandable size field
+            byte = buf[pos]
+            pos += 1
+            length = (length << 7) | (byte & 0x7F)
+            if not byte & 0x80:
+                break
+        if tag == 0x03:  # ES_Descriptor: ES_ID(2) + flags(1), then nested descriptors
+            flags = buf[pos + 2]
+            pos += 3
+            if flags & 0x80:
+                pos += 2
+            if flags & 0x40:
+                pos += 1 + buf[pos]
+            if flags & 0x20:
+                pos += 2
+        elif tag == 0x04:  # DecoderConfigDescriptor
+            return 'mp3' if buf[pos] in (0x69, 0x6B) else 'aac'
+        else:
+            pos += length
+    return 'aac'
+
+def _read_mp4_sample_entry(buf, stbl_start, stbl_end, handler):
+    """Read codec details from the first stsd sample entry of a track"""
+    stsd = _find_mp4_box(buf, stbl_start, stbl_end, b'stsd')
+    if stsd is None:
+        return {}
+    payload, end = stsd
+    entry_start = payload + 8  # version/flags + entry_count
+    entry_size, entry_type = struct.unpack_from('>I4s', buf, entry_start)
+    entry_end = min(entry_start + entry_size, end)
+    details = {"codec": MP4_CODEC_NAMES.get(entry_type, entry_type.decode('latin-1').strip())}
     
-    if total_duration is None or total_duration <= 0:
-        safe_print(f"[WARNING] Warning: Could not get duration for {input_path}")
-        return False
+    if handler == b'vide':
+        details["width"], details["height"] = struct.unpack_from('>HH', buf, entry_start + 32)
+        # Profile byte of avcC/hvcC tells us the chroma format without decoding anything
+        for child_type, child_payload, _ in _iter_mp4_boxes(buf, entry_start + 86, entry_end):
+            if child_type == b'avcC' and buf[child_payload + 1] in (66, 77, 88, 100):
+                details["pix_fmt"] = 'yuv420p'  # Baseline/Main/Extended/High are 8-bit 4:2:0
+            elif child_type == b'hvcC':
+                profile = buf[child_payload + 1] & 0x1F
+                details["pix_fmt"] = {1: 'yuv420p', 2: 'yuv420p10le'}.get(profile)
+    elif handler == b'soun':
+        version = struct.unpack_from('>H', buf, entry_start + 16)[0]
+        details["channels"] = struct.unpack_from('>H', buf, entry_start + 24)[0]
+        if version == 2:  # QuickTime v2 sound description stores a float64 sample rate
+            details["sample_rate"] = int(struct.unpack_from('>d', buf, entry_start + 40)[0])
+            children_start = entry_start + 72
+        else:
+            details["sample_rate"] = struct.unpack_from('>I', buf, entry_start + 32)[0] >> 16
+            children_start = entry_start + 36 + {0: 0, 1: 16}.get(version, 0)
+        if entry_type == b'mp4a':
+            try:
+                esds = _find_mp4_box(buf, children_start, entry_end, b'esds')
+                if esds:
+                    details["codec"] = _read_mp4_esds_codec(buf, esds[0], esds[1])
+            except (ValueError, IndexError, struct.error):
+                pass
+    return details
+
+def _read_mp4_frame_rate(buf, stbl_start, stbl_end, timescale):
+    """Average frame rate from the stts (decoding time-to-sample) table"""
+    stts = _find_mp4_box(buf, stbl_start, stbl_end, b'stts')
+    if stts is None or not timescale:
+        return None
+    payload, end = stts
+    entry_count = struct.unpack_from('>I', buf, payload + 4)[0]
+    if payload + 8 + entry_count * 8 > end:
+        return None
+    total_samples = total_delta = 0
+    for count, delta in struct.iter_unpack('>II', buf[payload + 8:payload + 8 + entry_count * 8]):
+        total_samples += count
+        total_delta += count * delta
+    if not total_delta:
+        return None
+    return total_samples * timescale / total_delta
+
+def _open_mp4_moov(buf):
+    """Locate the moov box; returns (moov_start, moov_end) or None for missing/fragmented movies"""
+    moov = _find_mp4_box(buf, 0, len(buf), b'moov')
+    if moov is None:
+        return None
+    if _find_mp4_box(buf, moov[0], moov[1], b'mvex'):
+        return None  # Fragmented MP4 - samples and durations live in the fragments
+    return moov
+
+def _iter_mp4_tracks(buf, moov_start, moov_end):
+    """Yield (handler, trak, stbl, timescale, duration) for each complete track in a moov box"""
+    for box_type, trak_start, trak_end in _iter_mp4_boxes(buf, moov_start, moov_end):
+        if box_type != b'trak':
+            continue
+        mdia = _find_mp4_box(buf, trak_start, trak_end, b'mdia')
+        if mdia is None:
+            continue
+        hdlr = _find_mp4_box(buf, mdia[0], mdia[1], b'hdlr')
+        mdhd = _find_mp4_box(buf, mdia[0], mdia[1], b'mdhd')
+        minf = _find_mp4_box(buf, mdia[0], mdia[1], b'minf')
+        if hdlr is None or mdhd is None or minf is None:
+            continue
+        stbl = _find_mp4_box(buf, minf[0], minf[1], b'stbl')
+        if stbl is None:
+            continue
+        handler = bytes(buf[hdlr[0] + 8:hdlr[0] + 12])
+        timescale, duration = _read_mp4_time_header(buf, mdhd[0])
+        yield handler, (trak_start, trak_end), stbl, timescale, duration
+
+def read_mp4_info(file_path):
+    """
+    Read MediaInfo straight from the moov/mvhd/tkhd/stsd boxes of an MP4/MOV file.
+    No process spawn - only the box headers and the moov box are touched through mmap.
+    Returns None for fragmented, truncated or otherwise unusual files (use ffprobe instead).
+    """
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            moov = _open_mp4_moov(buf)
+            if moov is None:
+                return None
+            moov_start, moov_end = moov
+            
+            mvhd = _find_mp4_box(buf, moov_start, moov_end, b'mvhd')
+            if mvhd is None:
+                return None
+            movie_timescale, movie_duration = _read_mp4_time_header(buf, mvhd[0])
+            
+            info = MediaInfo(has_index=True)  # moov sample tables are a complete seek index
+            video_duration = None
+            for handler, trak, stbl, timescale, duration in _iter_mp4_tracks(buf, moov_start, moov_end):
+                if handler == b'vide' and info.video_codec is None:
+                    details = _read_mp4_sample_entry(buf, stbl[0], stbl[1], handler)
+                    # tkhd holds the display size as 16.16 fixed point in its last 8 bytes
+                    tkhd = _find_mp4_box(buf, trak[0], trak[1], b'tkhd')
+                    if tkhd is not None:
+                        width, height = struct.unpack_from('>II', buf, tkhd[1] - 8)
+                        info.width, info.height = width >> 16, height >> 16
+                    if not info.width or not info.height:
+                        info.width, info.height = details.get("width"), details.get("height")
+                    info.video_codec = details.get("codec")
+                    info.pix_fmt = details.get("pix_fmt")
+                    info.fps = _read_mp4_frame_rate(buf, stbl[0], stbl[1], timescale)
+                    if timescale:
+                        video_duration = duration / timescale
+                elif handler == b'soun' and not info.has_audio:
+                    details = _read_mp4_sample_entry(buf, stbl[0], stbl[1], handler)
+                    info.has_audio = True
+                    info.audio_codec = details.get("codec")
+                    info.sample_rate = details.get("sample_rate") or timescale or None
+                    info.channels = details.get("channels")
+            
+            # Audio-only files: the movie header duration already has encoder priming edited out
+            if video_duration is None and movie_timescale:
+                video_duration = movie_duration / movie_timescale
+            if not video_duration or video_duration <= 0:
+                return None
+            if info.video_codec is not None and not (info.width and info.height):
+                return None
+            info.duration = round(video_duration, 6)
+            return info
+
+def _read_mp4_table(buf, stbl, box_type, entry_format):
+    """Read all entries of a simple sample table box (stts, ctts, stss) as a list of tuples"""
+    box = _find_mp4_box(buf, stbl[0], stbl[1], box_type)
+    if box is None:
+        return None
+    payload, end = box
+    version = buf[payload]
+    entry_count = struct.unpack_from('>I', buf, payload + 4)[0]
+    if box_type == b'ctts' and version == 1:
+        entry_format = '>Ii'  # Version 1 composition offsets are signed
+    entry_size = struct.calcsize(entry_format)
+    if payload + 8 + entry_count * entry_size > end:
+        raise ValueError(f"Truncated '{box_type!r}' table")
+    return list(struct.iter_unpack(entry_format, buf[payload + 8:payload + 8 + entry_count * entry_size]))
+
+def read_mp4_keyframes(file_path):
+    """
+    Presentation times (seconds) of every video keyframe, straight from the stss (sync samples),
+    stts (decode times), ctts (composition offsets) and elst (edit list) tables.
+    Returns None when the index cannot be read natively.
+    """
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            moov = _open_mp4_moov(buf)
+            if moov is None:
+                return None
+            mvhd = _find_mp4_box(buf, moov[0], moov[1], b'mvhd')
+            movie_timescale = _read_mp4_time_header(buf, mvhd[0])[0] if mvhd else 0
+            
+            for handler, trak, stbl, timescale, _ in _iter_mp4_tracks(buf, moov[0], moov[1]):
+                if handler != b'vide' or not timescale:
+                    continue
+                stts = _read_mp4_table(buf, stbl, b'stts', '>II')
+                if not stts:
+                    return None
+                ctts = _read_mp4_table(buf, stbl, b'ctts', '>II') or []
+                stss = _read_mp4_table(buf, stbl, b'stss', '>I')
+                total_samples = sum(count for count, _ in stts)
+                # No stss box means every sample is a sync sample (intra-only video)
+                sync_samples = [entry[0] for entry in stss] if stss is not None else range(1, total_samples + 1)
+                
+                # The first edit decides where presentation starts (empty edits delay it)
+                shift = 0
+                delay = 0.0
+                edts = _find_mp4_box(buf, trak[0], trak[1], b'edts')
+                elst = _find_mp4_box(buf, edts[0], edts[1], b'elst') if edts else None
+                if elst is not None:
+                    version = buf[elst[0]]
+                    entry_format = '>Qq' if version == 1 else '>Ii'
+                    entry_count = struct.unpack_from('>I', buf, elst[0] + 4)[0]
+                    entry_size = struct.calcsize(entry_format) + 4
+                    for index in range(entry_count):
+                        segment_duration, media_time = struct.unpack_from(entry_format, buf, elst[0] + 8 + index * entry_size)
+                        if media_time == -1:
+                            delay += segment_duration / movie_timescale if movie_timescale else 0.0
+                        else:
+                            shift = media_time
+                            break
+                
+                # Walk the run-length encoded stts/ctts tables once, in step with the sorted sync samples
+                keyframes = []
+                stts_iter, ctts_iter = iter(stts), iter(ctts)
+                stts_left = ctts_left = 0
+                stts_delta = ctts_offset = 0
+                dts = 0
+                sample = 1
+                for sync_sample in sync_samples:
+                    while sample < sync_sample:
+                        if not stts_left:
+                            stts_left, stts_delta = next(stts_iter)
+                        if ctts and not ctts_left:
+                            ctts_left, ctts_offset = next(ctts_iter)
+                        step = min(sync_sample - sample, stts_left, ctts_left if ctts else stts_left)
+                        dts += step * stts_delta
+                        sample += step
+                        stts_left -= step
+                        if ctts:
+                            ctts_left -= step
+                    if ctts and not ctts_left:
+                        ctts_left, ctts_offset = next(ctts_iter)
+                    keyframes.append(round((dts + ctts_offset - shift) / timescale + delay, 6))
+                return sorted(keyframes)
+    return None
+
+MATROSKA_EXTENSIONS = (".mkv", ".webm", ".mka")
+MATROSKA_CODEC_NAMES = {
+    'V_MPEG4/ISO/AVC': 'h264', 'V_MPEGH/ISO/HEVC': 'hevc', 'V_VP8': 'vp8', 'V_VP9': 'vp9', 'V_AV1': 'av1',
+    'A_AAC': 'aac', 'A_OPUS': 'opus', 'A_VORBIS': 'vorbis', 'A_MPEG/L3': 'mp3', 'A_AC3': 'ac3',
+    'A_EAC3': 'eac3', 'A_FLAC': 'flac', 'A_PCM/INT/LIT': 'pcm_s16le',
+}
+# Element IDs (with their length marker bits, as written in the file)
+EBML_HEADER = 0x1A45DFA3
+MKV_SEGMENT = 0x18538067
+MKV_SEEK_HEAD, MKV_SEEK, MKV_SEEK_ID, MKV_SEEK_POSITION = 0x114D9B74, 0x4DBB, 0x53AB, 0x53AC
+MKV_INFO, MKV_TIMECODE_SCALE, MKV_DURATION = 0x1549A966, 0x2AD7B1, 0x4489
+MKV_TRACKS, MKV_TRACK_ENTRY, MKV_TRACK_TYPE, MKV_CODEC_ID, MKV_CODEC_PRIVATE = 0x1654AE6B, 0xAE, 0x83, 0x86, 0x63A2
+MKV_DEFAULT_DURATION, MKV_VIDEO, MKV_PIXEL_WIDTH, MKV_PIXEL_HEIGHT = 0x23E383, 0xE0, 0xB0, 0xBA
+MKV_AUDIO, MKV_SAMPLING_FREQUENCY, MKV_CHANNELS = 0xE1, 0xB5, 0x9F
+MKV_CUES, MKV_CLUSTER = 0x1C53BB6B, 0x1F43B675
+
+def _read_ebml_vint(buf, pos, keep_marker=False):
+    """Read an EBML variable-length integer; returns (value, next_pos). Unknown sizes read as -1."""
+    first = buf[pos]
+    if first == 0:
+        raise ValueError(f"Invalid EBML length at offset {pos}")
+    length = 9 - first.bit_length()
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in buf[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        value = -1  # All ones = unknown size (live/unfinalized recording)
+    return value, pos + length
+
+def _iter_ebml_elements(buf, start, end):
+    """Yield (id, data_start, data_end, unknown_size) for each EBML element between start and end"""
+    pos = start
+    while pos < end:
+        element_id, pos = _read_ebml_vint(buf, pos, keep_marker=True)
+        size, data = _read_ebml_vint(buf, pos)
+        data_end = end if size < 0 else data + size
+        if data_end > end:
+            raise ValueError(f"Truncated EBML element 0x{element_id:X} at offset {data}")
+        yield element_id, data, data_end, size < 0
+        if size < 0:
+            return  # Cannot skip past an element of unknown size
+        pos = data_end
+
+def _read_ebml_uint(buf, start, end):
+    return int.from_bytes(buf[start:end], 'big')
+
+def _read_ebml_float(buf, start, end):
+    if end - start == 4:
+        return struct.unpack_from('>f', buf, start)[0]
+    if end - start == 8:
+        return struct.unpack_from('>d', buf, start)[0]
+    return 0.0
+
+def _read_mkv_tracks(buf, start, end, info):
+    """Fill codec, size, frame rate and audio details from a Tracks element"""
+    for element_id, entry_start, entry_end, _ in _iter_ebml_elements(buf, start, end):
+        if element_id != MKV_TRACK_ENTRY:
+            continue
+        track = {}
+        for child_id, data, data_end, _ in _iter_ebml_elements(buf, entry_start, entry_end):
+            if child_id == MKV_TRACK_TYPE:
+                track["type"] = _read_ebml_uint(buf, data, data_end)
+            elif child_id == MKV_CODEC_ID:
+                track["codec_id"] = bytes(buf[data:data_end]).rstrip(b'\0').decode('ascii', 'replace')
+            elif child_id == MKV_CODEC_PRIVATE:
+                track["private"] = bytes(buf[data:min(data_end, data + 4)])
+            elif child_id == MKV_DEFAULT_DURATION:
+                track["frame_ns"] = _read_ebml_uint(buf, data, data_end)
+            elif child_id == MKV_VIDEO:
+                for video_id, vdata, vend, _ in _iter_ebml_elements(buf, data, data_end):
+                    if video_id == MKV_PIXEL_WIDTH:
+                        track["width"] = _read_ebml_uint(buf, vdata, vend)
+                    elif video_id == MKV_PIXEL_HEIGHT:
+                        track["height"] = _read_ebml_uint(buf, vdata, vend)
+            elif child_id == MKV_AUDIO:
+                for audio_id, adata, aend, _ in _iter_ebml_elements(buf, data, data_end):
+                    if audio_id == MKV_SAMPLING_FREQUENCY:
+                        track["sample_rate"] = int(_read_ebml_float(buf, adata, aend))
+                    elif audio_id == MKV_CHANNELS:
+                        track["channels"] = _read_ebml_uint(buf, adata, aend)
+        
+        codec_id = track.get("codec_id", "")
+        codec = MATROSKA_CODEC_NAMES.get(codec_id) or MATROSKA_CODEC_NAMES.get(codec_id.split('/')[0], codec_id.lower() or None)
+        if track.get("type") == 1 and info.video_codec is None:
+            info.video_codec = codec
+            info.width, info.height = track.get("width"), track.get("height")
+            if track.get("frame_ns"):
+                info.fps = round(1e9 / track["frame_ns"], 3)
+            private = track.get("private", b'')
+            if codec == 'h264' and len(private) > 1 and private[1] in (66, 77, 88, 100):
+                info.pix_fmt = 'yuv420p'  # Same avcC profile check as the MP4 reader
+        elif track.get("type") == 2 and not info.has_audio:
+            info.has_audio = True
+            info.audio_codec = codec
+            info.sample_rate = track.get("sample_rate") or 8000  # Matroska default sampling frequency
+            info.channels = track.get("channels", 1)
+
+def read_matroska_info(file_path):
+    """
+    Read MediaInfo from the EBML header of a Matroska/WebM file (OBS default recording format).
+    Only the Segment Info, Tracks and SeekHead elements are read - never the clusters.
+    Sets has_index when a Cues element exists (cheap tail seeks), and flags files without
+    a Duration (e.g. after an OBS crash) with duration_known=False instead of scanning them.
+    """
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            file_end = len(buf)
+            elements = _iter_ebml_elements(buf, 0, file_end)
+            header_id, _, _, _ = next(elements)
+            segment_id, segment_start, segment_end, _ = next(elements)
+            if header_id != EBML_HEADER or segment_id != MKV_SEGMENT:
+                return None
+            
+            # Level-1 elements up to the first Cluster, plus where the SeekHead says the rest are
+            level1 = {}
+            seek_positions = {}
+            for element_id, data, data_end, unknown_size in _iter_ebml_elements(buf, segment_start, segment_end):
+                if element_id == MKV_CLUSTER or unknown_size:
+                    break
+                level1.setdefault(element_id, (data, data_end))
+                if element_id == MKV_SEEK_HEAD:
+                    for seek_id, seek_start, seek_end, _ in _iter_ebml_elements(buf, data, data_end):
+                        if seek_id != MKV_SEEK:
+                            continue
+                        target_id = target_pos = None
+                        for child_id, cdata, cend, _ in _iter_ebml_elements(buf, seek_start, seek_end):
+                            if child_id == MKV_SEEK_ID:
+                                target_id = _read_ebml_uint(buf, cdata, cend)
+                            elif child_id == MKV_SEEK_POSITION:
+                                target_pos = _read_ebml_uint(buf, cdata, cend)
+                        if target_id is not None and target_pos is not None:
+                            seek_positions.setdefault(target_id, segment_start + target_pos)
+            
+            def locate(element_id):
+                """Find a level-1 element directly or through the SeekHead (one header read)"""
+                if element_id in level1:
+                    return level1[element_id]
+                pos = seek_positions.get(element_id)
+                if pos is None or pos >= file_end:
+                    return None
+                found_id, data, data_end, _ = next(_iter_ebml_elements(buf, pos, file_end))
+                return (data, data_end) if found_id == element_id else None
+            
+            segment_info = locate(MKV_INFO)
+            tracks = locate(MKV_TRACKS)
+            if segment_info is None or tracks is None:
+                return None
+            
+            timecode_scale = 1000000
+            duration = None
+            for element_id, data, data_end, _ in _iter_ebml_elements(buf, *segment_info):
+                if element_id == MKV_TIMECODE_SCALE:
+                    timecode_scale = _read_ebml_uint(buf, data, data_end)
+                elif element_id == MKV_DURATION:
+                    duration = _read_ebml_float(buf, data, data_end)
+            
+            info = MediaInfo()
+            _read_mkv_tracks(buf, tracks[0], tracks[1], info)
+            if info.video_codec is not None and not (info.width and info.height):
+                return None
+            
+            try:
+                info.has_index = locate(MKV_CUES) is not None
+            except (ValueError, IndexError):
+                info.has_index = False  # SeekHead points past a truncated end
+            if duration and duration > 0:
+                info.duration = round(duration * timecode_scale / 1e9, 6)
+            else:
+                info.duration = None
+                info.duration_known = False
+            return info
+
+# MPEG audio header tables, indexed by [version][layer] / [version] (version: 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5)
+MP3_BITRATES = {
+    (3, 3): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (3, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (3, 1): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 3): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+MP3_CODEC_NAMES = {3: 'mp1', 2: 'mp2', 1: 'mp3'}
+
+def _parse_mp3_frame_header(buf, pos):
+    """Decode an MPEG audio frame header; returns a dict or None if pos is not a valid frame"""
+    if pos + 4 > len(buf):
+        return None
+    header = struct.unpack_from('>I', buf, pos)[0]
+    if header & 0xFFE00000 != 0xFFE00000:
+        return None
+    version = (header >> 19) & 3
+    layer = (header >> 17) & 3
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 3
+    if version == 1 or layer == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
     
-    # For intros, take from the beginning up to max_duration
-    start_time = 0
-    if total_duration <= max_duration:
-        # Use the entire intro if it's shorter than max_duration
-        extract_duration = total_duration
+    bitrate = MP3_BITRATES[(3 if version == 3 else 2, layer if version == 3 or layer == 3 else 2)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header >> 9) & 1
+    if layer == 3:  # Layer I
+        samples_per_frame = 384
+        frame_size = (12 * bitrate // sample_rate + padding) * 4
     else:
-        # Take the first max_duration seconds
-        extract_duration = max_duration
+        samples_per_frame = 1152 if version == 3 or layer == 2 else 576
+        frame_size = samples_per_frame // 8 * bitrate // sample_rate + padding
+    return {
+        "version": version, "layer": layer, "bitrate": bitrate, "sample_rate": sample_rate,
+        "channels": 1 if (header >> 6) & 3 == 3 else 2,
+        "samples_per_frame": samples_per_frame, "frame_size": frame_size,
+    }
+
+def read_mp3_info(file_path):
+    """
+    Read MediaInfo for an MP3 from its ID3v2 size, first frame header and Xing/Info/VBRI tag.
+    Exact frame count comes from the Xing or VBRI tag; plain CBR files are sized from the bitrate.
+    """
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            file_size = len(buf)
+            audio_start = 0
+            # Skip (possibly several) ID3v2 tags - the size is a 28-bit syncsafe integer
+            while buf[audio_start:audio_start + 3] == b'ID3':
+                flags = buf[audio_start + 5]
+                b0, b1, b2, b3 = buf[audio_start + 6:audio_start + 10]
+                tag_size = (b0 << 21) | (b1 << 14) | (b2 << 7) | b3
+                audio_start += 10 + tag_size + (10 if flags & 0x10 else 0)
+            audio_end = file_size - 128 if buf[file_size - 128:file_size - 125] == b'TAG' else file_size
+            
+            # First frame header whose successor is also a valid frame (avoids false syncs)
+            frame = None
+            pos = audio_start
+            search_end = min(audio_end - 4, audio_start + 65536)
+            while pos < search_end:
+                pos = buf.find(b'\xff', pos, search_end)
+                if pos < 0:
+                    return None
+                frame = _parse_mp3_frame_header(buf, pos)
+                if frame and (pos + frame["frame_size"] >= audio_end
+                              or _parse_mp3_frame_header(buf, pos + frame["frame_size"])):
+                    break
+                frame = None
+                pos += 1
+            if frame is None:
+                return None
+            
+            info = MediaInfo(has_audio=True, has_index=True,
+                             audio_codec=MP3_CODEC_NAMES[frame["layer"]],
+                             sample_rate=frame["sample_rate"], channels=frame["channels"])
+            
+            # Xing/Info tag sits after the side information of the first frame
+            if frame["version"] == 3:
+                side_info = 17 if frame["channels"] == 1 else 32
+            else:
+                side_info = 9 if frame["channels"] == 1 else 17
+            xing = pos + 4 + side_info
+            total_frames = None
+            if buf[xing:xing + 4] in (b'Xing', b'Info'):
+                if struct.unpack_from('>I', buf, xing + 4)[0] & 1:
+                    total_frames = struct.unpack_from('>I', buf, xing + 8)[0]
+            elif buf[pos + 36:pos + 40] == b'VBRI':
+                total_frames = struct.unpack_from('>I', buf, pos + 36 + 14)[0]
+            
+            if total_frames:
+                info.duration = total_frames * frame["samples_per_frame"] / frame["sample_rate"]
+            else:
+                info.duration = (audio_end - pos) * 8 / frame["bitrate"]
+            info.duration = round(info.duration, 6)
+            return info
+
+WAV_CODEC_NAMES = {0x0003: 'pcm_f32le', 0x0006: 'pcm_alaw', 0x0007: 'pcm_mulaw', 0x0055: 'mp3'}
+
+def read_wav_info(file_path):
+    """Read MediaInfo for a WAV file from its RIFF 'fmt ' and 'data' chunks"""
+    with open(file_path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            return None
+        file_size = os.fstat(f.fileno()).st_size
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk)
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                if chunk_size & 1:
+                    f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                if fmt is None or len(fmt) < 16:
+                    return None
+                # Streaming writers leave the size at 0/0xFFFFFFFF - trust the file size instead
+                data_size = min(chunk_size, file_size - f.tell()) or file_size - f.tell()
+                break
+            else:
+                f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
     
-    # Extract the intro clip from the beginning
-    if has_audio_stream(input_path):
-        # Video has audio - extract normally
-        command = f'"{FFMPEG_PATH}" -y -ss {start_time} -i "{input_path}" -t {extract_duration} -c:v libx264 -preset fast -crf 23 -c:a aac -b:a {CONFIG["audio_bitrate"]} "{output_path}"'
+    audio_format, channels, sample_rate, byte_rate, _, bits = struct.unpack_from('<HHIIHH', fmt)
+    if audio_format == 0xFFFE and len(fmt) >= 26:  # WAVE_FORMAT_EXTENSIBLE - real format in the sub-format GUID
+        audio_format = struct.unpack_from('<H', fmt, 24)[0]
+    if audio_format == 0x0001:
+        codec = 'pcm_u8' if bits == 8 else f'pcm_s{bits}le'
     else:
-        # Video has no audio - add silent audio track
-        command = f'"{FFMPEG_PATH}" -y -ss {start_time} -i "{input_path}" -f lavfi -i anullsrc=channel_layout=stereo:sample_rate=44100 -t {extract_duration} -c:v libx264 -preset fast -crf 23 -c:a aac -b:a {CONFIG["audio_bitrate"]} -shortest "{output_path}"'
-    
-    success, stdout, stderr = run_ffmpeg_command(command, timeout=90)  # Give intro extraction more time
-    
-    if not success:
-        safe_print(f"[ERROR] Error extracting intro from {input_path}: {stderr}")
-    
-    return success
+        codec = WAV_CODEC_NAMES.get(audio_format, f'wav_0x{audio_format:04x}')
+    if not byte_rate or not sample_rate:
+        return None
+    return MediaInfo(duration=round(data_size / byte_rate, 6), has_audio=True, has_index=True,
+                     audio_codec=codec, sample_rate=sample_rate, channels=channels)
 
-def extract_last_n_seconds(input_path, output_path, duration=5.0):
-    """Extract the last N seconds from a video"""
-    width, height, total_duration = get_video_info(input_path)
+def read_ogg_info(file_path):
+    """
+    Read MediaInfo for an Ogg Vorbis/Opus file from the identification header on the first page
+    and the granule position of the last page (read from the tail of the file only).
+    """
+    with open(file_path, 'rb') as f:
+        first_page = f.read(512)
+        if first_page[:4] != b'OggS':
+            return None
+        packet = first_page[27 + first_page[26]:]  # Skip page header + segment table
+        if packet[:7] == b'\x01vorbis':
+            channels = packet[11]
+            sample_rate = granule_rate = struct.unpack_from('<I', packet, 12)[0]
+            codec, pre_skip = 'vorbis', 0
+        elif packet[:8] == b'OpusHead':
+            channels = packet[9]
+            pre_skip = struct.unpack_from('<H', packet, 10)[0]
+            sample_rate = granule_rate = 48000  # Opus granule positions always count 48 kHz samples
+            codec = 'opus'
+        else:
+            return None
+        
+        file_size = os.fstat(f.fileno()).st_size
+        tail_size = min(file_size, 65536)
+        f.seek(file_size - tail_size)
+        tail = f.read(tail_size)
     
-    if total_duration is None or total_duration <= 0:
-        print(f"Warning: Could not get duration for {input_path}")
-        return False
+    last_page = tail.rfind(b'OggS')
+    while last_page >= 0:
+        if last_page + 14 <= len(tail) and tail[last_page + 4] == 0:
+            granule = struct.unpack_from('<q', tail, last_page + 6)[0]
+            if granule > 0:
+                return MediaInfo(duration=round((granule - pre_skip) / granule_rate, 6),
+                                 has_audio=True, has_index=True, audio_codec=codec,
+                                 sample_rate=sample_rate, channels=channels)
+        last_page = tail.rfind(b'OggS', 0, last_page)
+    return None
 
-    if total_duration <= duration:
-        # If video is shorter than requested duration, use the whole video
-        start_time = 0
-        extract_duration = total_duration
-    else:
-        start_time = total_duration - duration
-        extract_duration = duration
+NATIVE_READERS = {ext: read_mp4_info for ext in MP4_EXTENSIONS}
+NATIVE_READERS.update({ext: read_matroska_info for ext in MATROSKA_EXTENSIONS})
+NATIVE_READERS.update({".mp3": read_mp3_info, ".wav": read_wav_info, ".ogg": read_ogg_info, ".opus": read_ogg_info})
 
-    # Extract the clip
-    if has_audio_stream(input_path):
-        # Video has audio - extract normally
-        command = f'"{FFMPEG_PATH}" -y -ss {start_time} -i "{input_path}" -t {extract_duration} -c:v libx264 -preset fast -crf 23 -c:a aac -b:a {CONFIG["audio_bitrate"]} "{output_path}"'
-    else:
-        # Video has no audio - add silent audio track
-        command = f'"{FFMPEG_PATH}" -y -ss {start_time} -i "{input_path}" -f lavfi -i anullsrc=channel_layout=stereo:sample_rate=44100 -t {extract_duration} -c:v libx264 -preset fast -crf 23 -c:a aac -b:a {CONFIG["audio_bitrate"]} -shortest "{output_path}"'
+def read_native_media_info(file_path):
+    """
+    Try the pure-Python container readers for a file.
+    Returns a MediaInfo, or None when no reader applies or the file could not be parsed.
+    """
+    reader = NATIVE_READERS.get(os.path.splitext(file_path)[1].lower())
+    if reader is None:
+        return None
+    try:
+        return reader(file_path)
+    except (OSError, ValueError, IndexError, StopIteration, struct.error) as e:
+        logger.debug(f"Native header read failed for {file_path}, falling back to ffprobe: {e}")
+        return None
 
-    success, stdout, stderr = run_ffmpeg_command(command)
-    if not success:
-        print(f"Error extracting from {input_path}: {stderr}")
+# ===== PROBE CACHE =====
+# Probe records are stored next to the logs so unchanged captures are never probed twice,
+# not even across runs. Entries are keyed on (absolute path, size, mtime).
+PROBE_CACHE_PATH = os.path.join(LOGS_DIR, "probe_cache.sqlite3")
+PROBE_CACHE_STATS = {"hits": 0, "misses": 0, "native": 0}
+_probe_cache_lock = threading.Lock()
+_probe_cache_conn = None
+_probe_cache_failed = False
 
-    return success
+def _get_probe_cache():
+    """Open the persistent probe cache database (once per process)"""
+    global _probe_cache_conn, _probe_cache_failed
+    
+    if _probe_cache_conn is None and not _probe_cache_failed:
+        try:
+            os.makedirs(os.path.dirname(PROBE_CACHE_PATH) or ".", exist_ok=True)
+            conn = sqlite3.connect(PROBE_CACHE_PATH, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS media_info ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS keyframe_index ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL, "
+                "window_start REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            # Capture catalog - one row per capture with its footage interval on the wall clock
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS captures ("
+                "path TEXT PRIMARY KEY, folder TEXT NOT NULL, size INTEGER NOT NULL, mtime REAL NOT NULL, "
+                "timestamp REAL NOT NULL, duration REAL, footage_start REAL, data TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS captures_timeline ON captures (folder, timestamp)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS catalog_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            # Measured audio offsets between adjacent captures, keyed on both files
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS audio_alignment ("
+                "older_path TEXT NOT NULL, older_size INTEGER NOT NULL, older_mtime REAL NOT NULL, "
+                "newer_path TEXT NOT NULL, newer_size INTEGER NOT NULL, newer_mtime REAL NOT NULL, "
+                "offset REAL NOT NULL, confidence REAL NOT NULL, PRIMARY KEY (older_path, newer_path))"
+            )
+            conn.commit()
+            _probe_cache_conn = conn
+        except sqlite3.Error as e:
+            # Cache is an optimization only - keep working without it
+            _probe_cache_failed = True
+            logger.warning(f"Probe cache unavailable ({PROBE_CACHE_PATH}): {e}")
+    
+    return _probe_cache_conn
 
+def _probe_cache_key(file_path):
+    """Build the (absolute path, size, mtime) cache key for a file"""
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_size, stat.st_mtime
 
-def extract_smart_clip(input_path, output_path, start_time, extract_duration):
-    """Extract a clip with precise start time and duration to avoid overlaps"""
-    width, height, total_duration = get_video_info(input_path)
+def probe_media_info(file_path, timeout=60):
+    """
+    Probe a media file once and return its MediaInfo record.
+    Container headers are read natively when possible; otherwise the result is served from
+    the persistent probe cache, and ffprobe only runs for new or changed files.
+    Returns None if the file could not be probed.
+    """
+    info = read_native_media_info(file_path)
+    if info is not None:
+        with _probe_cache_lock:
+            PROBE_CACHE_STATS["native"] += 1
+        return info
     
-    if total_duration is None or total_duration <= 0:
-        print(f"Warning: Could not get duration for {input_path}")
-        return False
+    try:
+        path, size, mtime = _probe_cache_key(file_path)
+    except OSError as e:
+        logger.warning(f"Cannot stat {file_path}: {e}")
+        return None
     
-    # Validate extraction parameters
-    if start_time < 0:
-        start_time = 0
-    if start_time >= total_duration:
-        print(f"Warning: Start time {start_time}s exceeds video duration {total_duration}s")
-        return False
-    if start_time + extract_duration > total_duration:
-        extract_duration = total_duration - start_time
-    if extract_duration <= 0:
-        print(f"Warning: No content to extract (duration would be {extract_duration}s)")
-        return False
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is not None:
+            try:
+                row = conn.execute(
+                    "SELECT data FROM media_info WHERE path = ? AND size = ? AND mtime = ?",
+                    (path, size, mtime)
+                ).fetchone()
+                if row:
+                    PROBE_CACHE_STATS["hits"] += 1
+                    return MediaInfo.from_dict(json.loads(row[0]))
+            except (sqlite3.Error, json.JSONDecodeError, TypeError) as e:
+                logger.warning(f"Probe cache lookup failed for {file_path}: {e}")
+        PROBE_CACHE_STATS["misses"] += 1
     
-    logger.info(f"Smart extract: {input_path} -> start={start_time:.3f}s, duration={extract_duration:.3f}s")
+    data = run_ffprobe(file_path, timeout=timeout)
+    if not data:
+        return None
     
-    # Extract the clip with precise timing
-    if has_audio_stream(input_path):
-        command = f'"{FFMPEG_PATH}" -y -ss {start_time} -i "{input_path}" -t {extract_duration} -c:v libx264 -preset fast -crf 23 -c:a aac -b:a {CONFIG["audio_bitrate"]} "{output_path}"'
-    else:
-        command = f'"{FFMPEG_PATH}" -y -ss {start_time} -i "{input_path}" -f lavfi -i anullsrc=channel_layout=stereo:sample_rate=44100 -t {extract_duration} -c:v libx264 -preset fast -crf 23 -c:a aac -b:a {CONFIG["audio_bitrate"]} -shortest "{output_path}"'
+    try:
+        info = MediaInfo.from_ffprobe(data)
+    except (KeyError, ValueError, TypeError) as e:
+        print(f"Error parsing media info for {file_path}: {e}")
+        return None
     
-    success, stdout, stderr = run_ffmpeg_command(command)
-    if not success:
-        print(f"Error extracting smart clip from {input_path}: {stderr}")
+    # Only successful probes are cached - a failing file may still be mid-write
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is not None:
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO media_info (path, size, mtime, data) VALUES (?, ?, ?, ?)",
+                    (path, size, mtime, json.dumps(info.to_dict()))
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Probe cache write failed for {file_path}: {e}")
     
-    return success
+    return info
 
+def log_probe_cache_stats():
+    """Report probe cache hit/miss counts in the log"""
+    hits = PROBE_CACHE_STATS["hits"]
+    misses = PROBE_CACHE_STATS["misses"]
+    native = PROBE_CACHE_STATS["native"]
+    total = hits + misses
+    if total:
+        logger.info(f"Probe cache: {hits} hits, {misses} misses ({hits / total * 100:.0f}% hit rate)")
+    if native:
+        logger.info(f"Native header reads (no ffprobe): {native}")
 
-def calculate_smart_clips(video_files, clip_duration):
+def probe_files_concurrently(file_paths, max_workers=None):
     """
-    Calculate smart clip parameters to avoid overlapping content.
-    Accounts for retroactive/buffered recording (Xbox Game Bar, OBS replay buffer).
+    Probe many files in parallel with a bounded thread pool.
+    Yields (file_path, MediaInfo or None) in completion order, so callers can log as results arrive.
+    Logs the wall-clock speedup against probing the same files one at a time.
+    """
+    file_paths = list(file_paths)
+    if not file_paths:
+        return
     
-    Args:
-        video_files: List of video file paths sorted by modification time (newest first)
-        clip_duration: Desired clip duration from GUI
-        
-    Returns:
-        List of tuples: (video_path, start_time, duration, creation_timestamp)
+    max_workers = max(1, min(max_workers or CONFIG["probe_workers"], len(file_paths)))
+    probe_times = []
+    
+    def timed_probe(file_path):
+        probe_start = time.time()
+        info = probe_media_info(file_path)
+        probe_times.append(time.time() - probe_start)
+        return info
+    
+    wall_start = time.time()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {executor.submit(timed_probe, file_path): file_path for file_path in file_paths}
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                info = future.result()
+            except Exception as e:
+                logger.warning(f"Probe failed for {file_path}: {e}")
+                info = None
+            yield file_path, info
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    
+    wall_time = time.time() - wall_start
+    serial_time = sum(probe_times)  # Sum of per-file probe latency
+    speedup = serial_time / wall_time if wall_time > 0 else 1.0
+    logger.info(f"Probed {len(file_paths)} files with {max_workers} workers in {wall_time:.2f}s "
+                f"(serial estimate: {serial_time:.2f}s, speedup: {speedup:.1f}x)")
+
+def probe_files_in_order(file_paths, probe=None, lookahead=None):
     """
-    if not video_files:
-        return []
+    Probe files in parallel but yield (file_path, MediaInfo or None) in input order.
+    At most `lookahead` probes run ahead of the consumer, so a caller that stops early
+    (closing the generator) never pays for probing the rest of the list.
+    """
+    probe = probe or probe_media_info
+    lookahead = max(1, lookahead or CONFIG["probe_workers"])
+    pending = deque()
     
-    # Get file timestamps (creation time) and sort oldest to newest for chronological processing
-    video_data = []
-    for video_path in video_files:
+    def result(file_path, future):
         try:
-            creation_time = os.path.getctime(video_path)  # When file was created (AFTER recording)
-            mod_time = os.path.getmtime(video_path)      # Modification timestamp  
-            # Use creation time for overlap detection, fallback to modification time
-            timestamp = creation_time if creation_time > 0 else mod_time
-            video_data.append((video_path, timestamp))
+            return future.result()
         except Exception as e:
-            logger.warning(f"Could not get timestamp for {video_path}: {e}")
-            continue
+            logger.warning(f"Probe failed for {file_path}: {e}")
+            return None
     
-    # Sort by timestamp (oldest first) for chronological processing
-    video_data.sort(key=lambda x: x[1])
+    executor = ThreadPoolExecutor(max_workers=lookahead)
+    try:
+        for file_path in file_paths:
+            pending.append((file_path, executor.submit(probe, file_path)))
+            if len(pending) >= lookahead:
+                file_path, future = pending.popleft()
+                yield file_path, result(file_path, future)
+        while pending:
+            file_path, future = pending.popleft()
+            yield file_path, result(file_path, future)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+# ===== CAPTURE CATALOG =====
+# Capture folders are mirrored into the probe database so selection and planning become indexed
+# queries instead of a folder rescan plus re-probe. A capture's footage interval on the wall clock
+# is (timestamp - duration) -> timestamp: buffered recorders write the file AFTER the footage happened.
+CATALOG_QUERY_CHUNK = 500  # Host parameters per IN (...) lookup
+
+def capture_timestamp(stat_result):
+    """Wall-clock time a capture's footage ends: creation time, falling back to modification time"""
+    return stat_result.st_ctime if stat_result.st_ctime > 0 else stat_result.st_mtime
+
+def sync_capture_catalog(folder, clock_offset=0.0):
+    """
+    Bring the catalog for one capture folder up to date with a stat-only directory walk.
+    New and changed captures are (re)inserted without probe data - planning fills that in lazily -
+    and deleted captures are dropped. Timestamps are stored on the global clock (capture time plus
+    the folder's clock offset); rows are shifted when the offset changes.
+    Returns True if the catalog can be used for this folder.
+    """
+    sync_start = time.time()
+    folder = os.path.abspath(folder)
+    extensions = {ext.lower() for ext in CONFIG["video_extensions"]}
     
-    smart_clips = []
-    last_clip_end_in_footage = 0  # Track when the EXTRACTED CLIP ends in the actual footage timeline
+    on_disk = {}
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1].lower() not in extensions:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                on_disk[os.path.abspath(entry.path)] = (stat.st_size, stat.st_mtime, capture_timestamp(stat) + clock_offset)
+    except OSError as e:
+        logger.warning(f"Cannot scan {folder}: {e}")
+        return False
     
-    for i, (video_path, creation_timestamp) in enumerate(video_data):
-        # Get video duration
-        width, height, total_duration = get_video_info(video_path)
-        if total_duration is None or total_duration <= 0:
-            logger.warning(f"Skipping {video_path} - cannot determine duration")
-            continue
-        
-        # For buffered recording: footage timeline is BEFORE file creation
-        # Actual footage spans: (creation_timestamp - total_duration) to creation_timestamp
-        footage_start_timestamp = creation_timestamp - total_duration
-        footage_end_timestamp = creation_timestamp
-        
-        # Determine what to extract (last N seconds)
-        if total_duration <= clip_duration:
-            start_time = 0
-            extract_duration = total_duration
-        else:
-            start_time = total_duration - clip_duration  # Extract LAST clip_duration seconds
-            extract_duration = clip_duration
-        
-        # Calculate when this extracted clip exists in the footage timeline
-        clip_start_in_footage = footage_start_timestamp + start_time
-        clip_end_in_footage = clip_start_in_footage + extract_duration
-        
-        # For first video, no overlap checking needed
-        if i == 0:
-            smart_clips.append((video_path, start_time, extract_duration, creation_timestamp))
-            last_clip_end_in_footage = clip_end_in_footage
-            
-            logger.info(f"First clip: {os.path.basename(video_path)} -> start={start_time:.3f}s, duration={extract_duration:.3f}s, footage_timeline={clip_start_in_footage:.1f}-{clip_end_in_footage:.1f}")
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is None:
+            return False
+        try:
+            # Re-align rows catalogued under a different clock offset for this folder
+            offset_key = f"clock_offset:{folder}"
+            row = conn.execute("SELECT value FROM catalog_meta WHERE key = ?", (offset_key,)).fetchone()
+            previous_offset = float(row[0]) if row else 0.0
+            if previous_offset != clock_offset:
+                shift = clock_offset - previous_offset
+                conn.execute(
+                    "UPDATE captures SET timestamp = timestamp + ?, footage_start = footage_start + ? WHERE folder = ?",
+                    (shift, shift, folder)
+                )
+                conn.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)",
+                             (offset_key, repr(clock_offset)))
+            
+            known = {
+                path: (size, mtime) for path, size, mtime in
+                conn.execute("SELECT path, size, mtime FROM captures WHERE folder = ?", (folder,))
+            }
+            changed = [
+                (path, folder, size, mtime, timestamp)
+                for path, (size, mtime, timestamp) in on_disk.items()
+                if known.get(path) != (size, mtime)
+            ]
+            removed = [(path,) for path in known if path not in on_disk]
+            # Replacing a row clears its probe data - the file changed, so it must be probed again
+            conn.executemany(
+                "INSERT OR REPLACE INTO captures (path, folder, size, mtime, timestamp) VALUES (?, ?, ?, ?, ?)",
+                changed
+            )
+            conn.executemany("DELETE FROM captures WHERE path = ?", removed)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.warning(f"Capture catalog sync failed for {folder}: {e}")
+            return False
+    
+    logger.info(f"Capture catalog synced: {len(on_disk)} captures in {folder} "
+                f"({len(changed)} new/changed, {len(removed)} removed) in {(time.time() - sync_start) * 1000:.0f}ms")
+    return True
+
+def query_captures(folder, since=None, until=None):
+    """
+    Return (path, timestamp) for catalogued captures whose footage ends within (since, until],
+    newest first. Answered from the (folder, timestamp) index. Returns None if the catalog is unavailable.
+    """
+    query_start = time.time()
+    sql = "SELECT path, timestamp FROM captures WHERE folder = ?"
+    params = [os.path.abspath(folder)]
+    if since is not None:
+        sql += " AND timestamp > ?"
+        params.append(since)
+    if until is not None:
+        sql += " AND timestamp <= ?"
+        params.append(until)
+    sql += " ORDER BY timestamp DESC"
+    
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is None:
+            return None
+        try:
+            rows = [tuple(row) for row in conn.execute(sql, params)]
+        except sqlite3.Error as e:
+            logger.warning(f"Capture catalog query failed: {e}")
+            return None
+    
+    logger.info(f"Capture catalog query: {len(rows)} captures in {(time.time() - query_start) * 1000:.1f}ms")
+    return rows
+
+def catalog_lookup(file_paths):
+    """
+    Look up catalogued captures by path.
+    Returns {absolute path: (timestamp, MediaInfo or None)}; rows whose file changed since the
+    last sync are left out so callers fall back to stat/probe for them.
+    """
+    paths = [os.path.abspath(file_path) for file_path in file_paths]
+    rows = []
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is None:
+            return {}
+        try:
+            for i in range(0, len(paths), CATALOG_QUERY_CHUNK):
+                chunk = paths[i:i + CATALOG_QUERY_CHUNK]
+                rows.extend(conn.execute(
+                    f"SELECT path, size, mtime, timestamp, data FROM captures "
+                    f"WHERE path IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ))
+        except sqlite3.Error as e:
+            logger.warning(f"Capture catalog lookup failed: {e}")
+            return {}
+    
+    entries = {}
+    for path, size, mtime, timestamp, data in rows:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if (stat.st_size, stat.st_mtime) != (size, mtime):
+            continue
+        try:
+            info = MediaInfo.from_dict(json.loads(data)) if data else None
+        except (json.JSONDecodeError, TypeError):
+            info = None
+        entries[path] = (timestamp, info)
+    return entries
+
+def record_capture_media(media_infos):
+    """Store probe results (and with them the footage start) for catalogued captures"""
+    updates = [
+        (info.duration, info.duration, json.dumps(info.to_dict()), os.path.abspath(file_path))
+        for file_path, info in media_infos.items()
+        if info is not None and info.duration_known and info.duration
+    ]
+    if not updates:
+        return
+    
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is None:
+            return
+        try:
+            conn.executemany(
+                "UPDATE captures SET duration = ?, footage_start = timestamp - ?, data = ? WHERE path = ?",
+                updates
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Capture catalog update failed: {e}")
+
+def get_last_compile_time(folder):
+    """Footage end time of the newest capture in the last successful compile from this folder"""
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT value FROM catalog_meta WHERE key = ?", (f"last_compile:{os.path.abspath(folder)}",)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Capture catalog lookup failed: {e}")
+            return None
+    return float(row[0]) if row else None
+
+def mark_compiled(smart_clips):
+    """Remember, per capture folder, the newest footage that made it into a compilation"""
+    newest = {}
+    for video_path, _, _, creation_timestamp, _ in smart_clips:
+        folder = os.path.dirname(os.path.abspath(video_path))
+        newest[folder] = max(newest.get(folder, creation_timestamp), creation_timestamp)
+    
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is None:
+            return
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)",
+                [(f"last_compile:{folder}", repr(timestamp)) for folder, timestamp in newest.items()]
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Capture catalog update failed: {e}")
+
+DEFAULT_RENDER_RATE = 1.0  # Seconds of output rendered per second until a compilation has been timed
+
+def get_render_rate():
+    """Measured render speed (output seconds per wall-clock second) of recent compilations"""
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is None:
+            return DEFAULT_RENDER_RATE
+        try:
+            row = conn.execute("SELECT value FROM catalog_meta WHERE key = 'render_rate'").fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Capture catalog lookup failed: {e}")
+            return DEFAULT_RENDER_RATE
+    return float(row[0]) if row else DEFAULT_RENDER_RATE
+
+def record_render_rate(output_duration, elapsed):
+    """Fold a finished compilation's render speed into the stored estimate (moving average)"""
+    if output_duration <= 0 or elapsed <= 0:
+        return
+    rate = output_duration / elapsed
+    previous = get_render_rate()
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is None:
+            return
+        try:
+            stored = conn.execute("SELECT 1 FROM catalog_meta WHERE key = 'render_rate'").fetchone()
+            if stored:
+                rate = 0.7 * previous + 0.3 * rate  # Smooth out one-off slow or fast runs
+            conn.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('render_rate', ?)", (repr(rate),))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Capture catalog update failed: {e}")
+
+def _parse_selection_time(value):
+    """Parse an ISO date/time from the capture selection settings (None if empty or invalid)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.strip()).timestamp()
+    except ValueError:
+        logger.warning(f"Ignoring invalid capture selection time: {value!r}")
+        return None
+
+def get_capture_roots():
+    """
+    Capture folders with their clock offsets: (absolute path, seconds added to its timestamps).
+    The primary CONFIG["video_folder"] comes first; CONFIG["extra_video_folders"] adds more as
+    "path@offset" entries separated by ';' (offset optional). Missing extra folders are skipped.
+    """
+    roots = [(os.path.abspath(CONFIG["video_folder"]), float(CONFIG.get("video_clock_offset") or 0.0))]
+    for entry in (CONFIG.get("extra_video_folders") or "").replace("\n", ";").split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        path, separator, offset = entry.rpartition("@")
+        try:
+            offset = float(offset) if separator else 0.0
+        except ValueError:
+            path, offset = entry, 0.0  # '@' is part of the path
+        path = os.path.abspath(os.path.expanduser(path if separator else entry))
+        if not os.path.isdir(path):
+            logger.warning(f"Skipping missing capture folder: {path}")
             continue
+        if path not in (root for root, _ in roots):
+            roots.append((path, offset))
+    return roots
+
+def clock_offset_for(video_path):
+    """Clock offset of the capture root a file belongs to (0 if it is not in one)"""
+    folder = os.path.dirname(os.path.abspath(video_path))
+    for root, offset in get_capture_roots():
+        if root == folder:
+            return offset
+    return 0.0
+
+def _list_root_captures(folder, clock_offset):
+    """(path, timestamp) for a folder without the catalog, newest first"""
+    rows = []
+    for video_path in get_video_files(folder):
+        try:
+            rows.append((video_path, capture_timestamp(os.stat(video_path)) + clock_offset))
+        except OSError:
+            continue
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows
+
+def select_captures(roots=None, quiet=False):
+    """
+    Pick the captures to compile from every capture root, newest first on one global timeline.
+    Each root is an indexed catalog query (or a plain folder listing if the catalog is unavailable)
+    already sorted by time; the per-root lists are combined with a streaming k-way merge.
+    Honors CONFIG["compile_since"] ("last" or an ISO date/time) and CONFIG["compile_until"].
+    `quiet` (the plan preview) selects without printing and leaves the seek repair cache alone.
+    """
+    say = logger.debug if quiet else safe_print
+    roots = roots or get_capture_roots()
+    since_setting = (CONFIG.get("compile_since") or "").strip()
+    until = _parse_selection_time(CONFIG.get("compile_until"))
+    
+    per_root = []
+    catalog_complete = True
+    for folder, clock_offset in roots:
+        if since_setting.lower() == "last":
+            since = get_last_compile_time(folder)
+            if since is None:
+                say(f"[INFO] No previous compilation recorded for {folder} - using all captures")
+        else:
+            since = _parse_selection_time(since_setting)
         
-        # Check for overlap with previous extracted clip's footage
-        time_gap = clip_start_in_footage - last_clip_end_in_footage
+        synced = sync_capture_catalog(folder, clock_offset)
+        catalog_complete = catalog_complete and synced
+        rows = query_captures(folder, since, until) if synced else None
+        if rows is None:
+            if since is not None or until is not None:
+                logger.warning("Capture catalog unavailable - date selection ignored")
+            rows = _list_root_captures(folder, clock_offset)
+        if since is not None or until is not None:
+            since_text = datetime.fromtimestamp(since).strftime('%m/%d %H:%M:%S') if since is not None else "start"
+            until_text = datetime.fromtimestamp(until).strftime('%m/%d %H:%M:%S') if until is not None else "now"
+            say(f"[FILTER] {os.path.basename(folder)}: captures from {since_text} to {until_text}")
+        if len(roots) > 1:
+            say(f"[FOLDER] {folder}: {len(rows)} captures (clock offset {clock_offset:+g}s)")
+        per_root.append(rows)
+    
+    # Indexed copies of deleted or changed captures are dropped with their catalog rows
+    if not quiet:
+        prune_seek_repairs(evict_stale=catalog_complete)
+    
+    merged = heapq.merge(*per_root, key=lambda row: row[1], reverse=True)
+    return [video_path for video_path, _ in merged]
+
+# ===== KEYFRAME INDEX =====
+# We always cut the tail of each capture, so only keyframes in that tail window are indexed.
+# MP4 indexes come straight from the sample tables; everything else is read with ffprobe
+# packet flags over a limited read interval (no decoding, never the whole file).
+KEYFRAME_TAIL_MARGIN = 10.0  # Seconds indexed before the tail window so the keyframe before the in-point is included
+
+def _read_tail_keyframes_ffprobe(file_path, window_start):
+    """Keyframe timestamps from window_start to the end of the file using packet flags only"""
+    command = (
+        f'"{FFPROBE_PATH}" -v quiet -select_streams v:0 -show_entries packet=pts_time,flags '
+        f'-of csv=p=0 -read_intervals {window_start:.3f}% "{file_path}"'
+    )
+    success, stdout, stderr = run_ffmpeg_command(command, timeout=60)
+    if not success:
+        return None
+    
+    keyframes = []
+    for line in stdout.splitlines():
+        pts_time, _, flags = line.strip().partition(',')
+        if 'K' in flags and pts_time not in ('', 'N/A'):
+            keyframes.append(round(float(pts_time), 6))
+    return sorted(keyframes)
+
+def get_tail_keyframes(file_path, tail_seconds, media_info=None):
+    """
+    Keyframe timestamps (seconds) covering the last tail_seconds of a file, plus a margin before it.
+    Persisted in the probe cache database keyed by (path, size, mtime); a cached index is reused
+    whenever it already covers the requested window. Returns [] if the index cannot be built.
+    """
+    if media_info is None:
+        media_info = probe_media_info(file_path)
+    if not media_info or not media_info.duration:
+        return []
+    window_start = max(0.0, media_info.duration - tail_seconds - KEYFRAME_TAIL_MARGIN)
+    
+    try:
+        path, size, mtime = _probe_cache_key(file_path)
+    except OSError:
+        return []
+    
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is not None:
+            try:
+                row = conn.execute(
+                    "SELECT data FROM keyframe_index WHERE path = ? AND size = ? AND mtime = ? AND window_start <= ?",
+                    (path, size, mtime, window_start)
+                ).fetchone()
+                if row:
+                    return [t for t in json.loads(row[0]) if t >= window_start]
+            except (sqlite3.Error, json.JSONDecodeError) as e:
+                logger.warning(f"Keyframe cache lookup failed for {file_path}: {e}")
+    
+    keyframes = None
+    indexed_from = window_start
+    if os.path.splitext(file_path)[1].lower() in MP4_EXTENSIONS:
+        try:
+            keyframes = read_mp4_keyframes(file_path)
+            indexed_from = 0.0  # The whole sample table is read anyway
+        except (OSError, ValueError, IndexError, StopIteration, struct.error) as e:
+            logger.debug(f"Native keyframe read failed for {file_path}: {e}")
+    if keyframes is None:
+        keyframes = _read_tail_keyframes_ffprobe(file_path, window_start)
+    if keyframes is None:
+        logger.warning(f"Could not index keyframes for {os.path.basename(file_path)}")
+        return []
+    
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is not None:
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO keyframe_index (path, size, mtime, window_start, data) VALUES (?, ?, ?, ?, ?)",
+                    (path, size, mtime, indexed_from, json.dumps(keyframes))
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Keyframe cache write failed for {file_path}: {e}")
+    
+    return [t for t in keyframes if t >= window_start]
+
+def keyframe_at_or_before(keyframes, timestamp):
+    """Latest keyframe at or before timestamp (None if the index does not reach back that far)"""
+    index = bisect.bisect_right(keyframes, timestamp + 1e-6)
+    return keyframes[index - 1] if index else None
+
+def keyframe_at_or_after(keyframes, timestamp):
+    """Earliest keyframe at or after timestamp (None if there is none in the index)"""
+    index = bisect.bisect_left(keyframes, timestamp - 1e-6)
+    return keyframes[index] if index < len(keyframes) else None
+
+def index_clip_keyframes(smart_clips):
+    """Build (or load) the tail keyframe index of every planned clip in parallel"""
+    if not smart_clips:
+        return {}
+    
+    def index_clip(clip):
+        video_path, start_time, extract_duration, _, media_info = clip
+        source_path = get_seek_repair(video_path) or video_path
+        return video_path, get_tail_keyframes(source_path, media_info.duration - start_time, media_info)
+    
+    index_start = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, min(CONFIG["probe_workers"], len(smart_clips)))) as executor:
+        keyframe_index = dict(executor.map(index_clip, smart_clips))
+    logger.info(f"Keyframe index ready for {len(keyframe_index)} captures in {time.time() - index_start:.2f}s")
+    return keyframe_index
+
+# ===== INTEGRITY PRE-CHECK =====
+# Broken captures (Game Bar killed mid-write, missing moov, zero-length files) are rejected from
+# their headers before planning instead of failing or timing out during extraction.
+QUARANTINE_DIR = LOGS_DIR
+
+def _last_mp4_box_offset(buf, file_size):
+    """Offset of the top-level box that runs past the end of the file"""
+    pos = 0
+    while pos + 8 <= file_size:
+        size = struct.unpack_from('>I', buf, pos)[0]
+        if size == 1:
+            size = struct.unpack_from('>Q', buf, pos + 8)[0]
+        if size < 8 or pos + size > file_size:
+            return pos
+        pos += size
+    return pos
+
+def _check_mp4_structure(file_path, file_size):
+    """Byte-level MP4/MOV check: top-level boxes must fit in the file and a movie header must exist"""
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            top_level = []
+            try:
+                for box_type, _, _ in _iter_mp4_boxes(buf, 0, file_size):
+                    top_level.append(box_type)
+            except ValueError:
+                box_type = struct.unpack_from('>4s', buf, _last_mp4_box_offset(buf, file_size) + 4)[0]
+                return f"truncated '{box_type.decode('latin-1')}' box (recording interrupted?)"
+    if b'moov' not in top_level:
+        return "missing moov box (recording interrupted?)"
+    return None
+
+def _check_matroska_structure(file_path, file_size):
+    """Byte-level Matroska check: EBML header followed by a Segment that fits in the file"""
+    with open(file_path, 'rb') as f:
+        head = f.read(4096)
+    if head[:4] != b'\x1a\x45\xdf\xa3':
+        return "not a Matroska file (bad EBML header)"
+    try:
+        _, pos = _read_ebml_vint(head, 0, keep_marker=True)
+        header_size, pos = _read_ebml_vint(head, pos)
+        segment_id, pos = _read_ebml_vint(head, pos + header_size, keep_marker=True)
+        segment_size, segment_start = _read_ebml_vint(head, pos)
+    except (ValueError, IndexError):
+        return "truncated EBML header"
+    if segment_id != MKV_SEGMENT:
+        return "missing Segment element"
+    # Unknown size is normal for unfinalized recordings (repaired later); a known size must fit
+    if segment_size >= 0 and segment_start + segment_size > file_size:
+        return "truncated Segment (file cut short)"
+    return None
+
+def _check_avi_structure(file_path):
+    """Byte-level AVI check: RIFF/AVI signature and an hdrl list"""
+    with open(file_path, 'rb') as f:
+        head = f.read(24)
+    if head[:4] != b'RIFF' or head[8:12] != b'AVI ':
+        return "not an AVI file (bad RIFF header)"
+    if head[12:16] != b'LIST' or head[20:24] != b'hdrl':
+        return "missing AVI header list"
+    return None
+
+def check_capture_integrity(file_path):
+    """
+    Cheap container-level validation from headers alone.
+    Returns None when the capture looks usable, otherwise a short reason string.
+    Falls back to ffprobe only for formats without a byte-level check.
+    """
+    try:
+        file_size = os.path.getsize(file_path)
+    except OSError as e:
+        return f"cannot stat file: {e}"
+    if file_size == 0:
+        return "zero-length file"
+    
+    ext = os.path.splitext(file_path)[1].lower()
+    try:
+        if ext in MP4_EXTENSIONS:
+            reason = _check_mp4_structure(file_path, file_size)
+        elif ext in MATROSKA_EXTENSIONS:
+            reason = _check_matroska_structure(file_path, file_size)
+        elif ext == ".avi":
+            reason = _check_avi_structure(file_path)
+        else:
+            info = probe_media_info(file_path, timeout=10)
+            reason = None if info and info.width else "ffprobe could not read a video stream"
+    except (OSError, ValueError, struct.error) as e:
+        reason = f"unreadable header: {e}"
+    return reason
+
+def write_quarantine_report(broken_files):
+    """Write the list of rejected captures (path, size, reason) next to the logs"""
+    os.makedirs(QUARANTINE_DIR, exist_ok=True)
+    report_path = os.path.join(QUARANTINE_DIR, f"quarantine_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(f"B-Magic's Auto Vid Compiler - quarantined captures ({datetime.now():%Y-%m-%d %H:%M:%S})\n")
+        for file_path, reason in broken_files:
+            try:
+                size_mb = os.path.getsize(file_path) / (1024 * 1024)
+            except OSError:
+                size_mb = 0.0
+            f.write(f"{file_path} | {size_mb:.1f}MB | {reason}\n")
+    return report_path
+
+_quarantined = set()  # Captures already reported this run (the plan preview re-plans often)
+_quarantined_lock = threading.Lock()
+
+def quarantine_captures(broken_files):
+    """
+    Report captures rejected by the integrity pre-check and list them in a quarantine report.
+    `broken_files` are (path, reason); each capture is reported once per run.
+    """
+    with _quarantined_lock:
+        broken_files = [(path, reason) for path, reason in broken_files if path not in _quarantined]
+        _quarantined.update(path for path, _ in broken_files)
+    if not broken_files:
+        return
+    
+    report_path = write_quarantine_report(broken_files)
+    safe_print(f"[WARNING] Skipping {len(broken_files)} broken capture(s) - see {report_path}")
+    for file_path, reason in broken_files:
+        safe_print(f"   [WARNING] {os.path.basename(file_path)}: {reason}")
+        logger.warning(f"Quarantined {file_path}: {reason}")
+
+# ===== AUDIO ALIGNMENT =====
+# File timestamps are coarse (and ctime is the inode change time on Linux), so consecutive replay
+# saves can keep a duplicated second or lose one. Where two captures overlap, a low-rate mono audio
+# envelope of the older capture's tail and the newer capture's head is cross-correlated (NumPy FFT)
+# to find the exact offset between them.
+ALIGN_DECODE_RATE = 8000    # Hz, mono PCM decoded through a pipe
+ALIGN_ENVELOPE_RATE = 1000  # Hz, envelope resolution (1 ms)
+ALIGN_SEARCH = 3.0          # Seconds the true offset may differ from the timestamp estimate
+ALIGN_MAX_WINDOW = 20.0     # Seconds of audio decoded from each capture at most
+ALIGN_MIN_OVERLAP = 1.0     # Seconds of shared audio needed to trust a correlation
+
+def _decode_audio_envelope(file_path, start, duration):
+    """Mean-absolute audio envelope at ALIGN_ENVELOPE_RATE for a time range, or None"""
+    command = (
+        f'"{FFMPEG_PATH}" -v error -ss {start:.3f} -t {duration:.3f} -i "{file_path}" '
+        f'-vn -ac 1 -ar {ALIGN_DECODE_RATE} -f s16le pipe:1'
+    )
+    try:
+        result = subprocess.run(command, shell=True, capture_output=True, timeout=60)
+    except subprocess.TimeoutExpired:
+        return None
+    if result.returncode != 0 or not result.stdout:
+        return None
+    
+    samples = np.abs(np.frombuffer(result.stdout, dtype='<i2').astype(np.float32))
+    block = ALIGN_DECODE_RATE // ALIGN_ENVELOPE_RATE
+    samples = samples[:len(samples) - len(samples) % block]
+    return samples.reshape(-1, block).mean(axis=1)
+
+def _correlate_envelopes(older, newer, max_lag):
+    """
+    Best lag (in envelope samples) of `newer` inside `older`, and its normalized correlation.
+    Lag k means newer[0] lines up with older[k]; only lags up to max_lag with at least
+    ALIGN_MIN_OVERLAP of shared audio are considered.
+    """
+    older = older - older.mean()
+    newer = newer - newer.mean()
+    size = 1 << (len(older) + len(newer)).bit_length()
+    correlation = np.fft.irfft(np.fft.rfft(older, size) * np.conj(np.fft.rfft(newer, size)), size)
+    
+    lags = np.arange(len(older))
+    overlap = np.minimum(len(newer), len(older) - lags)  # Shared samples at each lag
+    older_energy = np.concatenate(([0.0], np.cumsum(older ** 2)))
+    newer_energy = np.concatenate(([0.0], np.cumsum(newer ** 2)))
+    energy = (older_energy[lags + overlap] - older_energy[lags]) * newer_energy[overlap]
+    
+    valid = (overlap >= ALIGN_MIN_OVERLAP * ALIGN_ENVELOPE_RATE) & (lags <= max_lag) & (energy > 0)
+    if not valid.any():
+        return None, 0.0
+    score = np.where(valid, correlation[:len(older)] / np.sqrt(np.where(valid, energy, 1.0)), -np.inf)
+    best = int(np.argmax(score))
+    return best, float(score[best])
+
+def measure_audio_offset(older_path, older_info, newer_path, newer_info, estimate):
+    """
+    Measure where the newer capture starts inside the older one, in seconds from the older
+    capture's start. `estimate` comes from the file timestamps; the answer is searched within
+    ALIGN_SEARCH of it. Results are cached per file pair. Returns (offset, confidence) or None.
+    """
+    try:
+        older_key = _probe_cache_key(older_path)
+        newer_key = _probe_cache_key(newer_path)
+    except OSError:
+        return None
+    
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is not None:
+            try:
+                row = conn.execute(
+                    "SELECT offset, confidence FROM audio_alignment WHERE older_path = ? AND older_size = ? "
+                    "AND older_mtime = ? AND newer_path = ? AND newer_size = ? AND newer_mtime = ?",
+                    older_key + newer_key
+                ).fetchone()
+                if row and abs(row[0] - estimate) <= ALIGN_SEARCH:
+                    return row[0], row[1]
+            except sqlite3.Error as e:
+                logger.warning(f"Alignment cache lookup failed: {e}")
+    
+    # Older capture from ALIGN_SEARCH before the estimate against the newer capture's head, at most
+    # ALIGN_MAX_WINDOW seconds each - long overlaps are cut at the end, never before the estimate
+    older_start = max(0.0, estimate - ALIGN_SEARCH)
+    window = min(older_info.duration - older_start, ALIGN_MAX_WINDOW, newer_info.duration)
+    if window < ALIGN_MIN_OVERLAP:
+        return None
+    older_envelope = _decode_audio_envelope(get_seek_repair(older_path) or older_path, older_start, window)
+    newer_envelope = _decode_audio_envelope(get_seek_repair(newer_path) or newer_path, 0.0, window)
+    if older_envelope is None or newer_envelope is None:
+        return None
+    
+    max_lag = int(round((estimate + ALIGN_SEARCH - older_start) * ALIGN_ENVELOPE_RATE))
+    lag, confidence = _correlate_envelopes(older_envelope, newer_envelope, max_lag)
+    if lag is None:
+        return None
+    offset = round(older_start + lag / ALIGN_ENVELOPE_RATE, 6)
+    if abs(offset - estimate) > ALIGN_SEARCH:
+        logger.info(f"Audio alignment outside the search range: {offset:.3f}s vs estimate {estimate:.3f}s - ignored")
+        return None
+    
+    with _probe_cache_lock:
+        conn = _get_probe_cache()
+        if conn is not None:
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO audio_alignment VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    older_key + newer_key + (offset, confidence)
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Alignment cache write failed: {e}")
+    return offset, confidence
+
+def align_footage_start(older_path, older_info, older_start, newer_path, newer_info, newer_start):
+    """
+    Footage start of the older capture lined up on the newer one's audio, or None to keep the
+    timestamp-based value (alignment off, no NumPy, no audio, no overlap or low confidence).
+    """
+    if not (CONFIG.get("audio_align") and NUMPY_AVAILABLE):
+        return None
+    if not (older_info.has_audio and newer_info.has_audio):
+        return None
+    
+    estimate = newer_start - older_start  # Seconds into the older capture where the newer one starts
+    if older_info.duration - estimate < ALIGN_MIN_OVERLAP - ALIGN_SEARCH:
+        return None  # Too far apart to share any footage
+    
+    measured = measure_audio_offset(older_path, older_info, newer_path, newer_info, estimate)
+    if measured is None:
+        return None
+    offset, confidence = measured
+    if confidence < CONFIG["audio_align_min_confidence"]:
+        logger.info(f"Audio alignment not confident: {os.path.basename(older_path)} -> "
+                    f"{os.path.basename(newer_path)} (score {confidence:.2f}) - keeping timestamps")
+        return None
+    
+    logger.info(f"Audio aligned: {os.path.basename(newer_path)} starts {offset:.3f}s into "
+                f"{os.path.basename(older_path)} (timestamps said {estimate:.3f}s, score {confidence:.2f})")
+    return newer_start - offset
+
+# ===== SEEKABILITY REPAIR =====
+# Captures without a seek index (no Cues, no duration, fragmented MP4 without an index) make
+# "-ss" degrade into a linear decode from the start of the file. Those files are remuxed once
+# with stream copy into an indexed Matroska file next to the logs and reused on later runs.
+SEEK_REPAIR_DIR = os.path.join(LOGS_DIR, "seek_repair")
+_seek_repairs = {}  # original path -> repaired path (this run)
+_seek_repairs_lock = threading.Lock()
+
+def _is_fragmented_mp4(file_path):
+    """True for MP4 files whose samples live in moof fragments with no mfra random-access index"""
+    try:
+        with open(file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                top_level = set()
+                for box_type, _, _ in _iter_mp4_boxes(buf, 0, len(buf)):
+                    top_level.add(box_type)
+                    if box_type == b'mfra':
+                        return False
+                return b'moof' in top_level
+    except (OSError, ValueError, struct.error):
+        return False
+
+def needs_seek_repair(file_path, media_info):
+    """Decide from probe data whether tail seeks in this file would fall back to a linear decode"""
+    if media_info is None or not CONFIG["seek_repair"]:
+        return False
+    if media_info.has_index is False or not media_info.duration_known:
+        return True
+    if media_info.has_index is None and os.path.splitext(file_path)[1].lower() in MP4_EXTENSIONS:
+        return _is_fragmented_mp4(file_path)
+    return False
+
+def _seek_repair_name(path, size, mtime):
+    """Cache file name for a repaired capture, keyed on (absolute path, size, mtime)"""
+    digest = hashlib.sha1(f"{path}|{size}|{mtime}".encode('utf-8')).hexdigest()[:16]
+    return f"{os.path.splitext(os.path.basename(path))[0]}_{digest}.mkv"
+
+def _seek_repair_path(file_path):
+    """Cache file for a repaired capture"""
+    return os.path.join(SEEK_REPAIR_DIR, _seek_repair_name(*_probe_cache_key(file_path)))
+
+def prune_seek_repairs(evict_stale=True):
+    """
+    Keep the seek repair cache bounded. Copies whose source capture was deleted or changed (no
+    catalogued capture has their key any more) are deleted, then the least recently used copies
+    beyond CONFIG["seek_repair_max_gb"]. Copies in use by this run are kept.
+    `evict_stale` needs a complete catalog - pass False when a capture folder could not be synced.
+    """
+    try:
+        entries = [entry for entry in os.scandir(SEEK_REPAIR_DIR) if entry.name.endswith('.mkv') and entry.is_file()]
+    except OSError:
+        return  # No repairs yet
+    with _seek_repairs_lock:
+        in_use = {os.path.basename(path) for path in _seek_repairs.values()}
+    
+    live = None
+    if evict_stale:
+        with _probe_cache_lock:
+            conn = _get_probe_cache()
+            if conn is not None:
+                try:
+                    live = {_seek_repair_name(*row) for row in conn.execute("SELECT path, size, mtime FROM captures")}
+                except sqlite3.Error as e:
+                    logger.warning(f"Seek repair cache: catalog unavailable, stale copies kept: {e}")
+    
+    kept, evicted, freed = [], 0, 0
+    for entry in entries:
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        if live is not None and entry.name not in live and entry.name not in in_use:
+            try:
+                os.remove(entry.path)
+                evicted += 1
+                freed += stat.st_size
+            except OSError:
+                pass
+        else:
+            kept.append((stat.st_mtime, stat.st_size, entry))
+    
+    # Size cap: copies are touched on reuse, so the oldest mtime is the least recently used
+    budget = CONFIG["seek_repair_max_gb"] * 1024 ** 3
+    total = sum(size for _, size, _ in kept)
+    for _, size, entry in sorted(kept, key=lambda item: item[0]):
+        if total <= budget:
+            break
+        if entry.name in in_use:
+            continue
+        try:
+            os.remove(entry.path)
+            evicted += 1
+            freed += size
+            total -= size
+        except OSError:
+            pass
+    
+    if evicted:
+        logger.info(f"Seek repair cache: deleted {evicted} copies ({freed / (1024 * 1024):.1f}MB), "
+                    f"{total / (1024 * 1024):.1f}MB kept")
+
+def repair_seekability(file_path):
+    """
+    Remux a capture with stream copy into an indexed Matroska file (Cues + Duration).
+    Reuses the cached repair from an earlier run when the source is unchanged.
+    Returns (repaired_path, MediaInfo) or (None, None) if the remux failed.
+    """
+    try:
+        repaired_path = _seek_repair_path(file_path)
+    except OSError as e:
+        logger.warning(f"Cannot repair {file_path}: {e}")
+        return None, None
+    
+    if os.path.exists(repaired_path):
+        logger.info(f"Seek repair: reusing indexed copy of {os.path.basename(file_path)}")
+        try:
+            os.utime(repaired_path)  # Last use, for prune_seek_repairs
+        except OSError:
+            pass
+    else:
+        os.makedirs(SEEK_REPAIR_DIR, exist_ok=True)
+        partial_path = repaired_path + ".part"
+        safe_print(f"   [TOOLS] Repairing seek index: {os.path.basename(file_path)} (one-time stream copy)")
+        remux_start = time.time()
+        command = f'"{FFMPEG_PATH}" -y -i "{file_path}" -map 0 -c copy -f matroska "{partial_path}"'
+        success, stdout, stderr = run_ffmpeg_command(command, timeout=600)
+        if not success:
+            logger.warning(f"Seek repair failed for {file_path}: {stderr}")
+            try:
+                os.remove(partial_path)
+            except OSError:
+                pass
+            return None, None
+        os.replace(partial_path, repaired_path)
+        logger.info(f"Seek repair: remuxed {os.path.basename(file_path)} in {time.time() - remux_start:.1f}s")
+    
+    repaired_info = probe_media_info(repaired_path)
+    if repaired_info is None or not repaired_info.duration:
+        return None, None
+    with _seek_repairs_lock:
+        _seek_repairs[file_path] = repaired_path
+    return repaired_path, repaired_info
+
+def get_seek_repair(file_path):
+    """Indexed replacement for a capture repaired during this run, or None"""
+    with _seek_repairs_lock:
+        return _seek_repairs.get(file_path)
+
+def get_video_info(video_path):
+    """Get video information (width, height, duration) from the shared probe record"""
+    info = probe_media_info(video_path)
+    
+    if info and info.width and info.height:
+        return info.width, info.height, info.duration
+    
+    return None, None, None
+
+def classify_resolution(width, height):
+    """Normalize a source resolution to the standard output resolution for its aspect ratio"""
+    aspect_ratio = width / height
+    
+    if aspect_ratio > 2.3:  # Ultra-wide (21:9, 32:9, etc)
+        if width >= 3440:
+            return "3440x1440"  # UWQHD
+        return "2560x1080"  # Ultra-wide standard
+    elif aspect_ratio > 1.7:  # Wide aspect ratios (16:9, 16:10)
+        if width >= 2560:
+            return "2560x1440"  # 1440p
+        elif width >= 1920:
+            return "1920x1080"  # 1080p
+        return "1280x720"   # 720p
+    return "1920x1080"  # Standard/square ratios - default fallback
+
+def detect_optimal_resolution(smart_clips):
+    """
+    Smart resolution detection - picks the output resolution from the clips that will actually be compiled.
+    Pure function over the probe records already collected by calculate_smart_clips: builds a histogram
+    of normalized resolutions weighted by extracted duration, so no extra probing is needed.
+    This makes the script universal across different gaming setups and monitor configurations
+    """
+    resolution_weights = {}
+    total_weight = 0.0
+    
+    safe_print("[SEARCH] Analyzing your video resolution patterns...")
+    
+    for video_path, start_time, extract_duration, _, media_info in smart_clips:
+        if not media_info or not media_info.width or not media_info.height:
+            continue
+        resolution = classify_resolution(media_info.width, media_info.height)
+        resolution_weights[resolution] = resolution_weights.get(resolution, 0.0) + extract_duration
+        total_weight += extract_duration
         
-        if time_gap >= 0:
-            # No overlap - extracted clips are chronologically separate
-            logger.info(f"No overlap: {os.path.basename(video_path)} (gap: {time_gap:.1f}s) -> start={start_time:.3f}s, duration={extract_duration:.3f}s")
-            smart_clips.append((video_path, start_time, extract_duration, creation_timestamp))
-            last_clip_end_in_footage = clip_end_in_footage
+        safe_print(f"   [VIDEO] {Path(video_path).name}: {media_info.width}x{media_info.height} -> {resolution} ({extract_duration:.1f}s)")
+    
+    # Determine optimal resolution
+    if resolution_weights and total_weight > 0:
+        # Use the resolution covering the most compiled footage
+        optimal_resolution = max(resolution_weights.items(), key=lambda x: x[1])[0]
+        confidence = resolution_weights[optimal_resolution] / total_weight * 100
         
-        else:
-            # OVERLAP DETECTED in extracted clips
-            overlap_duration = abs(time_gap)
-            
-            logger.info(f"Overlap detected: {os.path.basename(video_path)} (overlap: {overlap_duration:.1f}s)")
-            
-            # Adjust start_time to skip the overlapping footage
-            # We need to start AFTER the previous clip ended
-            overlap_offset_in_video = overlap_duration
-            
-            # Check if we have enough footage left after skipping overlap
-            new_start_time = start_time + overlap_offset_in_video
+        safe_print(f"[OK] Detected optimal resolution: {optimal_resolution} ({confidence:.0f}% of footage)")
+        safe_print(f"   Analysis based on {len(smart_clips)} clips ({total_weight:.1f}s of footage)")
+        return optimal_resolution
+    else:
+        # Fallback to a versatile standard
+        fallback_resolution = "1920x1080"
+        safe_print(f"[WARNING] No videos found for analysis, using fallback: {fallback_resolution}")
+        return fallback_resolution
+
+def has_audio_stream(video_path):
+    """Check if video has audio stream from the shared probe record"""
+    info = probe_media_info(video_path)
+    return bool(info and info.has_audio)
+
+# The concat demuxer does not rescale between files, so every clip is written with the same
+# video time base - 90 kHz holds all common frame rates (24, 25, 29.97, 30, 60) exactly.
+VIDEO_TIMESCALE = 90000
+
+FINAL_AUDIO_FILTER = "aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo"
+
+def final_video_filter(resolution=None):
+    """Scale, letterbox and frame rate filter chain of the final compilation profile"""
+    width, height = map(int, (resolution or CONFIG["output_resolution"]).split('x'))
+    return (f'scale={width}:{height}:force_original_aspect_ratio=decrease,'
+            f'pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,fps={CONFIG["output_fps"]},format=yuv420p')
+
+def final_encoder_args(threads=None):
+    """Encoder settings of the final compilation profile (`threads`: encoder thread budget, see encode_budget)"""
+    return (f'-c:v libx264 -preset fast -b:v {CONFIG["video_bitrate"]} -video_track_timescale {VIDEO_TIMESCALE} '
+            f'-c:a aac -b:a {CONFIG["audio_bitrate"]}' + (f' -threads {threads}' if threads else ''))
+
+def final_profile_args(resolution=None, threads=None):
+    """
+    Filters and encoder settings of the final compilation profile. Clips and intros are encoded
+    straight into it, so concatenate_videos joins them with stream copy instead of re-encoding.
+    """
+    return f'-vf "{final_video_filter(resolution)}" -af "{FINAL_AUDIO_FILTER}" {final_encoder_args(threads)}'
+
+ENCODER_THREADS_PER_JOB = 4  # Automatic job count: libx264 on short clips stops scaling at a few threads
+
+def encode_budget(job_count, jobs=None, session=None):
+    """
+    (parallel ffmpeg jobs, -threads per job) for `job_count` encodes, so that jobs x threads
+    matches the CPU cores. One libx264 process per core count leaves cores idle on short clips
+    (lookahead, seeking, muxing); several smaller ones keep them busy. Sessions rendered at the
+    same time (compile_sessions) split the cores between them.
+    """
+    cores = os.cpu_count() or 4
+    if session:
+        cores = max(1, cores // max(1, CONFIG["session_workers"]))
+    jobs = jobs or CONFIG.get("extract_jobs") or max(1, cores // ENCODER_THREADS_PER_JOB)
+    jobs = max(1, min(jobs, job_count))
+    return jobs, max(1, cores // jobs)
+
+def can_stream_copy(media_info, resolution=None):
+    """True if a capture's video can go into the output as it is (H.264 yuv420p at the output size and frame rate)"""
+    width, height = map(int, (resolution or CONFIG["output_resolution"]).split('x'))
+    return bool(
+        media_info and media_info.video_codec == "h264" and media_info.pix_fmt == "yuv420p"
+        and media_info.width == width and media_info.height == height
+        and media_info.fps and abs(media_info.fps - CONFIG["output_fps"]) < 0.5  # Measured average rate
+    )
+
+def matches_final_profile(media_info, resolution=None):
+    """True if a file is already in the final profile and can be joined without normalization"""
+    return can_stream_copy(media_info, resolution) and (
+        media_info.audio_codec == "aac" and media_info.sample_rate == 44100 and media_info.channels == 2
+    )
+
+H264_PROFILES = {"Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high"}
+
+_encoder_args = {}  # source path -> libx264 options matching its video stream (this run)
+_encoder_args_lock = threading.Lock()
+
+def matching_encoder_args(file_path):
+    """
+    libx264 options matching a capture's H.264 stream (profile, level, B-frames, bitrate), so an
+    encoded clip head joins the stream-copied rest as one stream. Probed on first use - only
+    clips that need a smart cut pay for it.
+    """
+    with _encoder_args_lock:
+        if file_path in _encoder_args:
+            return _encoder_args[file_path]
+    
+    command = (f'"{FFPROBE_PATH}" -v quiet -select_streams v:0 '
+               f'-show_entries stream=profile,level,has_b_frames,bit_rate -of json "{file_path}"')
+    success, stdout, stderr = run_ffmpeg_command(command, timeout=30)
+    stream = {}
+    if success:
+        try:
+            stream = (json.loads(stdout).get('streams') or [{}])[0]
+        except json.JSONDecodeError:
+            pass
+    
+    args = ['-c:v libx264 -preset fast -pix_fmt yuv420p']
+    if stream.get('profile') in H264_PROFILES:
+        args.append(f'-profile:v {H264_PROFILES[stream["profile"]]}')
+    if stream.get('level', 0) > 0:
+        args.append(f'-level {stream["level"] / 10:g}')  # 41 -> 4.1
+    if stream.get('has_b_frames') == 0:
+        args.append('-bf 0')
+    args.append(f'-b:v {stream.get("bit_rate") or CONFIG["video_bitrate"]}')  # Matroska has no per-stream bitrate
+    
+    with _encoder_args_lock:
+        _encoder_args[file_path] = ' '.join(args)
+    return _encoder_args[file_path]
+
+def passthrough_audio_args(media_info, source_index=0):
+    """
+    Extra inputs and audio options for a stream-copied clip: AAC 44.1 kHz stereo is copied, other
+    audio is re-encoded, and captures without audio get silence (added as the next input).
+    """
+    if not media_info.has_audio:
+        return ('-f lavfi -i anullsrc=channel_layout=stereo:sample_rate=44100',
+                f'-map {source_index + 1}:a -c:a aac -b:a {CONFIG["audio_bitrate"]} -shortest')
+    if media_info.audio_codec == "aac" and media_info.sample_rate == 44100 and media_info.channels == 2:
+        return '', f'-map {source_index}:a:0 -c:a copy'
+    return '', f'-map {source_index}:a:0 -af "{FINAL_AUDIO_FILTER}" -c:a aac -b:a {CONFIG["audio_bitrate"]}'
+
+STREAM_COPY_MAX_SKIP = 2.0  # Without smart cut: seconds after the in-point a keyframe cut may start before re-encoding instead
+
+def extract_passthrough_clip(source_path, output_path, start_time, extract_duration, media_info, keyframes,
+                             threads=None):
+    """
+    Cut a profile-compatible capture with stream copy. A copy can only start on a keyframe:
+    with smart cut, the partial GOP between the in-point and the next keyframe is encoded with
+    matching parameters and joined to the copied rest, so the cut stays frame-accurate.
+    Without it the clip starts on that keyframe (or at most one frame before the in-point, as
+    starting further back would repeat footage of the previous clip).
+    Returns False when no keyframe is usable - the caller re-encodes the clip instead.
+    """
+    end_time = start_time + extract_duration
+    frame = 1.0 / media_info.fps
+    cut = keyframe_at_or_after(keyframes or [], start_time - frame)
+    if cut is None or end_time - cut < MIN_CLIP_DURATION:
+        return False
+    head = cut - start_time > frame / 2 and CONFIG.get("smart_cut")
+    if not head and cut - start_time > STREAM_COPY_MAX_SKIP:
+        return False
+    
+    copy_start = time.time()
+    if not head:
+        inputs, audio = passthrough_audio_args(media_info)
+        # Demuxers may seek to an earlier keyframe; -copypriorss 0 drops the packets before the cut
+        # instead of hiding them behind an edit list, which the concat demuxer would play
+        command = (
+            f'"{FFMPEG_PATH}" -y -ss {cut - 0.0005:.4f} -i "{source_path}" {inputs} -t {end_time - cut:.3f} '
+            f'-map 0:v:0 {audio} -c:v copy -copypriorss 0 -video_track_timescale {VIDEO_TIMESCALE} "{output_path}"'
+        )
+        success, stdout, stderr = run_ffmpeg_command(command)
+    else:
+        # Video only: encoded head [in-point, keyframe) + copied tail, joined by the concat demuxer.
+        # The audio is taken in one piece from the source afterwards, so there is no gap at the join.
+        base = os.path.splitext(output_path)[0]
+        head_path, tail_path, list_path = f"{base}.head.mp4", f"{base}.tail.mp4", f"{base}.parts.txt"
+        inputs, audio = passthrough_audio_args(media_info, source_index=1)
+        commands = (
+            # Half a frame short of the keyframe, so the keyframe itself comes from the copy
+            f'"{FFMPEG_PATH}" -y -ss {start_time:.4f} -i "{source_path}" -t {cut - start_time - frame / 2:.4f} '
+            f'-an {matching_encoder_args(source_path)} {f"-threads {threads} " if threads else ""}'
+            f'-video_track_timescale {VIDEO_TIMESCALE} "{head_path}"',
+            f'"{FFMPEG_PATH}" -y -ss {cut - 0.0005:.4f} -i "{source_path}" -t {end_time - cut:.3f} '
+            f'-an -c:v copy -copypriorss 0 -video_track_timescale {VIDEO_TIMESCALE} "{tail_path}"',
+            # Copied audio starts at the packet before the in-point as well - dropped, not edit-listed
+            f'"{FFMPEG_PATH}" -y -f concat -safe 0 -i "{list_path}" -ss {start_time:.4f} -i "{source_path}" {inputs} '
+            f'-t {extract_duration:.3f} -map 0:v:0 {audio} -c:v copy -copypriorss 0 '
+            f'-video_track_timescale {VIDEO_TIMESCALE} "{output_path}"',
+        )
+        with open(list_path, 'w') as f:
+            for part in (head_path, tail_path):
+                f.write(f"file '{os.path.abspath(part)}'\n")
+        try:
+            for command in commands:
+                success, stdout, stderr = run_ffmpeg_command(command)
+                if not success:
+                    break
+        finally:
+            for part in (head_path, tail_path, list_path):
+                if os.path.exists(part):
+                    os.remove(part)
+    
+    if not success:
+        logger.warning(f"Stream copy failed for {os.path.basename(source_path)}, re-encoding: {stderr}")
+        return False
+    if head:
+        logger.info(f"Smart cut: {os.path.basename(source_path)} - encoded {cut - start_time:.3f}s up to keyframe "
+                    f"{cut:.3f}s, copied {end_time - cut:.3f}s in {time.time() - copy_start:.1f}s")
+        safe_print(f"      [COPY] Smart cut: {cut - start_time:.2f}s encoded up to the keyframe at {cut:.2f}s, rest copied")
+    else:
+        logger.info(f"Stream copy: {os.path.basename(source_path)} from keyframe {cut:.3f}s "
+                    f"({cut - start_time:.3f}s after the in-point) in {time.time() - copy_start:.1f}s")
+        safe_print(f"      [COPY] Stream copy from keyframe at {cut:.2f}s - no video re-encode")
+    return True
+
+def extract_intro_clip(input_path, output_path, max_duration=7.0, media_info=None, resolution=None):
+    """
+    Extract intro clip from the beginning of a video (not the end like gameplay clips),
+    encoded straight into the final profile at `resolution`.
+    """
+    
+    if media_info is None:
+        media_info = probe_media_info(input_path)
+    total_duration = media_info.duration if media_info else None
+    
+    if total_duration is None or total_duration <= 0:
+        safe_print(f"[WARNING] Warning: Could not get duration for {input_path}")
+        return False
+    
+    # For intros, take from the beginning up to max_duration
+    start_time = 0
+    if total_duration <= max_duration:
+        # Use the entire intro if it's shorter than max_duration
+        extract_duration = total_duration
+    else:
+        # Take the first max_duration seconds
+        extract_duration = max_duration
+    
+    # Extract the intro clip from the beginning
+    if media_info.has_audio:
+        # Video has audio - extract normally
+        command = f'"{FFMPEG_PATH}" -y -ss {start_time} -i "{input_path}" -t {extract_duration} {final_profile_args(resolution)} "{output_path}"'
+    else:
+        # Video has no audio - add silent audio track
+        command = f'"{FFMPEG_PATH}" -y -ss {start_time} -i "{input_path}" -f lavfi -i anullsrc=channel_layout=stereo:sample_rate=44100 -t {extract_duration} {final_profile_args(resolution)} -shortest "{output_path}"'
+    
+    success, stdout, stderr = run_ffmpeg_command(command, timeout=90)  # Give intro extraction more time
+    
+    if not success:
+        safe_print(f"[ERROR] Error extracting intro from {input_path}: {stderr}")
+    
+    return success
+
+def extract_smart_clip(input_path, output_path, start_time, extract_duration, media_info=None, keyframes=None,
+                       resolution=None, threads=None):
+    """
+    Extract a clip with precise start time and duration to avoid overlaps.
+    Pass the MediaInfo and tail keyframe index from planning to avoid probing the file again.
+    Captures repaired during planning are read from their indexed copy.
+    The clip is encoded once, straight into the final profile at `resolution` - or, for captures
+    already in that profile, stream-copied from a keyframe (extract_passthrough_clip).
+    `threads` limits the encoder when several clips are extracted at once (extract_clips_parallel).
+    """
+    repaired_path = get_seek_repair(input_path)
+    source_path = repaired_path or input_path
+    if media_info is None:
+        media_info = probe_media_info(source_path)
+    total_duration = media_info.duration if media_info else None
+    
+    if total_duration is None or total_duration <= 0:
+        print(f"Warning: Could not get duration for {input_path}")
+        return False
+    
+    # Validate extraction parameters
+    if start_time < 0:
+        start_time = 0
+    if start_time >= total_duration:
+        print(f"Warning: Start time {start_time}s exceeds video duration {total_duration}s")
+        return False
+    if start_time + extract_duration > total_duration:
+        extract_duration = total_duration - start_time
+    if extract_duration <= 0:
+        print(f"Warning: No content to extract (duration would be {extract_duration}s)")
+        return False
+    
+    logger.info(f"Smart extract: {input_path} -> start={start_time:.3f}s, duration={extract_duration:.3f}s")
+    
+    # Input seeking lands on the keyframe before the in-point and decodes forward from there
+    if keyframes is None:
+        keyframes = get_tail_keyframes(source_path, total_duration - start_time, media_info)
+    seek_keyframe = keyframe_at_or_before(keyframes, start_time)
+    lead_in = start_time - seek_keyframe if seek_keyframe is not None else 0.0
+    if seek_keyframe is not None:
+        logger.info(f"   Keyframe at {seek_keyframe:.3f}s -> decode lead-in {lead_in:.3f}s")
+    
+    # Profile-compatible captures are remuxed - the CPU-bound encode becomes an I/O-bound copy
+    if CONFIG.get("stream_copy") and can_stream_copy(media_info, resolution):
+        if extract_passthrough_clip(source_path, output_path, start_time, extract_duration, media_info, keyframes,
+                                    threads):
+            return True
+    
+    # Extract the clip with precise timing
+    if media_info.has_audio:
+        command = f'"{FFMPEG_PATH}" -y -ss {start_time} -i "{source_path}" -t {extract_duration} {final_profile_args(resolution, threads)} "{output_path}"'
+    else:
+        command = f'"{FFMPEG_PATH}" -y -ss {start_time} -i "{source_path}" -f lavfi -i anullsrc=channel_layout=stereo:sample_rate=44100 -t {extract_duration} {final_profile_args(resolution, threads)} -shortest "{output_path}"'
+    
+    extract_start = time.time()
+    success, stdout, stderr = run_ffmpeg_command(command)
+    extract_time = time.time() - extract_start
+    if not success:
+        print(f"Error extracting smart clip from {input_path}: {stderr}")
+    elif repaired_path:
+        # Without the index, everything before the seek keyframe would have been decoded as well
+        decode_rate = extract_time / max(extract_duration + lead_in, 0.001)  # Wall seconds per footage second
+        saved = (start_time - lead_in) * decode_rate
+        logger.info(f"Seek repair saved ~{saved:.1f}s on tail extraction of {os.path.basename(input_path)} "
+                    f"(extraction took {extract_time:.1f}s)")
+    
+    return success
+
+def extract_clips_parallel(smart_clips, jobs, resolution=None, session=None, workers=None):
+    """
+    Extract planned clips with several ffmpeg processes at once, each limited to its share of the
+    CPU cores (encode_budget). `jobs` are (index into smart_clips, output path, keyframes or None).
+    Returns one success flag per job, in job order - the concat list does not depend on which
+    encode finishes first.
+    """
+    if not jobs:
+        return []
+    workers, threads = encode_budget(len(jobs), workers, session)
+    safe_print(f"   [PARALLEL] {len(jobs)} clips: {workers} ffmpeg job(s) at a time x {threads} encoder threads")
+    
+    def extract(job):
+        i, output_path, keyframes = job
+        video_file, start_time, extract_duration, _, media_info = smart_clips[i]
+        try:
+            return extract_smart_clip(video_file, output_path, start_time, extract_duration, media_info, keyframes,
+                                      resolution, threads)
+        except Exception as e:
+            safe_print(f"      [ERROR] Error processing {os.path.basename(video_file)}: {e}")
+            logger.error(f"Error processing {video_file}: {e}")
+            return False
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(extract, jobs))
+
+def benchmark_extraction(smart_clips, output_path, resolution, temp_dir, seek_keyframes=None, session=None):
+    """
+    Extract every planned clip once per job count in CONFIG["extract_benchmark"] ("1,2,4") and
+    report the throughput, to pick EXTRACT_JOBS for this machine. Nothing is compiled; the clips
+    are deleted after each run. The table is written next to `output_path` as CSV.
+    Returns the report path, or False.
+    """
+    try:
+        job_counts = [int(count) for count in str(CONFIG["extract_benchmark"]).split(',') if count.strip()]
+    except ValueError:
+        safe_print(f"[ERROR] EXTRACT_BENCHMARK must list job counts, e.g. 1,2,4 - got {CONFIG['extract_benchmark']!r}")
+        return False
+    footage = sum(clip[2] for clip in smart_clips)
+    safe_print(f"\n[BENCH] Extracting {len(smart_clips)} clips ({footage:.1f}s of footage) at "
+               f"{', '.join(map(str, job_counts))} job(s) on {os.cpu_count()} CPU cores")
+    
+    rows = []
+    for count in job_counts:
+        run_dir = tempfile.mkdtemp(prefix=f"bench_{count}_", dir=temp_dir)
+        jobs = [(i, os.path.join(run_dir, f"clip_{i}.mp4"),
+                 seek_keyframes.get(clip[0], []) if seek_keyframes is not None else None)
+                for i, clip in enumerate(smart_clips)]
+        run_start = time.time()
+        extracted = sum(extract_clips_parallel(smart_clips, jobs, resolution, session, count))
+        elapsed = max(time.time() - run_start, 0.001)
+        shutil.rmtree(run_dir, ignore_errors=True)
+        workers, threads = encode_budget(len(jobs), count, session)
+        rows.append((workers, threads, elapsed, len(jobs) / elapsed, footage / elapsed, extracted))
+        safe_print(f"[BENCH] {workers} job(s) x {threads} threads: {elapsed:.1f}s, {len(jobs) / elapsed:.2f} clips/s, "
+                   f"{footage / elapsed:.1f}x realtime ({extracted}/{len(jobs)} extracted)")
+        logger.info(f"Extraction benchmark: {workers} jobs x {threads} threads -> {elapsed:.2f}s for {len(jobs)} clips")
+    
+    report_path = os.path.splitext(output_path)[0] + ".extract_benchmark.csv"
+    try:
+        with open(report_path, 'w') as f:
+            f.write("jobs,threads,seconds,clips_per_second,realtime_factor,extracted\n")
+            for row in rows:
+                f.write("%d,%d,%.2f,%.3f,%.2f,%d\n" % row)
+    except OSError as e:
+        safe_print(f"[ERROR] Could not write benchmark report {report_path}: {e}")
+        return False
+    best = max(rows, key=lambda row: row[3])
+    safe_print(f"[BENCH] Fastest: EXTRACT_JOBS={best[0]} - report written: {report_path}")
+    return report_path
+
+
+MIN_CLIP_DURATION = 0.5  # Clips this short after overlap removal are dropped
+
+def sweep_clip_windows(windows, min_duration=MIN_CLIP_DURATION):
+    """
+    Make footage windows mutually non-overlapping with a single newest-first sweep line.
+    `windows` yields (key, footage_start, footage_end) ordered by footage end, newest first - the
+    order captures are written in. Every kept window is contiguous with the footage kept before it,
+    so each window only keeps the part before the earliest footage kept so far: nested and
+    out-of-order captures (replay buffer saves in a burst) never duplicate footage.
+    O(1) per window; being a generator, callers can stop consuming (and probing) at any point.
+    
+    Yields (key, kept_start, kept_end) per window; both are None when the window is already covered.
+    """
+    floor = float("inf")  # Start of the kept footage so far
+    for key, footage_start, footage_end in windows:
+        kept_end = min(footage_end, floor)
+        if kept_end - footage_start <= min_duration:
+            yield key, None, None
+            continue
+        floor = footage_start
+        yield key, footage_start, kept_end
+
+def resolve_clip_overlaps(windows, min_duration=MIN_CLIP_DURATION):
+    """
+    Sort (key, footage_start, footage_end) windows newest first and sweep them - O(n log n) overall.
+    Returns (key, kept_start, kept_end) for every window that keeps more than min_duration.
+    Ties on footage end: the longer window goes first and the nested ones are dropped.
+    """
+    ordered = sorted(windows, key=lambda window: (-window[2], window[1]))
+    return [kept for kept in sweep_clip_windows(ordered, min_duration) if kept[1] is not None]
+
+def benchmark_overlap_resolver(count=100000, clip_duration=15.0, seed=1):
+    """
+    Time resolve_clip_overlaps on synthetic capture bursts and verify the result.
+    Captures arrive in bursts of replay-buffer saves (nested and out-of-order windows), and the
+    result is checked for zero overlap and for covering the whole union of the input footage.
+    """
+    rng = random.Random(seed)
+    windows = []
+    clock = 1.7e9
+    while len(windows) < count:
+        clock += rng.uniform(30, 3600)  # Gap between bursts
+        for _ in range(rng.randint(1, 8)):
+            created = clock + rng.uniform(0, 60)
+            duration = rng.uniform(3, 60)
+            windows.append((len(windows), created - min(duration, clip_duration), created))
+    windows = windows[:count]
+    rng.shuffle(windows)
+    
+    bench_start = time.time()
+    resolved = resolve_clip_overlaps(windows, min_duration=0.0)
+    elapsed = time.time() - bench_start
+    
+    # Verify: no two kept windows overlap, and together they cover the union of the input
+    kept = sorted((start, end) for _, start, end in resolved)
+    overlaps = sum(1 for previous, current in zip(kept, kept[1:]) if current[0] < previous[1] - 1e-6)
+    union = 0.0
+    reach = float("-inf")
+    for start, end in sorted((start, end) for _, start, end in windows):
+        if end > reach:
+            union += end - max(start, reach)
+            reach = end
+    covered = sum(end - start for start, end in kept)
+    
+    safe_print(f"[BENCH] Overlap resolver: {count} windows -> {len(resolved)} clips in {elapsed * 1000:.0f}ms")
+    safe_print(f"   Overlapping pairs: {overlaps}, coverage: {covered:.1f}s of {union:.1f}s unique footage")
+    return elapsed
+
+def repair_planning_capture(video_path, media_info):
+    """
+    Media info to plan a capture with: captures that cannot be seeked are remuxed once
+    (repair_seekability) and planned on the indexed copy, which extraction then reads.
+    """
+    if needs_seek_repair(video_path, media_info):
+        _, repaired_info = repair_seekability(video_path)
+        if repaired_info is not None:
+            return repaired_info
+    return media_info
+
+def iter_planning_captures(video_files, not_before=None, metadata_only=False):
+    """
+    Walk captures newest first and yield each usable one, probing lazily.
+    Timestamps come from the capture catalog (or a stat); probes run a few files ahead of the
+    consumer only, so a planner that stops early never pays for the rest of the folder.
+    Captures whose footage ends before (or just after) `not_before` are not visited at all.
+    Visited captures pass the header-only integrity pre-check before they are probed; broken ones
+    are quarantined (quarantine_captures).
+    With `metadata_only` nothing is decoded or remuxed: no seek repair (unfinalized recordings
+    are skipped) and no audio alignment - for walks that cover a whole folder (the plan preview,
+    the duration-budget sweep). Callers that extract from such captures repair them first
+    (repair_planning_capture).
+    
+    Yields (video_path, creation_timestamp, footage_start_timestamp, media_info) - the capture
+    shape the planners work on.
+    """
+    # Catalogued captures already carry their timestamp (and, once probed, their media info)
+    catalog = catalog_lookup(video_files)
+    known_media = {}
+    
+    video_data = []
+    for video_path in video_files:
+        entry = catalog.get(os.path.abspath(video_path))
+        if entry is not None:
+            timestamp, cached_info = entry
+            video_data.append((video_path, timestamp))
+            if cached_info is not None:
+                known_media[video_path] = cached_info
+            continue
+        try:
+            creation_time = os.path.getctime(video_path)  # When file was created (AFTER recording)
+            mod_time = os.path.getmtime(video_path)      # Modification timestamp  
+            # Use creation time for overlap detection, fallback to modification time
+            timestamp = creation_time if creation_time > 0 else mod_time
+            video_data.append((video_path, timestamp + clock_offset_for(video_path)))
+        except Exception as e:
+            logger.warning(f"Could not get timestamp for {video_path}: {e}")
+            continue
+    
+    # Newest first (footage end order) - ties put the file listed first first
+    video_data.sort(key=lambda x: x[1], reverse=True)
+    if not_before is not None:
+        # Captures with less than a clip's worth of footage past the cutoff have nothing new
+        video_data = [(video_path, timestamp) for video_path, timestamp in video_data
+                      if timestamp - not_before > MIN_CLIP_DURATION]
+    timestamps = dict(video_data)
+    
+    probed = {}
+    broken = {}    # video_path -> reason, from the integrity pre-check
+    rejected = []  # Broken captures the walk reached - quarantined at the end
+    newer = None  # (video_path, media_info, footage_start) of the last capture yielded
+    def probe(video_path):
+        if video_path in known_media:
+            return known_media[video_path]  # Catalogued records passed the pre-check when they were probed
+        # Reject broken captures from their headers before spending any ffmpeg time on them -
+        # only the captures the planner reaches are checked
+        reason = check_capture_integrity(video_path)
+        if reason:
+            broken[video_path] = reason
+            return None
+        info = probe_media_info(video_path)
+        probed[video_path] = info
+        return info
+    
+    try:
+        for video_path, media_info in probe_files_in_order((video_path for video_path, _ in video_data), probe):
+            creation_timestamp = timestamps[video_path]
+            if video_path in broken:
+                rejected.append((video_path, broken[video_path]))
+                continue
             
-            if new_start_time >= total_duration:
-                # Entire extracted clip would be overlapping - skip this video
-                logger.warning(f"Skipping {os.path.basename(video_path)} - entire clip overlaps with previous")
+            # Captures that cannot be seeked are remuxed once; planning continues on the indexed copy.
+            # Unfinalized recordings (no duration in the header) are repaired before they are judged.
+            if not metadata_only:
+                media_info = repair_planning_capture(video_path, media_info)
+            total_duration = media_info.duration if media_info else None
+            if media_info and not media_info.duration_known:
+                logger.warning(f"Skipping {video_path} - no duration in header (unfinalized recording?)")
+                continue
+            if total_duration is None or total_duration <= 0:
+                logger.warning(f"Skipping {video_path} - cannot determine duration")
                 continue
+            if media_info.has_index is False:
+                logger.warning(f"{os.path.basename(video_path)} has no seek index - tail extraction will decode from the start")
             
-            # Calculate remaining duration after skipping overlap
-            remaining_duration = total_duration - new_start_time
-            new_extract_duration = min(clip_duration - overlap_duration, remaining_duration)
+            # For buffered recording: footage timeline is BEFORE file creation
+            # Actual footage spans: (creation_timestamp - total_duration) to creation_timestamp
+            footage_start_timestamp = creation_timestamp - total_duration
             
-            if new_extract_duration <= 0.5:
-                # Too short after removing overlap - skip it
-                logger.warning(f"Skipping {os.path.basename(video_path)} - remaining duration too short ({new_extract_duration:.3f}s)")
+            # Overlapping replay saves are lined up on their audio rather than their timestamps
+            if newer is not None and not metadata_only:
+                aligned_start = align_footage_start(video_path, media_info, footage_start_timestamp, *newer)
+                if aligned_start is not None:
+                    creation_timestamp += aligned_start - footage_start_timestamp
+                    footage_start_timestamp = aligned_start
+            newer = (video_path, media_info, footage_start_timestamp)
+            yield video_path, creation_timestamp, footage_start_timestamp, media_info
+    finally:
+        quarantine_captures(rejected)
+        # Original (unrepaired) records, so repair is still detected next run
+        record_capture_media(probed)
+        logger.info(f"Planning probed {len(probed)} of {len(video_data)} candidate captures "
+                    f"({len(known_media)} known from the catalog)")
+
+def capture_tail_windows(captures, clip_duration, not_before=None):
+    """
+    Tail window of each capture, in the shape sweep_clip_windows expects:
+    ((video_path, creation_timestamp, footage_start_timestamp, media_info), window_start, window_end).
+    Pure - works the same on iter_planning_captures and on captures already held in memory.
+    """
+    for capture in captures:
+        video_path, creation_timestamp, footage_start_timestamp, media_info = capture
+        if not_before is not None and creation_timestamp - not_before <= MIN_CLIP_DURATION:
+            continue
+        # Extract the LAST clip_duration seconds (or the whole capture if it is shorter)
+        window_start = max(footage_start_timestamp, creation_timestamp - clip_duration)
+        if not_before is not None:
+            window_start = max(window_start, not_before)
+        yield capture, window_start, creation_timestamp
+
+def iter_capture_windows(video_files, clip_duration, not_before=None, captures=None, metadata_only=False):
+    """
+    Tail windows of the captures, newest first. `captures` are captures already resolved in
+    memory (load_plan_captures); without them the files are walked and probed lazily
+    (`metadata_only` as for iter_planning_captures).
+    """
+    if captures is not None:
+        yield from capture_tail_windows(captures, clip_duration, not_before)
+        return
+    resolved = iter_planning_captures(video_files, not_before, metadata_only)
+    try:
+        yield from capture_tail_windows(resolved, clip_duration, not_before)
+    finally:
+        resolved.close()  # Stop the probe lookahead
+
+def load_plan_captures(video_folder=None):
+    """
+    Resolve the captures a compile would select once and keep them in memory, newest first -
+    the live plan preview re-plans from this list without touching the disk.
+    Same selection as the compile (select_captures: since/until, extra folders; time_window_hours
+    limits the walk), with `video_folder` as the primary folder when given. Catalog and probe
+    data only (metadata_only): no seek-repair remux or audio decode competes with a compile.
+    """
+    roots = get_capture_roots()
+    if video_folder:
+        primary = os.path.abspath(video_folder)
+        roots = [(primary, roots[0][1])] + [root for root in roots[1:] if root[0] != primary]
+    video_files = select_captures(roots, quiet=True)
+    return list(iter_planning_captures(video_files, planning_cutoff(), metadata_only=True))
+
+def planning_cutoff(since=None):
+    """Earliest footage end time planning may use: the time window limit and/or `since`, whichever is later"""
+    time_window_hours = CONFIG.get("time_window_hours") or 0
+    cutoffs = [cutoff for cutoff in (since, time.time() - time_window_hours * 3600 if time_window_hours else None)
+               if cutoff is not None]
+    return max(cutoffs) if cutoffs else None
+
+def plan_newest_first(video_files, clip_duration, since=None, captures=None, quiet=False):
+    """
+    Plan the tail of each capture, newest first, until a planning limit is reached
+    (max_clips, max_total_duration, time_window_hours) - cost scales with what is compiled.
+    `captures` plans from captures already in memory; `quiet` drops the per-clip log lines.
+    Returns (smart_clips, number of captures considered).
+    """
+    log = logger.debug if quiet else logger.info
+    max_clips = CONFIG.get("max_clips") or 0
+    max_total_duration = CONFIG.get("max_total_duration") or 0
+    not_before = planning_cutoff(since)
+    
+    smart_clips = []
+    total_smart_duration = 0.0
+    windows_considered = 0
+    windows = iter_capture_windows(video_files, clip_duration, not_before, captures)
+    try:
+        # Subtract footage already covered by ANY selected clip - not just the previous one
+        for capture, kept_start, kept_end in sweep_clip_windows(windows):
+            video_path, creation_timestamp, footage_start_timestamp, media_info = capture
+            windows_considered += 1
+            if kept_start is None:
+                log(f"Skipping {os.path.basename(video_path)} - entire clip overlaps with selected footage")
                 continue
             
-            # Use adjusted extraction parameters
-            start_time = new_start_time
-            extract_duration = new_extract_duration
+            # Duration budget: the last clip keeps the end of its window
+            if max_total_duration:
+                remaining = max_total_duration - total_smart_duration
+                if remaining <= MIN_CLIP_DURATION:
+                    break
+                kept_start = max(kept_start, kept_end - remaining)
             
-            # Recalculate footage timeline with adjusted extraction
-            clip_start_in_footage = footage_start_timestamp + start_time
-            clip_end_in_footage = clip_start_in_footage + extract_duration
-            
-            logger.info(f"Adjusted for overlap: {os.path.basename(video_path)} -> start={start_time:.3f}s, duration={extract_duration:.3f}s")
+            start_time = round(kept_start - footage_start_timestamp, 6)
+            extract_duration = round(kept_end - kept_start, 6)
+            requested_duration = min(clip_duration, creation_timestamp - footage_start_timestamp)
+            overlap_duration = requested_duration - extract_duration
+            if overlap_duration > 1e-6:
+                log(f"Adjusted for overlap/budget: {os.path.basename(video_path)} (trimmed: {overlap_duration:.1f}s) -> start={start_time:.3f}s, duration={extract_duration:.3f}s")
+            else:
+                log(f"No overlap: {os.path.basename(video_path)} -> start={start_time:.3f}s, duration={extract_duration:.3f}s, footage_timeline={kept_start:.1f}-{kept_end:.1f}")
+            smart_clips.append((video_path, start_time, extract_duration, creation_timestamp, media_info))
+            total_smart_duration += extract_duration
             
-            smart_clips.append((video_path, start_time, extract_duration, creation_timestamp))
-            last_clip_end_in_footage = clip_end_in_footage
+            if max_clips and len(smart_clips) >= max_clips:
+                break
+    finally:
+        windows.close()  # Stop the probe lookahead
+    
+    if len(smart_clips) == max_clips and max_clips and not quiet:
+        safe_print(f"[LIMIT] Stopped at {max_clips} clips")
+    elif max_total_duration and total_smart_duration >= max_total_duration - MIN_CLIP_DURATION and not quiet:
+        safe_print(f"[LIMIT] Stopped at {total_smart_duration:.1f}s of footage (limit: {max_total_duration:.0f}s)")
+    return smart_clips, windows_considered
+
+def water_fill(lengths, budget):
+    """
+    Split a duration budget over clips of the given available lengths as evenly as possible.
+    Every clip gets min(length, level), with the level chosen so the takes add up to the budget
+    (or everything, if the budget exceeds the total). O(n log n).
+    """
+    takes = [0.0] * len(lengths)
+    remaining = budget
+    unfilled = len(lengths)
+    for index in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        level = remaining / unfilled
+        takes[index] = min(lengths[index], level)
+        remaining -= takes[index]
+        unfilled -= 1
+    return takes
+
+def plan_duration_budget(video_files, clip_duration, budget, since=None, captures=None, quiet=False):
+    """
+    Choose captures and sub-windows that fill a duration budget with the most unique footage.
+    Works from container metadata only: every candidate's whole footage interval is swept into
+    non-overlapping pieces, the pieces with the most unique footage are picked (about
+    budget / clip_duration of them, more if they cannot fill it), and the budget is water-filled over them - each clip keeps the
+    end of its piece, where the saved moment is. `captures` and `quiet` as for plan_newest_first.
+    The sweep reads every candidate in the time window, so it runs without seek repair or audio
+    alignment (pieces sit on their file timestamps); only the picked captures are seek-repaired.
+    max_total_duration caps the budget.
+    Returns (smart_clips, number of captures considered).
+    """
+    log = logger.debug if quiet else logger.info
+    max_clips = CONFIG.get("max_clips") or 0
+    max_total_duration = CONFIG.get("max_total_duration") or 0
+    not_before = planning_cutoff(since)
+    if max_total_duration and max_total_duration < budget:
+        if not quiet:
+            safe_print(f"[LIMIT] Budget capped at {max_total_duration:.0f}s (max total duration)")
+        budget = max_total_duration
     
-    # Reverse to maintain newest-first order for final compilation (as user expects)
-    smart_clips.reverse()
+    # Whole-capture windows: the budget decides how much of each piece is used
+    pieces = []
+    windows_considered = 0
+    windows = iter_capture_windows(video_files, float("inf"), not_before, captures, metadata_only=True)
+    for capture, kept_start, kept_end in sweep_clip_windows(windows):
+        windows_considered += 1
+        if kept_start is not None:
+            pieces.append((capture, kept_start, kept_end))
+    if not pieces:
+        return [], windows_considered
     
-    # Enhanced logging summary for validation
-    logger.info(f"Smart clip calculation complete: {len(smart_clips)} clips from {len(video_files)} videos")
+    # Pieces with the most unique footage first: stop once there are budget / clip_duration of
+    # them AND they hold enough footage for the budget (max_clips is a hard cap)
+    clip_count = max(1, int(budget // max(clip_duration, MIN_CLIP_DURATION)))
+    pieces.sort(key=lambda piece: (piece[2] - piece[1], piece[2]), reverse=True)
+    selected = []
+    available = 0.0
+    for capture, kept_start, kept_end in pieces:
+        if (len(selected) >= clip_count and available >= budget) or (max_clips and len(selected) >= max_clips):
+            break
+        if captures is None:
+            # Picked from the files: extraction needs the seek repair the sweep skipped
+            video_path, creation_timestamp, footage_start_timestamp, media_info = capture
+            capture = (video_path, creation_timestamp, footage_start_timestamp,
+                       repair_planning_capture(video_path, media_info))
+        selected.append((capture, kept_start, kept_end))
+        available += kept_end - kept_start
+    pieces = selected
+    takes = water_fill([kept_end - kept_start for _, kept_start, kept_end in pieces], budget)
+    
+    smart_clips = []
+    for (capture, kept_start, kept_end), take in zip(pieces, takes):
+        video_path, creation_timestamp, footage_start_timestamp, media_info = capture
+        if take <= MIN_CLIP_DURATION:
+            continue
+        start_time = round(kept_end - take - footage_start_timestamp, 6)
+        extract_duration = round(take, 6)
+        log(f"Budget clip: {os.path.basename(video_path)} -> start={start_time:.3f}s, duration={extract_duration:.3f}s "
+                    f"(unique footage available: {kept_end - kept_start:.1f}s)")
+        smart_clips.append((video_path, start_time, extract_duration, creation_timestamp, media_info))
+    
+    # Newest-first order for final compilation (as user expects)
+    smart_clips.sort(key=lambda clip: clip[3], reverse=True)
+    planned = sum(clip[2] for clip in smart_clips)
+    if not quiet:
+        safe_print(f"[BUDGET] Planned {planned:.1f}s of unique footage for a {budget:.1f}s budget "
+                   f"({len(smart_clips)} of {windows_considered} captures)")
+    return smart_clips, windows_considered
+
+def print_smart_clip_summary(smart_clips, videos_considered, clip_duration):
+    """Print the SMART CLIP SUMMARY block for a finished plan"""
+    logger.info(f"Smart clip calculation complete: {len(smart_clips)} clips from {videos_considered} videos")
     safe_print(f"\n[SUMMARY] SMART CLIP SUMMARY:")
-    total_original_duration = len(video_files) * clip_duration
+    total_original_duration = videos_considered * clip_duration
     total_smart_duration = sum(clip[2] for clip in smart_clips)
     overlap_time_saved = total_original_duration - total_smart_duration
     
-    safe_print(f"   [STATS] Original duration (dumb): {total_original_duration:.1f}s ({len(video_files)} x {clip_duration}s)")
+    safe_print(f"   [STATS] Original duration (dumb): {total_original_duration:.1f}s ({videos_considered} x {clip_duration}s)")
     safe_print(f"   [SMART] Smart duration (no overlap): {total_smart_duration:.1f}s")
     safe_print(f"   [TIME] Overlap time eliminated: {overlap_time_saved:.1f}s")
-    safe_print(f"   [TARGET] Efficiency gain: {(overlap_time_saved/total_original_duration*100):.1f}%")
+    if total_original_duration > 0:
+        safe_print(f"   [TARGET] Efficiency gain: {(overlap_time_saved/total_original_duration*100):.1f}%")
     
-    for i, (video_path, start_time, extract_duration, timestamp) in enumerate(smart_clips):
+    for i, (video_path, start_time, extract_duration, timestamp, media_info) in enumerate(smart_clips):
         creation_time = datetime.fromtimestamp(timestamp).strftime("%H:%M:%S.%f")[:-3]
         safe_print(f"   [{i+1}] {os.path.basename(video_path)[:30]:30} | {creation_time} | {start_time:6.2f}s->{start_time+extract_duration:6.2f}s ({extract_duration:5.2f}s)")
-    
-    return smart_clips
 
+def plan_clips(video_files, clip_duration, since=None, captures=None, quiet=False):
+    """
+    Run the configured planner: the duration-budget planner with a target_duration set,
+    otherwise newest-first tails. Returns (smart_clips, number of captures considered).
+    """
+    target_duration = CONFIG.get("target_duration") or 0
+    if target_duration:
+        # The intro is part of the requested length
+        budget = target_duration - (CONFIG["intro_duration"] if CONFIG["use_intro"] else 0)
+        if budget <= MIN_CLIP_DURATION:
+            if not quiet:
+                safe_print(f"[WARNING] Target duration {target_duration:.0f}s leaves no room after the intro")
+            return [], 0
+        return plan_duration_budget(video_files, clip_duration, budget, since, captures, quiet)
+    return plan_newest_first(video_files, clip_duration, since, captures, quiet)
 
-def standardize_clip(input_path, output_path):
-    """Standardize a video clip to consistent format"""
-    target_resolution = CONFIG["output_resolution"]
-    target_fps = CONFIG["output_fps"]
+def calculate_smart_clips(video_files, clip_duration, since=None):
+    """
+    Calculate smart clip parameters to avoid overlapping content.
+    Accounts for retroactive/buffered recording (Xbox Game Bar, OBS replay buffer).
+    With a target_duration set, the duration-budget planner picks captures and sub-windows;
+    otherwise the tail of each capture is planned newest first until a planning limit is reached.
+    
+    Args:
+        video_files: List of video file paths sorted by modification time (newest first)
+        clip_duration: Desired clip duration from GUI
+        since: Only footage after this wall-clock time is planned (None = all footage)
+        
+    Returns:
+        List of tuples: (video_path, start_time, duration, creation_timestamp, media_info)
+    """
+    if not video_files:
+        return []
     
-    command = f'"{FFMPEG_PATH}" -y -i "{input_path}" -vf "scale={target_resolution}:force_original_aspect_ratio=decrease,pad={target_resolution}:(ow-iw)/2:(oh-ih)/2,fps={target_fps}" -c:v libx264 -preset fast -crf 23 -c:a aac -b:a {CONFIG["audio_bitrate"]} "{output_path}"'
+    smart_clips, videos_considered = plan_clips(video_files, clip_duration, since)
+    if not smart_clips:
+        return []
     
-    success, stdout, stderr = run_ffmpeg_command(command)
-    if not success:
-        print(f"Error standardizing {input_path}: {stderr}")
+    # Keyframes in each tail window - shared with extraction through the keyframe cache
+    keyframe_index = index_clip_keyframes(smart_clips)
+    for video_path, start_time, extract_duration, _, _ in smart_clips:
+        seek_keyframe = keyframe_at_or_before(keyframe_index.get(video_path, []), start_time)
+        if seek_keyframe is not None:
+            logger.info(f"Keyframe before in-point: {os.path.basename(video_path)} -> {seek_keyframe:.3f}s "
+                        f"(lead-in {start_time - seek_keyframe:.3f}s)")
     
-    return success
+    # Enhanced logging summary for validation
+    print_smart_clip_summary(smart_clips, videos_considered, clip_duration)
+    return smart_clips
+
+def preview_compilation_plan(captures, clip_duration, since=None):
+    """
+    Plan summary for the live preview in the GUI, from captures already in memory
+    (load_plan_captures) - no probing, no file access, no per-clip logging.
+    Returns a dict with the clip count, total output duration (intro included), footage
+    removed as overlap between the considered captures and an estimated render time.
+    """
+    smart_clips, considered = plan_clips(None, clip_duration, since, captures, quiet=True)
+    
+    # Overlap removed between the captures the planner looked at, in the windows it used
+    window_length = float("inf") if CONFIG.get("target_duration") else clip_duration
+    windows = list(capture_tail_windows(captures, window_length, planning_cutoff(since)))
+    overlap = 0.0
+    window_lengths = {capture[0]: window_end - window_start for capture, window_start, window_end in windows}
+    for _, (capture, kept_start, kept_end) in zip(range(considered), sweep_clip_windows(windows)):
+        overlap += window_lengths[capture[0]] - (kept_end - kept_start if kept_start is not None else 0.0)
+    
+    footage_duration = sum(clip[2] for clip in smart_clips)
+    total_duration = footage_duration
+    if smart_clips and CONFIG["use_intro"]:
+        total_duration += CONFIG["intro_duration"]
+    return {
+        "clips": len(smart_clips),
+        "captures": len(captures),
+        "footage_duration": footage_duration,
+        "total_duration": total_duration,
+        "overlap_removed": overlap,
+        "render_seconds": total_duration / get_render_rate(),
+    }
 
 def get_video_files(folder):
     """Get all video files from a folder"""
@@ -677,23 +3120,19 @@ def validate_and_convert_audio(file_path, temp_dir):
             logger.warning(f"Audio file missing or empty: {file_path}")
             return False, None
         
-        # Try to read audio info
-        command = f'"{FFPROBE_PATH}" -v quiet -print_format json -show_streams "{file_path}"'
-        success, stdout, stderr = run_ffmpeg_command(command, timeout=10)
+        # Try to read audio info (cached between runs)
+        info = probe_media_info(file_path, timeout=10)
         
-        if not success:
+        if not info:
             logger.warning(f"Cannot read audio file: {os.path.basename(file_path)}")
             return False, None
-            
-        data = json.loads(stdout)
-        audio_streams = [s for s in data.get('streams', []) if s.get('codec_type') == 'audio']
         
-        if not audio_streams:
+        if not info.has_audio:
             logger.warning(f"No audio streams in file: {os.path.basename(file_path)}")
             return False, None
         
         # Check if conversion is needed (non-standard format)
-        codec = audio_streams[0].get('codec_name', '')
+        codec = info.audio_codec or ''
         
         # If already MP3 with good codec, use directly
         if codec == 'mp3' and file_path.lower().endswith('.mp3'):
@@ -717,14 +3156,19 @@ def validate_and_convert_audio(file_path, temp_dir):
         logger.error(f"Audio validation error for {file_path}: {e}")
         return False, None
 
-def create_music_playlist(temp_dir, total_duration):
-    """Create a music playlist that covers the entire video duration with random tracks"""
-    
+def choose_music_tracks(temp_dir, total_duration):
+    """
+    Pick random tracks (the GUI selection first) until they cover the video duration.
+    Returns [(source track, playable track)] - the playable track may be an MP3 conversion in temp_dir.
+    """
     if not os.path.exists(CONFIG["music_folder"]):
-        return None
+        return []
         
     # Get all available music files and validate/convert them
     music_files = []
+    sources = {}  # Playable track -> music file it came from
+    track_durations = {}  # Real track lengths from the (native) header readers
+    estimated_track_length = 120  # Fallback when a track length is unknown
     for ext in CONFIG["music_extensions"]:
         pattern = os.path.join(CONFIG["music_folder"], f"*{ext}")
         import glob
@@ -734,13 +3178,16 @@ def create_music_playlist(temp_dir, total_duration):
             valid, converted_path = validate_and_convert_audio(music_file, temp_dir)
             if valid:
                 music_files.append(converted_path)
+                sources[converted_path] = music_file
+                info = probe_media_info(music_file)
+                track_durations[converted_path] = info.duration if info and info.duration else estimated_track_length
             else:
                 safe_print(f"   [WARNING] Skipping invalid music file: {os.path.basename(music_file)}")
     
     if not music_files:
         logger.warning("No valid music files found")
         safe_print("   [WARNING] No valid music files found, video will have no background music")
-        return None
+        return []
     
     # If user selected specific music, prefer that as the first track
     playlist_tracks = []
@@ -753,14 +3200,14 @@ def create_music_playlist(temp_dir, total_duration):
                 valid, converted_path = validate_and_convert_audio(music_file, temp_dir)
                 if valid:
                     playlist_tracks.append(converted_path)
+                    sources[converted_path] = music_file
                     logger.info(f"Using selected music as first track: {music_name}")
                 else:
                     safe_print(f"   [WARNING] Selected music '{music_name}' could not be loaded, using random music instead")
                 break
     
-    # Calculate total duration needed
-    current_duration = 0
-    estimated_track_length = 120  # Assume average 2 minutes per track
+    # Calculate total duration needed (a selected first track already counts)
+    current_duration = sum(track_durations.get(track, estimated_track_length) for track in playlist_tracks)
     
     # Add tracks until we cover the video duration
     while current_duration < total_duration:
@@ -776,17 +3223,47 @@ def create_music_playlist(temp_dir, total_duration):
             # Only one track available, just use it
             playlist_tracks.append(music_files[0])
         
-        current_duration += estimated_track_length
+        current_duration += track_durations.get(playlist_tracks[-1], estimated_track_length)
         
         # Safety limit - don't create playlists with more than 10 tracks
         if len(playlist_tracks) >= 10:
             break
     
+    return [(sources[track], track) for track in playlist_tracks]
+
+def resolve_music_tracks(temp_dir, total_duration, tracks=None):
+    """
+    Music for a compilation as [(source track, playable track)]: chosen to cover total_duration,
+    or - with `tracks` - a saved track list (render plans) replayed instead of choosing.
+    """
+    if tracks is None:
+        return choose_music_tracks(temp_dir, total_duration)
+    chosen = []
+    for track in tracks:
+        valid, converted_path = validate_and_convert_audio(track, temp_dir)
+        if valid:
+            chosen.append((track, converted_path))
+        else:
+            safe_print(f"   [WARNING] Skipping invalid music file: {os.path.basename(track)}")
+    return chosen
+
+def create_music_playlist(temp_dir, total_duration, tracks=None):
+    """
+    Create a music playlist that covers the entire video duration with random tracks.
+    `tracks` replays a saved track list (render plans) instead of choosing.
+    Returns (playlist path or None, source tracks in playlist order).
+    """
+    chosen = resolve_music_tracks(temp_dir, total_duration, tracks)
+    if not chosen:
+        return None, []
+    source_tracks = [source for source, _ in chosen]
+    playlist_tracks = [track for _, track in chosen]
+    
     # Create FFmpeg-compatible music file for concatenation
     if len(playlist_tracks) == 1:
         # Single track - use directly
         logger.info(f"Using single music track: {os.path.basename(playlist_tracks[0])}")
-        return playlist_tracks[0]
+        return playlist_tracks[0], source_tracks
     else:
         # Multiple tracks - create concatenated music file
         temp_music_path = os.path.join(temp_dir, "music_playlist.mp3")
@@ -812,56 +3289,74 @@ def create_music_playlist(temp_dir, total_duration):
                 os.remove(music_list_file)
             except:
                 pass
-            return temp_music_path
+            return temp_music_path, source_tracks
         else:
             logger.warning("Failed to create music playlist, using single track")
-            return playlist_tracks[0]
+            return playlist_tracks[0], source_tracks[:1]
 
-def concatenate_videos(video_list, output_path, music_playlist=None):
-    """Concatenate videos using FFmpeg with pre-normalization for reliability"""
+def concatenate_videos(video_list, output_path, music_playlist=None, resolution=None, temp_dir=None, session=None):
+    """
+    Concatenate videos using FFmpeg with pre-normalization for reliability.
+    Clips and intros are extracted straight into the final profile, so normally nothing is
+    re-encoded here: only inputs that do not match it are normalized before the stream-copy join,
+    several at once (encode_budget).
+    `resolution` defaults to CONFIG["output_resolution"]; concurrent compilations pass their own
+    resolution, temp_dir and session so they never share intermediate files or CPU cores.
+    """
     if not video_list:
         print("No videos to concatenate")
         return False
+    temp_dir = temp_dir or tempfile.gettempdir()
     
     try:
-        # Parse output resolution for normalization
-        width, height = map(int, CONFIG["output_resolution"].split('x'))
-        
-        # Step 1: Normalize all videos to identical parameters (prevents freezing)
-        normalized_videos = []
-        safe_print(f"[PROCESS] Step 1: Normalizing {len(video_list)} videos for compatibility...")
+        # Step 1: Normalize videos that are not in the final profile yet (prevents freezing)
+        stage_start = time.time()
+        joined_videos = []
+        normalized_videos = []  # Intermediate files created here
+        safe_print(f"[PROCESS] Step 1: Checking {len(video_list)} videos against the output profile...")
         
+        pending = []  # (position, video, normalized path)
         for i, video in enumerate(video_list):
-            safe_print(f"   [VIDEO] Normalizing video {i+1}/{len(video_list)}...")
-            normalized_path = os.path.join(tempfile.gettempdir(), f"normalized_{i}.mp4")
-            
-            # Normalize each video to exact same parameters
-            normalize_cmd = (
-                f'"{FFMPEG_PATH}" -y -i "{video}" '
-                f'-vf "scale={width}:{height}:force_original_aspect_ratio=decrease,'
-                f'pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,fps={CONFIG["output_fps"]}" '
-                f'-af "aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo" '
-                f'-c:v libx264 -preset fast -b:v {CONFIG["video_bitrate"]} '
-                f'-c:a aac -b:a {CONFIG["audio_bitrate"]} '
-                f'"{normalized_path}"'
-            )
+            if matches_final_profile(probe_media_info(video), resolution):
+                joined_videos.append(video)
+                continue
+            normalized_path = os.path.join(temp_dir, f"normalized_{i}.mp4")
+            joined_videos.append(normalized_path)  # Keeps its place in the list whichever encode finishes first
+            normalized_videos.append(normalized_path)
+            pending.append((i, video, normalized_path))
+        
+        if pending:
+            workers, threads = encode_budget(len(pending), session=session)
             
-            success, stdout, stderr = run_ffmpeg_command(normalize_cmd, timeout=120)  # Longer timeout for normalization
-            if not success:
-                safe_print(f"      [ERROR] Failed to normalize video {i+1}")
-                return False
+            def normalize(job):
+                i, video, normalized_path = job
+                safe_print(f"   [VIDEO] Normalizing video {i+1}/{len(video_list)}...")
+                # Normalize to exactly the parameters the extracted clips already have
+                normalize_cmd = f'"{FFMPEG_PATH}" -y -i "{video}" {final_profile_args(resolution, threads)} "{normalized_path}"'
+                return run_ffmpeg_command(normalize_cmd, timeout=120)  # Longer timeout for normalization
             
-            normalized_videos.append(normalized_path)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(normalize, pending))
+            for (i, _, _), (success, stdout, stderr) in zip(pending, results):
+                if not success:
+                    safe_print(f"      [ERROR] Failed to normalize video {i+1}")
+                    for norm_video in normalized_videos:
+                        if os.path.exists(norm_video):
+                            os.remove(norm_video)
+                    return False
+        safe_print(f"   [TIME] Normalization: {time.time() - stage_start:.1f}s "
+                   f"({len(normalized_videos)} of {len(video_list)} videos re-encoded)")
         
         # Step 2: Create temporary concatenated video using concat demuxer (now safe)
-        temp_video = os.path.join(tempfile.gettempdir(), "temp_concatenated.mp4")
-        concat_file = os.path.join(tempfile.gettempdir(), "concat_list.txt")
+        temp_video = os.path.join(temp_dir, "temp_concatenated.mp4")
+        concat_file = os.path.join(temp_dir, "concat_list.txt")
         
         with open(concat_file, 'w') as f:
-            for video in normalized_videos:
+            for video in joined_videos:
                 f.write(f"file '{video}'\n")
         
         safe_print(f"[PROCESS] Step 2: Concatenating normalized videos...")
+        stage_start = time.time()
         concat_command = (
             f'"{FFMPEG_PATH}" -y -f concat -safe 0 -i "{concat_file}" '
             f'-c copy "{temp_video}"'
@@ -871,10 +3366,12 @@ def concatenate_videos(video_list, output_path, music_playlist=None):
         if not success:
             safe_print(f"      [ERROR] Failed to concatenate videos")
             return False
+        safe_print(f"   [TIME] Concatenation (stream copy): {time.time() - stage_start:.1f}s")
         
         # Step 3: Add background music if provided
         if music_playlist:
             safe_print(f"[MUSIC] Step 3: Adding background music...")
+            stage_start = time.time()
             final_command = (
                 f'"{FFMPEG_PATH}" -y -i "{temp_video}" -i "{music_playlist}" '
                 f'-filter_complex "[0:a][1:a]amix=inputs=2:duration=shortest:weights=1.0 0.4[finalaudio]" '
@@ -894,6 +3391,7 @@ def concatenate_videos(video_list, output_path, music_playlist=None):
                 except Exception as e:
                     safe_print(f"      [ERROR] Failed to save video: {e}")
                     return False
+            safe_print(f"   [TIME] Music mix: {time.time() - stage_start:.1f}s")
         else:
             # No music: just copy the concatenated video to final output
             shutil.move(temp_video, output_path)
@@ -917,6 +3415,91 @@ def concatenate_videos(video_list, output_path, music_playlist=None):
         print(f"Error during concatenation: {e}")
         return False
 
+# ===== FILTER GRAPH RENDER BACKEND =====
+# RENDER_BACKEND=graph renders a compilation with one ffmpeg process instead of extracting every
+# clip and joining the files: each clip is a movie source in the filter graph, seeked and trimmed,
+# normalized and joined by the concat filter, and the music is mixed in the same graph - one encode
+# and no intermediate media files. Everything lives in a filter script, so the command line has the
+# same length for 5 clips or 500. Movie sources are also pulled only while their segment plays;
+# as separate ffmpeg inputs, 100+ clips would all be demuxed and buffered from the start.
+
+def filter_graph_path(path):
+    """A file path escaped as a filter option value inside a filter graph description"""
+    path = os.path.abspath(path).replace('\\', '/')  # ffmpeg takes forward slashes on Windows too
+    for special in ("\\':=", "\\'[],;"):  # Option value level, then filter graph level
+        path = ''.join('\\' + c if c in special else c for c in path)
+    return path
+
+def render_compilation_graph(clips, output_path, resolution=None, temp_dir=None, intro=None, music_tracks=()):
+    """
+    Render clips [(path, start, duration, media_info)] - the intro first if given, in the same
+    form - into output_path in one ffmpeg pass, with the playable music_tracks mixed under them.
+    """
+    temp_dir = temp_dir or tempfile.gettempdir()
+    segments = ([intro] if intro else []) + list(clips)
+    if not segments:
+        print("No videos to render")
+        return False
+    
+    graph = []
+    video_filter = final_video_filter(resolution)
+    for i, (path, start, duration, media_info) in enumerate(segments):
+        has_audio = media_info is None or media_info.has_audio
+        # Movie sources keep the file's timestamps; -ss style in-points count from its start time
+        trim_start = start + ((media_info.start_time or 0.0) if media_info else 0.0)
+        graph.append(f'movie={filter_graph_path(path)}:seek_point={start:.3f}:streams={"dv+da" if has_audio else "dv"}'
+                     f'[src_v{i}]' + (f'[src_a{i}]' if has_audio else ''))
+        # Trimmed after the frame rate conversion, so every segment gets exactly duration x fps frames.
+        # fps drops a file's last frame at EOF - a cloned frame after it keeps clips that end there whole.
+        graph.append(f'[src_v{i}]tpad=stop_mode=clone:stop=1,{video_filter},'
+                     f'trim=start={trim_start:.3f}:duration={duration:.3f},setpts=PTS-STARTPTS,setsar=1[v{i}]')
+        if has_audio:
+            graph.append(f'[src_a{i}]atrim=start={trim_start:.3f}:duration={duration:.3f},asetpts=PTS-STARTPTS,'
+                         f'{FINAL_AUDIO_FILTER}[a{i}]')
+        else:
+            graph.append(f'anullsrc=channel_layout=stereo:sample_rate=44100,atrim=duration={duration:.3f},'
+                         f'{FINAL_AUDIO_FILTER}[a{i}]')
+    graph.append(''.join(f'[v{i}][a{i}]' for i in range(len(segments))) +
+                 f'concat=n={len(segments)}:v=1:a=1[vout][clipaudio]')
+    
+    audio_out = "clipaudio"
+    if music_tracks:
+        for j, track in enumerate(music_tracks):
+            graph.append(f'amovie={filter_graph_path(track)},{FINAL_AUDIO_FILTER}[m{j}]')
+        graph.append(''.join(f'[m{j}]' for j in range(len(music_tracks))) +
+                     f'concat=n={len(music_tracks)}:v=0:a=1[music]')
+        # duration=first: the clips play on without music if the playlist runs short (with "shortest"
+        # the ended mix would stall the concat filter, which keeps its video and audio in step)
+        graph.append('[clipaudio][music]amix=inputs=2:duration=first:weights=1.0 0.4[finalaudio]')
+        audio_out = "finalaudio"
+    
+    script_path = os.path.join(temp_dir, "render_graph.txt")
+    with open(script_path, 'w', encoding='utf-8') as f:
+        f.write(';\n'.join(graph))
+    
+    command = (
+        f'"{FFMPEG_PATH}" -y -filter_complex_script "{script_path}" '
+        # The concat output carries no frame rate - without -r the muxer falls back to 25 fps
+        f'-map "[vout]" -map "[{audio_out}]" -r {CONFIG["output_fps"]} {final_encoder_args()} "{output_path}"'
+    )
+    total_duration = sum(duration for _, _, duration, _ in segments)
+    safe_print(f"[PROCESS] Rendering {len(segments)} segments ({total_duration:.1f}s) in one ffmpeg pass...")
+    logger.info(f"Filter graph render: {len(segments)} segments, {len(music_tracks)} music tracks")
+    stage_start = time.time()
+    try:
+        # The whole compilation is one process - allow for slow machines rather than a per-step limit
+        success, stdout, stderr = run_ffmpeg_command(command, timeout=300 + 10 * total_duration)
+    finally:
+        if os.path.exists(script_path):
+            os.remove(script_path)
+    if not success:
+        safe_print(f"      [ERROR] Filter graph render failed")
+        logger.error(f"Filter graph render failed: {stderr}")
+        return False
+    safe_print(f"   [TIME] Graph render: {time.time() - stage_start:.1f}s")
+    safe_print(f"   [OK] Video compilation completed successfully!")
+    return True
+
 def main():
     """Enhanced main execution function with progress tracking"""
     start_time = time.time()
@@ -933,16 +3516,6 @@ def main():
             input("Press Enter to exit...")
         return False
     
-    # Smart resolution detection for universal compatibility
-    safe_print("\n[TARGET] Configuring optimal video resolution...")
-    
-    # Always use smart auto-detection for universal compatibility
-    optimal_resolution = detect_optimal_resolution(CONFIG["video_folder"])
-    safe_print(f"   Auto-detected resolution: {optimal_resolution}")
-    
-    CONFIG["output_resolution"] = optimal_resolution
-    safe_print(f"   Final resolution: {optimal_resolution}")
-    
     # Try auto-detection if still using placeholder
     if "YourUsername" in CONFIG["video_folder"]:
         safe_print("[SEARCH] Attempting to auto-detect video folders...")
@@ -959,51 +3532,66 @@ def main():
     safe_print("\n[CONFIG] COMPILATION CONFIGURATION:")
     safe_print("-" * 50)
     safe_print(f"[VIDEO] Video source: {CONFIG['video_folder']}")
+    for folder, clock_offset in get_capture_roots()[1:]:
+        safe_print(f"[VIDEO] Extra source: {folder} (clock offset {clock_offset:+g}s)")
     safe_print(f"[MUSIC] Music source: {CONFIG['music_folder']}")
     unique_output_filename = generate_unique_filename(CONFIG['output_filename'])
     safe_print(f"[OUTPUT] Output file: {os.path.join(CONFIG['output_folder'], unique_output_filename)}")
     safe_print(f"[TIME] Clip duration: {CONFIG['clip_duration']} seconds")
-    safe_print(f"[TARGET] Resolution: {CONFIG['output_resolution']} @ {CONFIG['output_fps']}fps")
+    safe_print(f"[TARGET] Resolution: auto-detected from compiled clips @ {CONFIG['output_fps']}fps")
     safe_print("-" * 50)
     
     # Create output folder
     os.makedirs(CONFIG["output_folder"], exist_ok=True)
     logger.info(f"Output directory ready: {CONFIG['output_folder']}")
     
-    # Get video files with enhanced feedback
-    safe_print("\n[SEARCH] Scanning for video files...")
-    video_files = get_video_files(CONFIG["video_folder"])
+    # A saved render plan is rendered as it is - no scanning, probing or planning
+    render_plan = None
+    if CONFIG.get("render_plan"):
+        safe_print(f"\n[PLAN] Loading render plan: {CONFIG['render_plan']}")
+        render_plan = load_render_plan(CONFIG["render_plan"])
+        if render_plan is None:
+            if not os.environ.get('GUI_MODE'):
+                input("Press Enter to exit...")
+            return False
+    else:
+        # Get video files with enhanced feedback
+        safe_print("\n[SEARCH] Scanning for video files...")
+        video_files = select_captures()
     
-    if not video_files:
-        safe_print(f"\n[ERROR] No video files found in {CONFIG['video_folder']}")
-        safe_print(f"[SUMMARY] Supported formats: {', '.join(CONFIG['video_extensions'])}")
-        safe_print("[TIP] Make sure your recordings are in the correct folder!")
-        logger.error(f"No video files found in {CONFIG['video_folder']}")
-        if not os.environ.get('GUI_MODE'):
-            input("Press Enter to exit...")
-        return False
+        if not video_files:
+            safe_print(f"\n[ERROR] No video files found in {CONFIG['video_folder']}")
+            if CONFIG.get("compile_since") or CONFIG.get("compile_until"):
+                safe_print("[TIP] No captures match the selected date range")
+            safe_print(f"[SUMMARY] Supported formats: {', '.join(CONFIG['video_extensions'])}")
+            safe_print("[TIP] Make sure your recordings are in the correct folder!")
+            logger.error(f"No video files found in {CONFIG['video_folder']}")
+            if not os.environ.get('GUI_MODE'):
+                input("Press Enter to exit...")
+            return False
     
-    safe_print(f"[OK] Found {len(video_files)} video files")
-    logger.info(f"Found {len(video_files)} video files for processing")
+        safe_print(f"[OK] Found {len(video_files)} video files")
+        logger.info(f"Found {len(video_files)} video files for processing")
     
-    # Show most recent files
-    if len(video_files) > 0:
-        safe_print("\n[FOLDER] Most recent video files:")
-        for i, video_file in enumerate(video_files[:5]):
-            file_size = os.path.getsize(video_file) / (1024*1024)  # MB
-            mod_time = datetime.fromtimestamp(os.path.getmtime(video_file))
-            print(f"   {i+1}. {os.path.basename(video_file)} ({file_size:.1f}MB, {mod_time.strftime('%m/%d %H:%M')})")
+        # Show most recent files
+        if len(video_files) > 0:
+            safe_print("\n[FOLDER] Most recent video files:")
+            for i, video_file in enumerate(video_files[:5]):
+                file_size = os.path.getsize(video_file) / (1024*1024)  # MB
+                mod_time = datetime.fromtimestamp(os.path.getmtime(video_file))
+                print(f"   {i+1}. {os.path.basename(video_file)} ({file_size:.1f}MB, {mod_time.strftime('%m/%d %H:%M')})")
     
     try:
         safe_print(f"\n[START] Starting compilation process...")
-        result = create_compilation_video(video_files)
+        result = create_compilation_video([], plan=render_plan) if render_plan else compile_sessions(video_files)
         
-        if result:  # result is now the output path or False
+        if result:  # result is now the output path (a list of them for sessions) or False
             end_time = time.time()
             duration = end_time - start_time
             safe_print(f"\n[CELEBRATE] Video compilation completed successfully!")
             safe_print(f"[TIME] Total time: {duration:.1f} seconds")
-            safe_print(f"[FOLDER] Output saved to: {result}")  # result contains the full output path
+            for output_path in (result if isinstance(result, list) else [result]):
+                safe_print(f"[FOLDER] Output saved to: {output_path}")  # result contains the full output path
             logger.info(f"Compilation completed successfully in {duration:.1f} seconds")
             
             # Open output folder
@@ -1029,6 +3617,7 @@ def main():
         logger.error(f"Unexpected error during compilation: {e}")
         return False
     finally:
+        log_probe_cache_stats()
         print("\n" + "="*60)
         if not os.environ.get('GUI_MODE'):
             input("Press Enter to exit...")
@@ -1119,30 +3708,599 @@ def cleanup_temp_files(temp_files):
             logger.warning(f"Could not remove temporary file {temp_file}: {e}")
 
 
-def create_compilation_video(video_files):
-    """Enhanced video compilation with smart overlap detection and progress tracking"""
+# ===== COMPILATION MANIFEST =====
+# Every compilation gets a <output>.manifest.json beside it recording exactly which capture
+# intervals it contains, so later runs can compile only new footage or append to it.
+MANIFEST_VERSION = 1
+
+def manifest_path(output_path):
+    """Manifest file that belongs to a compilation"""
+    return os.path.splitext(output_path)[0] + ".manifest.json"
+
+def write_compilation_manifest(output_path, clips, intro_file=None, music_file=None, previous=None):
+    """
+    Write the manifest for a finished compilation.
+    `clips` are the smart clip tuples that made it into the output; an appended compilation
+    keeps the clips (and intro) of the manifest it extends (`previous`).
+    """
+    entries = list(previous["clips"]) if previous else []
+    for video_path, start_time, extract_duration, creation_timestamp, media_info in clips:
+        footage_start = creation_timestamp - media_info.duration + start_time
+        try:
+            stat = os.stat(video_path)
+            size, mtime = stat.st_size, stat.st_mtime
+        except OSError:
+            size, mtime = None, None
+        entries.append({
+            "path": os.path.abspath(video_path),
+            "size": size,
+            "mtime": mtime,
+            "start": round(start_time, 6),
+            "duration": round(extract_duration, 6),
+            "footage_start": round(footage_start, 6),
+            "footage_end": round(footage_start + extract_duration, 6),
+        })
+    
+    music = list(previous.get("music") or []) if previous else []
+    if music_file:
+        # One playlist file, or the separate tracks the filter graph backend mixes in
+        music.extend(os.path.basename(track) for track in ([music_file] if isinstance(music_file, str) else music_file))
+    
+    info = probe_media_info(output_path)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "output": os.path.basename(output_path),
+        "duration": info.duration if info else None,
+        "profile": {
+            # Nominal rate it was rendered at - the measured average drifts with the last frame
+            "width": info.width, "height": info.height, "fps": CONFIG["output_fps"],
+            "video_codec": info.video_codec, "pix_fmt": info.pix_fmt,
+            "audio_codec": info.audio_codec, "sample_rate": info.sample_rate, "channels": info.channels,
+        } if info else None,
+        "intro": previous.get("intro") if previous else (os.path.abspath(intro_file) if intro_file else None),
+        "music": music,
+        "footage_end": max((entry["footage_end"] for entry in entries), default=None),
+        "clips": entries,
+    }
+    
+    path = manifest_path(output_path)
+    try:
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+        logger.info(f"Manifest written: {path} ({len(entries)} clips)")
+    except OSError as e:
+        logger.warning(f"Could not write manifest {path}: {e}")
+    return manifest
+
+def load_latest_manifest(folder):
+    """
+    Compilation manifest in a folder that reaches furthest into the footage (None if there is none).
+    Chosen by recorded footage_end, not file time: concurrent sessions write their manifests in
+    completion order, so an earlier session's manifest can be the newest file.
+    """
+    latest = None
+    for path in glob.glob(os.path.join(folder, "*.manifest.json")):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            written = os.path.getmtime(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+            continue
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("footage_end") is None:
+            continue
+        manifest["output_path"] = os.path.join(os.path.dirname(path), manifest["output"])
+        key = (manifest["footage_end"], written)  # Same footage end: the most recently written one
+        if latest is None or key > latest[0]:
+            latest = (key, manifest)
+    return latest[1] if latest else None
+
+def get_append_profile(manifest):
+    """
+    MediaInfo of the compilation an append would extend, or None if it cannot take a stream-copied
+    segment (missing file, or not the H.264/AAC profile this tool writes).
+    """
+    output_path = manifest["output_path"]
+    if not os.path.exists(output_path):
+        logger.warning(f"Cannot append - {output_path} no longer exists")
+        return None
+    info = probe_media_info(output_path)
+    if info is None or info.video_codec != "h264" or info.audio_codec != "aac" or not info.fps:
+        logger.warning(f"Cannot append - {os.path.basename(output_path)} is not an H.264/AAC compilation")
+        return None
+    return info
+
+def append_to_compilation(existing_path, segment_path, profile):
+    """
+    Stream-copy a profile-matched segment onto the end of an existing compilation (in place).
+    The segment's audio is conformed first if the music mix changed its sample rate or layout.
+    Returns True on success; the existing file is left untouched on failure.
+    """
+    segment_info = probe_media_info(segment_path)
+    if segment_info is None:
+        return False
+    if (segment_info.sample_rate, segment_info.channels) != (profile.sample_rate, profile.channels):
+        conformed_path = os.path.splitext(segment_path)[0] + "_conformed.mp4"
+        conform_command = (
+            f'"{FFMPEG_PATH}" -y -i "{segment_path}" -c:v copy '
+            f'-c:a aac -b:a {CONFIG["audio_bitrate"]} -ar {profile.sample_rate} -ac {profile.channels} '
+            f'"{conformed_path}"'
+        )
+        success, stdout, stderr = run_ffmpeg_command(conform_command, timeout=120)
+        if not success:
+            logger.warning(f"Could not conform appended audio: {stderr}")
+            return False
+        os.replace(conformed_path, segment_path)
+        segment_info = probe_media_info(segment_path)
+    
+    if (segment_info.width, segment_info.height) != (profile.width, profile.height) or \
+            segment_info.video_codec != profile.video_codec or segment_info.pix_fmt != profile.pix_fmt:
+        logger.warning(f"Appended segment does not match the compilation profile "
+                       f"({segment_info.width}x{segment_info.height} {segment_info.pix_fmt} vs "
+                       f"{profile.width}x{profile.height} {profile.pix_fmt})")
+        return False
+    
+    concat_file = os.path.join(tempfile.gettempdir(), "append_list.txt")
+    with open(concat_file, 'w') as f:
+        f.write(f"file '{existing_path}'\n")
+        f.write(f"file '{segment_path}'\n")
+    
+    part_path = existing_path + ".part"
+    append_command = (
+        f'"{FFMPEG_PATH}" -y -f concat -safe 0 -i "{concat_file}" '
+        f'-map 0 -c copy -movflags +faststart -f mp4 "{part_path}"'
+    )
+    success, stdout, stderr = run_ffmpeg_command(append_command, timeout=300)
+    try:
+        os.remove(concat_file)
+    except OSError:
+        pass
+    if not success:
+        logger.warning(f"Append failed: {stderr}")
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return False
+    
+    os.replace(part_path, existing_path)
+    return True
+
+
+# ===== RENDER PLANS =====
+# A render plan is the edit decision list of one compilation: source captures with in/out points
+# and the probe data extraction needs, intro, music tracks, output profile and file name.
+# Rendering a plan skips scanning, probing and planning, so a plan made on one machine renders on
+# another, and the plan written next to a compilation re-renders it without repeating the analysis.
+RENDER_PLAN_VERSION = 1
+
+def render_plan_path(output_path):
+    """Render plan that belongs to a compilation"""
+    return os.path.splitext(output_path)[0] + ".plan.json"
+
+def build_render_plan(clips, output_path, resolution, intro_file=None, music_tracks=None):
+    """
+    Render plan for smart clip tuples. The keyframe before each in-point is taken from the
+    keyframe cache (filled during planning) so rendering never has to index the captures.
+    """
+    entries = []
+    for video_path, start_time, extract_duration, creation_timestamp, media_info in clips:
+        source_path = get_seek_repair(video_path) or video_path
+        keyframes = get_tail_keyframes(source_path, media_info.duration - start_time, media_info)
+        try:
+            stat = os.stat(video_path)
+            size, mtime = stat.st_size, stat.st_mtime
+        except OSError:
+            size, mtime = None, None
+        entries.append({
+            "path": os.path.abspath(video_path),
+            "size": size,
+            "mtime": mtime,
+            "in": round(start_time, 6),
+            "out": round(start_time + extract_duration, 6),
+            "timestamp": creation_timestamp,
+            "seek_keyframe": keyframe_at_or_before(keyframes, start_time),
+            "keyframes": [k for k in keyframes if start_time - 0.1 <= k < start_time + extract_duration],
+            "media": media_info.to_dict(),
+        })
+    
+    intro = None
+    if intro_file:
+        intro_info = probe_media_info(intro_file)
+        intro = {
+            "path": os.path.abspath(intro_file),
+            "duration": CONFIG["intro_duration"],
+            "media": intro_info.to_dict() if intro_info else None,
+        }
+    
+    return {
+        "version": RENDER_PLAN_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "output": os.path.basename(output_path),
+        "profile": {
+            "resolution": resolution,
+            "fps": CONFIG["output_fps"],
+            "video_bitrate": CONFIG["video_bitrate"],
+            "audio_bitrate": CONFIG["audio_bitrate"],
+        },
+        "intro": intro,
+        "music": [os.path.abspath(track) for track in music_tracks or []],
+        "clips": entries,
+    }
+
+def write_render_plan(path, plan):
+    """Write a render plan atomically; returns True on success"""
+    try:
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(plan, f, indent=2)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        logger.warning(f"Could not write render plan {path}: {e}")
+        return False
+    logger.info(f"Render plan written: {path} ({len(plan['clips'])} clips)")
+    return True
+
+def _locate_plan_file(path, folders):
+    """A file named in a render plan, or the file with the same name in one of `folders` (plans move between machines)"""
+    if os.path.exists(path):
+        return path
+    for folder in folders:
+        candidate = os.path.join(folder, os.path.basename(path))
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+def load_render_plan(path):
+    """
+    Read a render plan and point it at this machine's files: sources missing at their recorded
+    path are looked up by name in the capture roots (intro and music in their folders).
+    Clips whose source is gone or changed size are dropped. Returns the plan, or None.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+    except (OSError, ValueError) as e:
+        safe_print(f"[ERROR] Cannot read render plan {path}: {e}")
+        return None
+    if plan.get("version") != RENDER_PLAN_VERSION:
+        safe_print(f"[ERROR] Unsupported render plan version {plan.get('version')!r} (expected {RENDER_PLAN_VERSION})")
+        return None
+    
+    capture_folders = [folder for folder, _ in get_capture_roots()]
+    clips = []
+    for entry in plan.get("clips", []):
+        source_path = _locate_plan_file(entry["path"], capture_folders)
+        if source_path is None:
+            safe_print(f"[WARNING] Plan source not found, skipping: {entry['path']}")
+            continue
+        if entry.get("size") is not None and os.path.getsize(source_path) != entry["size"]:
+            safe_print(f"[WARNING] Plan source changed since planning, skipping: {source_path}")
+            continue
+        clips.append(dict(entry, path=source_path))
+    plan["clips"] = clips
+    
+    if plan.get("intro"):
+        intro_path = _locate_plan_file(plan["intro"]["path"], [CONFIG["intro_folder"]])
+        if intro_path is None:
+            safe_print(f"[WARNING] Plan intro not found, rendering without it: {plan['intro']['path']}")
+            plan["intro"] = None
+        else:
+            plan["intro"]["path"] = intro_path
+    music = []
+    for track in plan.get("music", []):
+        track_path = _locate_plan_file(track, [CONFIG["music_folder"]])
+        if track_path is None:
+            safe_print(f"[WARNING] Plan music track not found, skipping: {track}")
+        else:
+            music.append(track_path)
+    plan["music"] = music
+    return plan
+
+def export_compilation_plan(smart_clips, output_path, resolution, temp_dir, session=None):
+    """
+    Write a planned compilation as a render plan instead of rendering it (CONFIG["export_plan"]).
+    Intro and music are chosen now so the plan renders the same everywhere.
+    Returns the plan path, or False.
+    """
+    if session:
+        intro_file = session.get("intro_file")
+    else:
+        intro_file = select_intro_video() if CONFIG["use_intro"] else None
+    total_duration = sum(clip[2] for clip in smart_clips) + (CONFIG["intro_duration"] if intro_file else 0)
+    music_tracks = [source for source, _ in choose_music_tracks(temp_dir, total_duration)]
+    
+    path = CONFIG["export_plan"]
+    if session:
+        name, extension = os.path.splitext(path)
+        path = f"{name}_{session['label']}{extension}"
+    plan = build_render_plan(smart_clips, output_path, resolution, intro_file, music_tracks)
+    if not write_render_plan(path, plan):
+        return False
+    safe_print(f"\n[PLAN] Render plan written: {path} ({len(plan['clips'])} clips, "
+               f"{sum(clip[2] for clip in smart_clips):.1f}s of footage) - render it with RENDER_PLAN")
+    return path
+
+def render_plan_clips(plan):
+    """Smart clip tuples and {video_path: keyframes (seek keyframe and those inside the clip)} for a loaded render plan"""
+    smart_clips = []
+    keyframes = {}
+    for entry in plan["clips"]:
+        smart_clips.append((entry["path"], entry["in"], round(entry["out"] - entry["in"], 6),
+                            entry["timestamp"], MediaInfo.from_dict(entry["media"])))
+        clip_keyframes = set(entry.get("keyframes") or [])
+        if entry.get("seek_keyframe") is not None:
+            clip_keyframes.add(entry["seek_keyframe"])
+        keyframes[entry["path"]] = sorted(clip_keyframes)
+    return smart_clips, keyframes
+
+
+# ===== SESSIONS =====
+# A capture folder mixes many play sessions. The footage timeline is split wherever nothing was
+# recorded for session_gap_minutes, and every session becomes its own compilation.
+
+def iter_sessions(video_files, gap_seconds, not_before=None):
+    """
+    Split captures into play sessions wherever the footage timeline is idle for more than gap_seconds,
+    newest session first. Captures are walked newest first (footage end order) and probed lazily as
+    in iter_planning_captures; a session is complete once the walk reaches a capture that ends more
+    than gap_seconds before the session's earliest footage, so it is yielded (and can render) while
+    older sessions are still being found. Captures ending before `not_before` are never visited.
+    Yields (video paths, session footage start).
+    """
+    catalog = catalog_lookup(video_files)
+    known_media = {}
+    video_data = []
+    for video_path in video_files:
+        entry = catalog.get(os.path.abspath(video_path))
+        if entry is not None:
+            video_data.append((video_path, entry[0]))
+            if entry[1] is not None:
+                known_media[video_path] = entry[1]
+            continue
+        try:
+            video_data.append((video_path, capture_timestamp(os.stat(video_path)) + clock_offset_for(video_path)))
+        except OSError as e:
+            logger.warning(f"Could not get timestamp for {video_path}: {e}")
+    video_data.sort(key=lambda x: x[1], reverse=True)
+    if not_before is not None:
+        video_data = [(video_path, timestamp) for video_path, timestamp in video_data
+                      if timestamp - not_before > MIN_CLIP_DURATION]
+    timestamps = dict(video_data)
+    
+    probed = {}
+    def probe(video_path):
+        if video_path in known_media:
+            return known_media[video_path]
+        info = probe_media_info(video_path)
+        probed[video_path] = info
+        return info
+    
+    session_files = []
+    floor = float("inf")  # Earliest footage of the current session
+    try:
+        for video_path, media_info in probe_files_in_order((video_path for video_path, _ in video_data), probe):
+            footage_end = timestamps[video_path]
+            # Unfinalized recordings have no duration yet - their session planner repairs them
+            duration = media_info.duration if media_info and media_info.duration_known and media_info.duration else 0.0
+            if session_files and footage_end < floor - gap_seconds:
+                # Stored first, so the session's planner finds its captures in the catalog
+                record_capture_media({path: probed.pop(path) for path in session_files if path in probed})
+                yield session_files, floor
+                session_files, floor = [], float("inf")
+            session_files.append(video_path)
+            floor = min(floor, footage_end - duration)
+        if session_files:
+            record_capture_media({path: probed.pop(path) for path in session_files if path in probed})
+            yield session_files, floor
+    finally:
+        record_capture_media(dict(probed))  # Probed ahead of where the walk stopped
+
+def compile_sessions(video_files):
+    """
+    Compile captures as one video per play session (CONFIG["session_gap_minutes"]), or as a
+    single compilation when sessions are off or everything is one session.
+    Sessions are found newest first (iter_sessions) and each is submitted to one session pool as
+    soon as it is complete; probe data comes from the shared catalog and the intro is processed
+    once per output resolution. Sessions rendering at the same time split the CPU cores between
+    their encodes (encode_budget).
+    Returns the output path, a list of output paths for several sessions, or False.
+    """
+    gap_minutes = CONFIG.get("session_gap_minutes") or 0
+    if not gap_minutes:
+        return create_compilation_video(video_files)
+    
+    # Incremental cutoff is decided once - sessions write manifests while the others still plan.
+    # Footage before it (and before the time window) is not walked at all.
+    since = None
+    compile_mode = (CONFIG.get("compile_mode") or "full").lower()
+    if compile_mode in ("new", "append"):
+        previous_manifest = load_latest_manifest(CONFIG["output_folder"])
+        since = previous_manifest["footage_end"] if previous_manifest else None
+    
+    sessions = iter_sessions(video_files, gap_minutes * 60, planning_cutoff(since))
+    found = [session for session in (next(sessions, None), next(sessions, None)) if session is not None]
+    if len(found) <= 1:
+        sessions.close()
+        return create_compilation_video(video_files)
+    
+    safe_print(f"\n[SESSIONS] Play sessions (idle gap > {gap_minutes:g} min), newest first:")
+    if compile_mode == "append":
+        safe_print("[WARNING] Append mode applies to a single compilation - sessions are written as new files")
+    
+    # One intro for every session - encoded once per output resolution (session_intro_clip)
+    shared_temp_dir = tempfile.mkdtemp(prefix="bmagic_sessions_")
+    intro_file = select_intro_video() if CONFIG["use_intro"] else None
+    intro_clips = {}
+    intro_lock = threading.Lock()
+    
+    session_start_time = time.time()
+    outputs = []
+    jobs = []
+    executor = ThreadPoolExecutor(max_workers=max(1, CONFIG["session_workers"]))
+    try:
+        # Each session starts rendering as soon as the walk has found all of its captures
+        for i, (session_files, session_start) in enumerate(itertools.chain(found, sessions)):
+            safe_print(f"   Session {i+1}: {datetime.fromtimestamp(session_start).strftime('%m/%d %H:%M')} "
+                       f"({len(session_files)} captures)")
+            session = {
+                "label": f"Session{i+1}_{datetime.fromtimestamp(session_start).strftime('%Y%m%d_%H%M')}",
+                "temp_dir": tempfile.mkdtemp(prefix=f"bmagic_session{i+1}_", dir=shared_temp_dir),
+                "shared_temp_dir": shared_temp_dir,
+                "intro_file": intro_file,
+                "intro_clips": intro_clips,
+                "intro_lock": intro_lock,
+                "since": since,
+            }
+            jobs.append((session, executor.submit(create_compilation_video, session_files, session)))
+        
+        for session, future in jobs:
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"{session['label']} failed: {e}")
+                result = False
+            if result:
+                outputs.append(result)
+            else:
+                safe_print(f"[WARNING] {session['label']}: no compilation produced")
+    finally:
+        sessions.close()
+        executor.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(shared_temp_dir, ignore_errors=True)
     
+    logger.info(f"Compiled {len(outputs)} of {len(jobs)} sessions in {time.time() - session_start_time:.1f}s")
+    return outputs or False
+
+
+def plan_compilation(video_files, session=None):
+    """
+    Steps before rendering: apply the incremental mode, plan the smart clips (broken captures are
+    rejected as the planner reaches them) and choose the output resolution.
+    Returns (smart_clips, output_resolution, previous_manifest, append_profile), or None if
+    nothing can be compiled.
+    """
     safe_print(f"[VIDEO] Processing {len(video_files)} video files with smart overlap detection...")
     logger.info(f"Starting smart compilation of {len(video_files)} videos")
     
+    # Incremental modes only compile footage after the last compilation's manifest
+    compile_mode = (CONFIG.get("compile_mode") or "full").lower()
+    previous_manifest = None
+    append_profile = None
+    since = session["since"] if session else None
+    if compile_mode in ("new", "append") and not session:
+        previous_manifest = load_latest_manifest(CONFIG["output_folder"])
+        if previous_manifest:
+            since = previous_manifest["footage_end"]
+            safe_print(f"[INCREMENTAL] Compiling footage after {datetime.fromtimestamp(since).strftime('%m/%d %H:%M:%S')} "
+                       f"(last compilation: {previous_manifest['output']})")
+            if compile_mode == "append":
+                append_profile = get_append_profile(previous_manifest)
+                if append_profile is None:
+                    safe_print("[WARNING] Cannot append to the last compilation - writing a new file instead")
+        else:
+            safe_print("[INCREMENTAL] No previous compilation manifest found - compiling all footage")
+    
     # Step 1: Calculate smart clips to avoid overlapping content
     safe_print("\n[SMART] Step 1: Analyzing video timestamps and calculating smart clips...")
-    smart_clips = calculate_smart_clips(video_files, CONFIG["clip_duration"])
+    smart_clips = calculate_smart_clips(video_files, CONFIG["clip_duration"], since)
     
     if not smart_clips:
         safe_print("\n[ERROR] No valid clips could be calculated!")
         logger.error("Smart clip calculation failed - no clips generated")
-        return False
+        return None
     
     safe_print(f"\n[STATS] Smart analysis complete: {len(smart_clips)} clips from {len(video_files)} videos")
     logger.info(f"Smart clips calculated: {len(smart_clips)} clips with overlap prevention")
     
-    # Step 2: Extract smart clips
+    # Smart resolution detection for universal compatibility - based on the planned clips
+    safe_print("\n[TARGET] Configuring optimal video resolution...")
+    if append_profile:
+        # Appended clips are rendered in the profile of the compilation they extend
+        output_resolution = f"{append_profile.width}x{append_profile.height}"
+        CONFIG["output_fps"] = (previous_manifest.get("profile") or {}).get("fps") or round(append_profile.fps)
+    else:
+        output_resolution = detect_optimal_resolution(smart_clips)
+    return smart_clips, output_resolution, previous_manifest, append_profile
+
+def session_intro_clip(session, resolution):
+    """
+    The sessions' shared intro encoded at `resolution` (None without an intro). Sessions that
+    render at the same resolution share one encode; it lives in the shared temp dir.
+    """
+    intro_file = session.get("intro_file")
+    if not intro_file:
+        return None
+    with session["intro_lock"]:
+        if resolution not in session["intro_clips"]:
+            intro_clip = os.path.join(session["shared_temp_dir"], f"intro_{resolution}_{os.path.splitext(os.path.basename(intro_file))[0]}.mp4")
+            if not extract_intro_clip(intro_file, intro_clip, CONFIG["intro_duration"], resolution=resolution):
+                safe_print(f"   [WARNING] Failed to process intro at {resolution} - compiling without it")
+                intro_clip = None
+            session["intro_clips"][resolution] = intro_clip
+        return session["intro_clips"][resolution]
+
+def create_compilation_video(video_files, session=None, plan=None):
+    """
+    Enhanced video compilation with smart overlap detection and progress tracking.
+    `session` is set when compile_sessions renders several compilations at once: a dict with the
+    session "label", its own "temp_dir", the shared intro (see session_intro_clip) and the
+    incremental cutoff "since" decided once for all sessions.
+    `plan` is a loaded render plan (load_render_plan): its clips, intro, music and profile are
+    rendered as they are, without scanning, probing or planning.
+    With CONFIG["export_plan"] set the compilation is planned and written as a render plan only.
+    """
+    temp_dir = session["temp_dir"] if session else tempfile.gettempdir()
+    
+    seek_keyframes = {}
+    if plan:
+        safe_print(f"[PLAN] Rendering {len(plan['clips'])} planned clips - no scanning, probing or planning")
+        smart_clips, seek_keyframes = render_plan_clips(plan)
+        if not smart_clips:
+            safe_print("\n[ERROR] None of the planned clips are available!")
+            return False
+        output_resolution = plan["profile"]["resolution"]
+        CONFIG["output_fps"] = plan["profile"]["fps"]
+        CONFIG["video_bitrate"] = plan["profile"]["video_bitrate"]
+        CONFIG["audio_bitrate"] = plan["profile"]["audio_bitrate"]
+        previous_manifest = append_profile = None
+    else:
+        planned = plan_compilation(video_files, session)
+        if planned is None:
+            return False
+        smart_clips, output_resolution, previous_manifest, append_profile = planned
+    if not session:
+        CONFIG["output_resolution"] = output_resolution  # Concurrent sessions keep theirs local
+    safe_print(f"   Final resolution: {output_resolution}")
+    
+    output_filename = CONFIG["output_filename"]
+    if session:
+        name, extension = os.path.splitext(output_filename)
+        output_filename = f"{name}_{session['label']}{extension}"
+    if plan and not os.path.exists(os.path.join(CONFIG["output_folder"], plan["output"])):
+        unique_filename = plan["output"]  # Re-rendered under its planned name
+    else:
+        unique_filename = generate_unique_filename(plan["output"] if plan else output_filename)
+    
+    if CONFIG.get("export_plan") and not plan:
+        return export_compilation_plan(smart_clips, os.path.join(CONFIG["output_folder"], unique_filename),
+                                       output_resolution, temp_dir, session)
+    if CONFIG.get("extract_benchmark"):
+        return benchmark_extraction(smart_clips, os.path.join(CONFIG["output_folder"], unique_filename),
+                                    output_resolution, temp_dir, seek_keyframes if plan else None, session)
+    
+    # The filter graph backend reads the clips straight from the captures in the final render
+    graph = (CONFIG.get("render_backend") or "clips").lower() == "graph"
+    graph_clips = []  # (source path, start, duration, media_info) for render_compilation_graph
+    
+    # Step 2: Extract smart clips - encoded once, straight into the output profile
     safe_print("\n[EXTRACT] Step 2: Extracting non-overlapping clips...")
+    render_start = time.time()  # Timed through the final encode for the plan preview's estimate
     processed_videos = []
+    compiled_clips = []  # Smart clips that made it into the compilation - recorded in the manifest
     total_actual_duration = 0
+    extraction_jobs = []  # (clip index, temp clip path, keyframes) - extracted in parallel below
     
-    for i, (video_file, start_time, extract_duration, creation_timestamp) in enumerate(smart_clips):
+    for i, (video_file, start_time, extract_duration, creation_timestamp, media_info) in enumerate(smart_clips):
         # Check file size to avoid processing extremely large files
         file_size_mb = os.path.getsize(video_file) / (1024 * 1024)
         safe_print(f"   [{i+1}/{len(smart_clips)}] Smart clip: {os.path.basename(video_file)} ({file_size_mb:.1f}MB)")
@@ -1155,42 +4313,66 @@ def create_compilation_video(video_files):
             logger.warning(f"Skipped large file: {video_file} ({file_size_mb:.1f}MB)")
             continue
         
-        try:
-            # Create temporary clip from this video using smart parameters
-            temp_clip_path = os.path.join(tempfile.gettempdir(), f"smart_clip_{i}_{os.path.basename(video_file)}")
-            
-            # Use smart extraction with precise timing
-            if extract_smart_clip(video_file, temp_clip_path, start_time, extract_duration):
-                processed_videos.append(temp_clip_path)
-                total_actual_duration += extract_duration
-                safe_print(f"      [OK] Smart clip extracted successfully ({extract_duration:.2f}s)")
-            else:
-                safe_print(f"      [WARNING] Failed to extract smart clip")
-                logger.warning(f"Failed to extract smart clip from {video_file}")
-        except Exception as e:
-            safe_print(f"      [ERROR] Error processing video: {e}")
-            logger.error(f"Error processing {video_file}: {e}")
+        if graph:
+            # Nothing is extracted - only the clip bounds are checked, as extract_smart_clip would
+            start_time = max(start_time, 0.0)
+            if media_info and media_info.duration:
+                extract_duration = min(extract_duration, media_info.duration - start_time)
+            if extract_duration < MIN_CLIP_DURATION:
+                safe_print(f"      [WARNING] Clip is outside the capture - skipped")
+                continue
+            graph_clips.append((get_seek_repair(video_file) or video_file, start_time, extract_duration, media_info))
+            compiled_clips.append(smart_clips[i])
+            total_actual_duration += extract_duration
             continue
+        
+        # Create temporary clip from this video using smart parameters
+        # (always MP4 - the concat demuxer needs one container and time base for every clip)
+        temp_clip_path = os.path.join(temp_dir, f"smart_clip_{i}_{os.path.splitext(os.path.basename(video_file))[0]}.mp4")
+        keyframes = seek_keyframes.get(video_file, []) if plan else None
+        extraction_jobs.append((i, temp_clip_path, keyframes))
+    
+    # Several clips are encoded at once; results come back in plan order for the concat list
+    extracted = extract_clips_parallel(smart_clips, extraction_jobs, output_resolution, session)
+    for (i, temp_clip_path, _), success in zip(extraction_jobs, extracted):
+        video_file, _, extract_duration = smart_clips[i][:3]
+        if success:
+            processed_videos.append(temp_clip_path)
+            compiled_clips.append(smart_clips[i])
+            total_actual_duration += extract_duration
+            safe_print(f"   [OK] Clip {i+1}: {os.path.basename(video_file)} ({extract_duration:.2f}s)")
+        else:
+            safe_print(f"   [WARNING] Failed to extract smart clip {i+1}: {os.path.basename(video_file)}")
+            logger.warning(f"Failed to extract smart clip from {video_file}")
     
-    if not processed_videos:
+    if not compiled_clips:
         safe_print("\n[ERROR] No video clips were successfully processed!")
         logger.error("No clips extracted from any videos")
         return False
     
-    safe_print(f"\n[OK] Successfully processed {len(processed_videos)} smart clips")
-    safe_print(f"[STATS] Total compilation duration: {total_actual_duration:.1f}s (avg: {total_actual_duration/len(processed_videos):.1f}s per clip)")
+    safe_print(f"\n[OK] Successfully processed {len(compiled_clips)} smart clips")
+    safe_print(f"[TIME] Extraction: {time.time() - render_start:.1f}s")
+    safe_print(f"[STATS] Total compilation duration: {total_actual_duration:.1f}s (avg: {total_actual_duration/len(compiled_clips):.1f}s per clip)")
     
     # Calculate total video duration for smart music playlist
     total_video_duration = total_actual_duration
-    if CONFIG["use_intro"]:
+    if CONFIG["use_intro"] and not append_profile:
         total_video_duration += CONFIG["intro_duration"]
     
     # Step 2: Create music playlist
     safe_print("\n[MUSIC] Step 2: Creating background music playlist...")
-    temp_dir = tempfile.gettempdir()
-    music_playlist = create_music_playlist(temp_dir, total_video_duration)
+    if graph:
+        # The tracks are joined and mixed inside the render graph - no playlist file
+        chosen_music = resolve_music_tracks(temp_dir, total_video_duration, plan["music"] if plan else None)
+        music_tracks = [source for source, _ in chosen_music]
+        music_playlist = [track for _, track in chosen_music] or None
+    else:
+        music_playlist, music_tracks = create_music_playlist(temp_dir, total_video_duration, plan["music"] if plan else None)
+    manifest_music = music_tracks if graph else music_playlist  # Separate tracks are recorded by their source names
     if music_playlist:
-        if os.path.basename(music_playlist).startswith("music_playlist"):
+        if graph:
+            safe_print(f"   [MUSIC] {len(music_playlist)} track(s) for {total_video_duration:.1f}s video, mixed in the render graph")
+        elif os.path.basename(music_playlist).startswith("music_playlist"):
             safe_print(f"   [MUSIC] Created smart playlist for {total_video_duration:.1f}s video")
         else:
             safe_print(f"   [MUSIC] Selected: {os.path.basename(music_playlist)}")
@@ -1209,7 +4391,28 @@ def create_compilation_video(video_files):
     
     # Step 3: Select intro (if enabled) 
     intro_clip_path = None
-    if CONFIG["use_intro"]:
+    intro_file = None
+    intro_info = None
+    if append_profile:
+        safe_print("\n[SKIP] Step 3 SKIPPED: Appending to an existing compilation (it already has its intro)")
+    elif plan:
+        if plan["intro"]:
+            intro_file = plan["intro"]["path"]
+            intro_info = MediaInfo.from_dict(plan["intro"]["media"]) if plan["intro"].get("media") else None
+            if not graph:  # The render graph trims the intro itself
+                intro_clip_path = os.path.join(temp_dir, f"intro_{os.path.splitext(os.path.basename(intro_file))[0]}.mp4")
+                if not extract_intro_clip(intro_file, intro_clip_path, plan["intro"]["duration"], intro_info,
+                                          output_resolution):
+                    safe_print(f"      [WARNING] Failed to process intro")
+                    intro_clip_path = None
+                    intro_file = None
+    elif session and graph:
+        intro_file = session.get("intro_file")
+    elif session:
+        # Shared by all sessions that render at this resolution
+        intro_clip_path = session_intro_clip(session, output_resolution)
+        intro_file = session.get("intro_file") if intro_clip_path else None
+    elif CONFIG["use_intro"]:
         safe_print("\n[VIDEO] Step 3: Selecting intro video...")
         intro_file = select_intro_video()
         if intro_file:
@@ -1217,10 +4420,12 @@ def create_compilation_video(video_files):
             logger.info(f"Selected intro video: {intro_file}")
             
             # Process intro video (extract and standardize like main videos)
-            intro_clip_path = os.path.join(tempfile.gettempdir(), f"intro_{os.path.basename(intro_file)}")
+            intro_clip_path = os.path.join(temp_dir, f"intro_{os.path.splitext(os.path.basename(intro_file))[0]}.mp4")
             
             try:
-                if extract_intro_clip(intro_file, intro_clip_path, CONFIG["intro_duration"]):
+                if graph:
+                    intro_clip_path = None  # Trimmed inside the render graph
+                elif extract_intro_clip(intro_file, intro_clip_path, CONFIG["intro_duration"], resolution=output_resolution):
                     safe_print(f"      [OK] Intro processed successfully")
                 else:
                     safe_print(f"      [WARNING] Failed to process intro")
@@ -1234,6 +4439,17 @@ def create_compilation_video(video_files):
     else:
         safe_print("\n[SKIP] Step 3 SKIPPED: Intro videos disabled in configuration")
     
+    # The render graph trims the intro from its source, like extract_intro_clip
+    intro_segment = None
+    if graph and intro_file:
+        intro_info = intro_info or probe_media_info(intro_file)
+        if intro_info and intro_info.duration:
+            intro_duration = plan["intro"]["duration"] if plan else min(CONFIG["intro_duration"], intro_info.duration)
+            intro_segment = (intro_file, 0.0, intro_duration, intro_info)
+        else:
+            safe_print(f"[WARNING] Warning: Could not get duration for {intro_file}")
+            intro_file = None
+    
     # Step 4: Combine intro + main clips (S+ style: intro FIRST)
     if intro_clip_path and os.path.exists(intro_clip_path):
         processed_videos = [intro_clip_path] + processed_videos  # Intro FIRST like S+VideoCompiler.py
@@ -1241,12 +4457,39 @@ def create_compilation_video(video_files):
     
     # Step 5: Final compilation
     safe_print(f"\n[TOOLS] Step 5: Creating final compilation...")
-    unique_filename = generate_unique_filename(CONFIG["output_filename"])
     output_path = os.path.join(CONFIG["output_folder"], unique_filename)
+    if append_profile:
+        # Render only the new footage; it is stream-copied onto the existing compilation below
+        output_path = os.path.join(temp_dir, "append_segment.mp4")
     
     try:
-        # Use the existing concatenate_videos function (it takes 3 parameters)
-        success = concatenate_videos(processed_videos, output_path, music_playlist)
+        if graph:
+            success = render_compilation_graph(graph_clips, output_path, output_resolution, temp_dir,
+                                               intro_segment, music_playlist or ())
+        else:
+            success = concatenate_videos(processed_videos, output_path, music_playlist, output_resolution, temp_dir,
+                                         session)
+        
+        if success and os.path.exists(output_path) and append_profile:
+            existing_path = previous_manifest["output_path"]
+            safe_print(f"   [APPEND] Stream-copying {total_actual_duration:.1f}s of new footage onto {os.path.basename(existing_path)}...")
+            if append_to_compilation(existing_path, output_path, append_profile):
+                os.remove(output_path)
+                output_path = existing_path
+                write_compilation_manifest(output_path, compiled_clips, music_file=manifest_music, previous=previous_manifest)
+                if os.path.exists(render_plan_path(output_path)):
+                    os.remove(render_plan_path(output_path))  # No longer describes the appended file
+            else:
+                # Keep the rendered footage as a compilation of its own
+                safe_print("   [WARNING] Append failed - saving the new footage as a separate compilation")
+                new_output_path = os.path.join(CONFIG["output_folder"], unique_filename)
+                shutil.move(output_path, new_output_path)
+                output_path = new_output_path
+                write_compilation_manifest(output_path, compiled_clips, music_file=manifest_music)
+        elif success and os.path.exists(output_path):
+            write_compilation_manifest(output_path, compiled_clips, intro_file, manifest_music)
+            write_render_plan(render_plan_path(output_path),
+                              build_render_plan(compiled_clips, output_path, output_resolution, intro_file, music_tracks))
         
         if success and os.path.exists(output_path):
             # Show final file info
@@ -1255,6 +4498,8 @@ def create_compilation_video(video_files):
             safe_print(f"   📁 File: {os.path.basename(output_path)}")
             safe_print(f"   📊 Size: {size_mb:.1f} MB")
             logger.info(f"Compilation successful: {output_path} ({size_mb:.1f}MB)")
+            mark_compiled(compiled_clips)  # "Since last compile" selections start after this footage
+            record_render_rate(total_video_duration, time.time() - render_start)
             
             return output_path  # Return the actual output path on success
         else:
@@ -1267,9 +4512,9 @@ def create_compilation_video(video_files):
         logger.error(f"Error during concatenation: {e}")
         return False
     finally:
-        # Cleanup temporary files
+        # Cleanup temporary files (a shared session intro is cleaned up by compile_sessions)
         safe_print("\n🧹 Cleaning up temporary files...")
-        cleanup_temp_files(processed_videos)
+        cleanup_temp_files([video for video in processed_videos if not session or video != intro_clip_path])
         logger.info("Temporary files cleaned up")
         safe_print("\n[VIDEO] Step 3: Selecting intro video...")
         intro_file = select_random_intro()
@@ -1318,5 +4563,8 @@ def create_compilation_video(video_files):
     
 if __name__ == "__main__":
     import sys
+    if "--benchmark-overlap" in sys.argv:
+        benchmark_overlap_resolver()
+        sys.exit(0)
     success = main()
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -77,6 +77,14 @@ class UOVidCompilerGUI:
         self.last_intro_files = set()
         self.monitoring_active = False
         
+        # Live plan preview state (captures are probed once per input folder and kept in memory)
+        self.plan_captures = None
+        self.plan_generation = 0
+        self.plan_after_id = None
+        self.plan_reload_after_id = None
+        self.plan_running = False
+        self.plan_pending = False
+        
         # Set icon IMMEDIATELY for taskbar
         self.set_taskbar_icon()
         
@@ -105,6 +113,9 @@ class UOVidCompilerGUI:
         # Start folder monitoring (checks every 5 seconds)
         self.start_folder_monitoring()
         
+        # Live plan preview - recomputed whenever the settings change
+        self.start_plan_preview()
+        
         # Center window
         self.center_window()
         
@@ -679,6 +690,10 @@ class UOVidCompilerGUI:
         # Ensure current selection is visible
         self.intro_combo.current(0 if not self.intro_selection_var.get() else self.intro_combo['values'].index(self.intro_selection_var.get()))
         
+        # Live compilation plan for the current settings
+        self.plan_var = tk.StringVar(value="[PLAN] Scanning captures...")
+        ttk.Label(config_options_frame, textvariable=self.plan_var, style='Info.TLabel').pack(anchor='w')
+        
         # Main action button (prominent)
         main_button_frame = ttk.Frame(action_frame, style='Custom.TFrame')
         main_button_frame.pack(fill='x', pady=(0, 15))
@@ -1049,6 +1064,8 @@ Ready to compile? Configure your settings above and click "Compile Videos"!
                 state='normal', 
                 text="[OK] Compilation Complete! Click to Compile Again",
                 bg=self.colors['success'])
+            if DIRECT_COMPILATION:
+                self.schedule_plan_preview(reload=True)  # Updated render speed (and any new captures)
         else:
             self.log_status("[ERROR] Compilation failed")
             messagebox.showerror("Compilation Failed", 
@@ -1150,7 +1167,7 @@ Ready to compile? Configure your settings above and click "Compile Videos"!
     
     def view_logs(self):
         """View application logs"""
-        logs_dir = os.path.join(os.path.dirname(__file__), "logs")
+        logs_dir = os.environ.get('LOGS_DIR') or os.path.join(os.path.dirname(__file__), "logs")
         if os.path.exists(logs_dir):
             try:
                 os.startfile(logs_dir)
@@ -1321,6 +1338,107 @@ Ready to compile? Configure your settings above and click "Compile Videos"!
         """Stop monitoring folders"""
         self.monitoring_active = False
     
+    def start_plan_preview(self):
+        """Start the live plan preview: re-plan on trim changes, re-scan on input folder changes"""
+        if not (DIRECT_COMPILATION and hasattr(UOVidCompiler, 'preview_compilation_plan')):
+            self.plan_var.set("[PLAN] Plan preview unavailable")
+            return
+        self.trim_seconds_var.trace_add('write', lambda *args: self.schedule_plan_preview())
+        self.input_path_var.trace_add('write', lambda *args: self.schedule_plan_preview(reload=True))
+        self.load_plan_captures()
+    
+    def schedule_plan_preview(self, reload=False):
+        """Debounce setting changes - only the last change in a burst triggers work"""
+        if reload:
+            if self.plan_reload_after_id is not None:
+                self.root.after_cancel(self.plan_reload_after_id)
+            self.plan_reload_after_id = self.root.after(500, self.load_plan_captures)  # Typing a path
+        else:
+            if self.plan_after_id is not None:
+                self.root.after_cancel(self.plan_after_id)
+            self.plan_after_id = self.root.after(50, self.update_plan_preview)
+    
+    def load_plan_captures(self):
+        """Scan the captures a compile would select once in a background thread and keep them in memory"""
+        self.plan_reload_after_id = None
+        self.plan_generation += 1  # Results of older scans are dropped
+        generation = self.plan_generation
+        self.plan_captures = None
+        
+        folder = self.input_path_var.get().strip()
+        if not folder or not os.path.isdir(folder):
+            self.plan_var.set("[PLAN] Set an input folder to preview the compilation")
+            return
+        self.plan_var.set("[PLAN] Scanning captures...")
+        
+        def load():
+            try:
+                result = UOVidCompiler.load_plan_captures(folder)
+            except Exception as e:
+                result = e
+            self.root.after(0, lambda: self._plan_captures_loaded(generation, result))
+        
+        threading.Thread(target=load, daemon=True).start()
+    
+    def _plan_captures_loaded(self, generation, result):
+        """Store scanned captures (main thread) and show the first plan"""
+        if generation != self.plan_generation:
+            return
+        if isinstance(result, Exception):
+            self.plan_var.set(f"[PLAN] Could not scan captures: {result}")
+            return
+        if not result:
+            self.plan_var.set("[PLAN] No captures match the capture selection")
+            return
+        self.plan_captures = result
+        self.update_plan_preview()
+    
+    def update_plan_preview(self):
+        """Re-plan from the in-memory captures on a worker thread (one run at a time)"""
+        self.plan_after_id = None
+        if self.plan_captures is None:
+            return  # Shown once the scan finishes
+        if self.plan_running:
+            self.plan_pending = True
+            return
+        try:
+            clip_duration = float(self.trim_seconds_var.get())
+        except ValueError:
+            return
+        
+        self.plan_running = True
+        captures = self.plan_captures
+        
+        def plan():
+            try:
+                summary = UOVidCompiler.preview_compilation_plan(captures, clip_duration)
+            except Exception as e:
+                summary = e
+            self.root.after(0, lambda: self._show_plan_preview(summary))
+        
+        threading.Thread(target=plan, daemon=True).start()
+    
+    def _show_plan_preview(self, summary):
+        """Display a finished plan, or start the next one if settings changed meanwhile"""
+        self.plan_running = False
+        if self.plan_pending:
+            self.plan_pending = False
+            self.update_plan_preview()
+            return
+        if isinstance(summary, Exception):
+            self.plan_var.set(f"[PLAN] Planning failed: {summary}")
+            return
+        
+        def format_time(seconds):
+            return f"{int(seconds // 60)}:{int(seconds % 60):02d}"
+        
+        self.plan_var.set(
+            f"[PLAN] {summary['clips']} clips from {summary['captures']} captures | "
+            f"{format_time(summary['total_duration'])} total | "
+            f"{summary['overlap_removed']:.1f}s overlap removed | "
+            f"~{format_time(summary['render_seconds'])} to render"
+        )
+    
     def log_status(self, message, tag="info"):
         """Add a message to the status log - THREAD SAFE VERSION for standalone EXE"""
         
@@ -0,0 +1,82 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The module starts logging on import - keep test runs' logs, caches and repairs out of the repo
+os.environ["LOGS_DIR"] = tempfile.mkdtemp(prefix="bmagic_test_logs_")
+
+import UOVidCompiler  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def probe_cache(tmp_path, monkeypatch):
+    """Private probe cache per test, so tests never share probe records"""
+    monkeypatch.setattr(UOVidCompiler, "PROBE_CACHE_PATH", str(tmp_path / "probe_cache.sqlite3"))
+    monkeypatch.setattr(UOVidCompiler, "_probe_cache_conn", None)
+    monkeypatch.setattr(UOVidCompiler, "_probe_cache_failed", False)
+    yield
+    if UOVidCompiler._probe_cache_conn is not None:
+        UOVidCompiler._probe_cache_conn.close()
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    """Path of a usable ffmpeg: the bundled ffmpeg/ffmpeg.exe, else the one on PATH (test skipped without one)"""
+    tools = {}
+    for name, attr in (("ffmpeg", "FFMPEG_PATH"), ("ffprobe", "FFPROBE_PATH")):
+        path = getattr(UOVidCompiler, attr)
+        if not os.path.exists(path):
+            path = shutil.which(name)
+        if path is None:
+            pytest.skip(f"{name} not available")
+        monkeypatch.setattr(UOVidCompiler, attr, path)
+        tools[name] = path
+    return tools["ffmpeg"]
+
+
+def make_capture(ffmpeg, path, duration, size="1280x720", rate=30, extra=""):
+    """Synthetic capture like a game recording: H.264 yuv420p test pattern, stereo AAC 440 Hz tone"""
+    subprocess.run(
+        [ffmpeg, "-v", "error", "-y",
+         "-f", "lavfi", "-i", f"testsrc=size={size}:rate={rate}",
+         "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100",
+         "-t", str(duration), "-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "ultrafast",
+         "-c:a", "aac", "-ac", "2",
+         *extra.split(), str(path)],
+        check=True, stdin=subprocess.DEVNULL,
+    )
+    return str(path)
+
+
+VIDEO_SOURCE = ["-f", "lavfi", "-i", "testsrc=size=320x240:rate=30"]
+AUDIO_SOURCE = ["-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100"]
+
+
+def encode(ffmpeg, path, *args):
+    """Write `path` with ffmpeg from `args` (lavfi sources, codec and muxer options)"""
+    subprocess.run([ffmpeg, "-v", "error", "-y", *args, str(path)], check=True, stdin=subprocess.DEVNULL)
+    return str(path)
+
+
+def ffprobe_info(path):
+    """MediaInfo as the ffprobe fallback builds it - the reference for the native readers"""
+    return UOVidCompiler.MediaInfo.from_ffprobe(UOVidCompiler.run_ffprobe(path))
+
+
+def assert_matches_ffprobe(native, path, duration_tolerance=0.05):
+    """The fields the pipeline relies on agree between a native reader's record and ffprobe's"""
+    probed = ffprobe_info(path)
+    assert native is not None
+    for field in ("width", "height", "video_codec", "audio_codec", "has_audio", "sample_rate", "channels"):
+        assert getattr(native, field) == getattr(probed, field), field
+    assert native.duration == pytest.approx(probed.duration, abs=duration_tolerance)
+    if probed.video_codec:
+        assert native.fps == pytest.approx(probed.fps, rel=1e-3)
+        # Native readers only ever claim 4:2:0 - anything else is left unknown (never stream-copied)
+        assert native.pix_fmt == ("yuv420p" if probed.pix_fmt == "yuv420p" else None)
+    return probed
@@ -0,0 +1,52 @@
+import subprocess
+
+import pytest
+
+import UOVidCompiler as U
+
+pytestmark = pytest.mark.skipif(not U.NUMPY_AVAILABLE, reason="audio alignment needs NumPy")
+
+
+def cut(ffmpeg, source, path, start, duration):
+    subprocess.run([ffmpeg, "-v", "error", "-y", "-ss", str(start), "-i", source, "-t", str(duration),
+                    "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", str(path)],
+                   check=True, stdin=subprocess.DEVNULL)
+    return str(path)
+
+
+@pytest.fixture
+def noise_source(ffmpeg, tmp_path):
+    """60 s of small video with noise bursts at random loudness - a distinct envelope, like game audio"""
+    path = tmp_path / "source.mkv"
+    subprocess.run([ffmpeg, "-v", "error", "-y",
+                    "-f", "lavfi", "-i", "testsrc=size=320x240:rate=30",
+                    "-f", "lavfi", "-i", "anoisesrc=sample_rate=44100:seed=7",
+                    "-af", "volume=volume='0.05+random(0)':eval=frame",
+                    "-t", "60", "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "flac", str(path)],
+                   check=True, stdin=subprocess.DEVNULL)
+    return str(path)
+
+
+@pytest.mark.parametrize("estimate", [5.0, 6.5, 3.2])
+def test_long_overlap_finds_true_offset(ffmpeg, noise_source, tmp_path, estimate):
+    # 35 s of shared footage - longer than ALIGN_MAX_WINDOW, so the decoded windows are capped
+    older = cut(ffmpeg, noise_source, tmp_path / "older.mp4", 0, 40)
+    newer = cut(ffmpeg, noise_source, tmp_path / "newer.mp4", 5, 40)
+    older_info, newer_info = U.probe_media_info(older), U.probe_media_info(newer)
+    assert older_info.duration - 5.0 > U.ALIGN_MAX_WINDOW - U.ALIGN_SEARCH
+
+    offset, confidence = U.measure_audio_offset(older, older_info, newer, newer_info, estimate)
+
+    assert offset == pytest.approx(5.0, abs=0.05)
+    assert confidence >= U.CONFIG["audio_align_min_confidence"]
+
+
+def test_offset_outside_search_range_is_not_trusted(ffmpeg, noise_source, tmp_path):
+    older = cut(ffmpeg, noise_source, tmp_path / "older.mp4", 0, 40)
+    newer = cut(ffmpeg, noise_source, tmp_path / "newer.mp4", 15, 25)
+    older_info, newer_info = U.probe_media_info(older), U.probe_media_info(newer)
+
+    # Timestamps say 5 s; the real offset (15 s) is beyond ALIGN_SEARCH, so no match may be reported
+    measured = U.measure_audio_offset(older, older_info, newer, newer_info, 5.0)
+    assert measured is None or (abs(measured[0] - 5.0) <= U.ALIGN_SEARCH
+                                and measured[1] < U.CONFIG["audio_align_min_confidence"])
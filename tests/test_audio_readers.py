@@ -0,0 +1,114 @@
+import struct
+import subprocess
+
+import pytest
+
+import UOVidCompiler as U
+from conftest import AUDIO_SOURCE, assert_matches_ffprobe, encode, ffprobe_info
+
+
+def tone(ffmpeg, path, *options, seconds=3):
+    return encode(ffmpeg, path, *AUDIO_SOURCE, "-t", str(seconds), *options)
+
+
+@pytest.mark.parametrize("name, options", [
+    ("cbr_info_tag.mp3", ["-c:a", "libmp3lame", "-b:a", "128k"]),
+    ("vbr_xing.mp3", ["-c:a", "libmp3lame", "-q:a", "4"]),
+    ("cbr_no_tag.mp3", ["-c:a", "libmp3lame", "-b:a", "128k", "-write_xing", "0"]),
+    ("stereo_48k.mp3", ["-c:a", "libmp3lame", "-ar", "48000", "-ac", "2"]),
+    ("mpeg2_22k.mp3", ["-c:a", "libmp3lame", "-ar", "22050", "-b:a", "32k"]),
+    ("id3v2_id3v1.mp3", ["-c:a", "libmp3lame", "-metadata", "title=Track", "-id3v2_version", "3", "-write_id3v1", "1"]),
+])
+def test_mp3_info_matches_ffprobe(ffmpeg, tmp_path, name, options):
+    path = tone(ffmpeg, tmp_path / name, *options)
+
+    assert_matches_ffprobe(U.read_mp3_info(path), path, duration_tolerance=0.001)
+
+
+def test_vbr_duration_comes_from_the_xing_frame_count(ffmpeg, tmp_path):
+    # A bitrate estimate from the first frame would be far off for VBR with silence then a tone
+    path = encode(ffmpeg, tmp_path / "vbr.mp3", "-f", "lavfi", "-i", "anullsrc=sample_rate=44100", *AUDIO_SOURCE,
+                  "-filter_complex", "[0]atrim=duration=5[a];[1]atrim=duration=5[b];[a][b]concat=n=2:v=0:a=1",
+                  "-c:a", "libmp3lame", "-q:a", "2")
+
+    assert_matches_ffprobe(U.read_mp3_info(path), path, duration_tolerance=0.001)
+
+
+def test_mp3_vbri_frame_count(ffmpeg, tmp_path):
+    # ffmpeg cannot write VBRI (Fraunhofer) tags - prepend one to an untagged CBR stream
+    plain = tone(ffmpeg, tmp_path / "plain.mp3", "-c:a", "libmp3lame", "-b:a", "128k", "-write_xing", "0",
+                 "-id3v2_version", "0")
+    data = open(plain, "rb").read()
+    frame = U._parse_mp3_frame_header(data, 0)
+    frames, pos = 0, 0
+    while pos < len(data) and U._parse_mp3_frame_header(data, pos):
+        pos += U._parse_mp3_frame_header(data, pos)["frame_size"]
+        frames += 1
+    tag = bytearray(data[:frame["frame_size"]])
+    tag[4:] = bytes(len(tag) - 4)
+    tag[36:40] = b"VBRI"
+    struct.pack_into(">HHHII", tag, 40, 1, 0, 75, len(data), frames)
+    path = tmp_path / "vbri.mp3"
+    path.write_bytes(bytes(tag) + data)
+
+    info = U.read_mp3_info(str(path))
+
+    assert info.duration == pytest.approx(frames * 1152 / 44100, abs=1e-6)
+    assert_matches_ffprobe(info, str(path), duration_tolerance=0.001)
+
+
+@pytest.mark.parametrize("name, options", [
+    ("s16.wav", ["-c:a", "pcm_s16le", "-ac", "2"]),
+    ("f32.wav", ["-c:a", "pcm_f32le"]),
+    ("u8.wav", ["-c:a", "pcm_u8"]),
+    ("extensible_6ch.wav", ["-c:a", "pcm_s24le", "-ac", "6"]),
+    ("alaw.wav", ["-c:a", "pcm_alaw", "-ar", "8000"]),
+])
+def test_wav_info_matches_ffprobe(ffmpeg, tmp_path, name, options):
+    path = tone(ffmpeg, tmp_path / name, *options)
+
+    assert_matches_ffprobe(U.read_wav_info(path), path, duration_tolerance=0.001)
+
+
+def test_streamed_wav_without_sizes(ffmpeg, tmp_path):
+    # Written to a pipe, the RIFF and data sizes stay at their 0xFFFFFFFF placeholders
+    path = tmp_path / "streamed.wav"
+    with open(path, "wb") as output:
+        subprocess.run([ffmpeg, "-v", "error", *AUDIO_SOURCE, "-t", "3", "-c:a", "pcm_s16le", "-f", "wav", "-"],
+                       check=True, stdout=output, stdin=subprocess.DEVNULL)
+
+    assert_matches_ffprobe(U.read_wav_info(str(path)), str(path), duration_tolerance=0.001)
+
+
+def test_ogg_vorbis_matches_ffprobe(ffmpeg, tmp_path):
+    path = tone(ffmpeg, tmp_path / "music.ogg", "-c:a", "libvorbis", "-ac", "2")
+
+    assert_matches_ffprobe(U.read_ogg_info(path), path, duration_tolerance=0.001)
+
+
+@pytest.mark.parametrize("name", ["music.opus", "opus_in.ogg"])
+def test_opus_duration_excludes_pre_skip(ffmpeg, tmp_path, name):
+    path = tone(ffmpeg, tmp_path / name, "-c:a", "libopus")
+    with open(path, "rb") as f:
+        first_page = f.read(512)
+    head = first_page[27 + first_page[26]:]
+    pre_skip = struct.unpack_from("<H", head, 10)[0]
+    assert pre_skip > 0
+
+    info = U.read_ogg_info(path)
+
+    # ffprobe reports the last granule position, which still counts the encoder's pre-skip
+    assert info.duration == pytest.approx(3.0, abs=0.001)
+    assert ffprobe_info(path).duration - info.duration == pytest.approx(pre_skip / 48000, abs=0.001)
+    assert (info.audio_codec, info.sample_rate, info.channels) == ("opus", 48000, 1)
+
+
+def test_music_library_durations_use_native_readers(ffmpeg, tmp_path):
+    paths = [tone(ffmpeg, tmp_path / name, *options) for name, options in (
+        ("a.mp3", ["-c:a", "libmp3lame"]), ("b.wav", ["-c:a", "pcm_s16le"]), ("c.ogg", ["-c:a", "libvorbis"]))]
+    before = U.PROBE_CACHE_STATS["native"]
+
+    durations = [U.probe_media_info(path).duration for path in paths]
+
+    assert U.PROBE_CACHE_STATS["native"] - before == 3
+    assert durations == [pytest.approx(ffprobe_info(path).duration, abs=0.001) for path in paths]
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+import UOVidCompiler as U
+
+
+@pytest.fixture
+def catalogued(tmp_path, monkeypatch):
+    """Six catalogued 60 s captures an hour apart (no overlap), newest first; repair and alignment are recorded"""
+    now = 1_700_000_000.0
+    entries = {}
+    for i in range(6):
+        path = str(tmp_path / f"capture{i}.mp4")
+        entries[os.path.abspath(path)] = (now - i * 3600, U.MediaInfo(1280, 720, 60.0, 30.0, has_index=False))
+    calls = {"repaired": [], "aligned": []}
+    monkeypatch.setattr(U, "catalog_lookup", lambda video_files: entries)
+    monkeypatch.setattr(U, "repair_planning_capture",
+                        lambda video_path, media_info: calls["repaired"].append(video_path) or media_info)
+    monkeypatch.setattr(U, "align_footage_start", lambda *args: calls["aligned"].append(args[0]))
+    monkeypatch.setitem(U.CONFIG, "time_window_hours", 0)
+    monkeypatch.setitem(U.CONFIG, "max_clips", 0)
+    monkeypatch.setitem(U.CONFIG, "max_total_duration", 0)
+    return list(entries), calls
+
+
+def test_budget_sweep_repairs_only_picked_captures(catalogued):
+    video_files, calls = catalogued
+
+    smart_clips, considered = U.plan_duration_budget(video_files, 15.0, 30.0, quiet=True)
+
+    assert considered == 6
+    assert sum(clip[2] for clip in smart_clips) == pytest.approx(30.0)
+    # The sweep over the whole folder neither remuxes nor decodes - only the two picked captures are repaired
+    assert sorted(calls["repaired"]) == sorted(clip[0] for clip in smart_clips)
+    assert len(calls["repaired"]) == 2
+    assert calls["aligned"] == []
+
+
+def test_budget_honours_max_total_duration(catalogued, monkeypatch):
+    video_files, calls = catalogued
+    monkeypatch.setitem(U.CONFIG, "max_total_duration", 20)
+
+    smart_clips, _ = U.plan_duration_budget(video_files, 10.0, 120.0, quiet=True)
+
+    assert sum(clip[2] for clip in smart_clips) == pytest.approx(20.0)
@@ -0,0 +1,90 @@
+import subprocess
+
+import pytest
+
+import UOVidCompiler as U
+from conftest import VIDEO_SOURCE, encode
+
+H264 = ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "ultrafast"]
+
+
+def ffprobe_keyframes(path):
+    """Presentation times of keyframe packets, as ffprobe reports them"""
+    result = subprocess.run([U.FFPROBE_PATH, "-v", "error", "-select_streams", "v:0",
+                             "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path],
+                            check=True, capture_output=True, text=True)
+    times = []
+    for line in result.stdout.split():
+        pts_time, flags = line.split(",")[:2]
+        if "K" in flags:
+            times.append(float(pts_time))
+    return sorted(times)
+
+
+def assert_keyframes_match(path, expected_count=None):
+    keyframes = U.read_mp4_keyframes(path)
+    reference = ffprobe_keyframes(path)
+    assert keyframes == pytest.approx(reference, abs=1e-3)
+    if expected_count is not None:
+        assert len(keyframes) == expected_count
+    return keyframes
+
+
+@pytest.mark.parametrize("name, options", [
+    # B-frames: ctts composition offsets plus an edit list that shifts presentation back to 0
+    ("bframes.mp4", [*H264, "-preset", "medium", "-g", "30", "-bf", "3"]),
+    ("no_bframes.mp4", [*H264, "-g", "30", "-bf", "0"]),
+    # Version 1 ctts with signed offsets and no edit list shift
+    ("negative_cts.mp4", [*H264, "-preset", "medium", "-bf", "2", "-g", "30", "-movflags", "negative_cts_offsets"]),
+    ("irregular_gops.mp4", [*H264, "-preset", "medium", "-force_key_frames", "0,0.7,2.3,2.9,4.1"]),
+    ("quicktime.mov", [*H264, "-preset", "medium", "-g", "45"]),
+])
+def test_keyframes_match_ffprobe(ffmpeg, tmp_path, name, options):
+    path = encode(ffmpeg, tmp_path / name, *VIDEO_SOURCE, "-t", "5", *options)
+
+    keyframes = assert_keyframes_match(path)
+
+    assert keyframes[0] == pytest.approx(0.0, abs=1e-3)
+
+
+def test_forced_keyframe_times(ffmpeg, tmp_path):
+    path = encode(ffmpeg, tmp_path / "forced.mp4", *VIDEO_SOURCE, "-t", "5", *H264, "-preset", "medium",
+                  "-sc_threshold", "0", "-g", "1000", "-force_key_frames", "0,1.5,3.2")
+
+    assert assert_keyframes_match(path) == pytest.approx([0.0, 1.5, 3.2], abs=1e-3)
+
+
+def test_variable_frame_rate_stts(ffmpeg, tmp_path):
+    # Every third frame dropped: stts holds alternating sample durations
+    path = encode(ffmpeg, tmp_path / "vfr.mp4", *VIDEO_SOURCE, "-t", "5", "-vf", "select='not(eq(mod(n,3),1))'",
+                  "-fps_mode", "vfr", *H264, "-g", "20")
+
+    assert_keyframes_match(path)
+
+
+def test_empty_edit_delays_presentation(ffmpeg, tmp_path):
+    source = encode(ffmpeg, tmp_path / "source.mp4", *VIDEO_SOURCE, "-t", "4", *H264, "-g", "30", "-bf", "0")
+    path = encode(ffmpeg, tmp_path / "delayed.mp4", "-itsoffset", "1.5", "-i", source, "-c", "copy")
+
+    keyframes = assert_keyframes_match(path)
+
+    assert keyframes[0] == pytest.approx(1.5, abs=1e-3)
+
+
+def test_intra_only_video_has_no_stss(ffmpeg, tmp_path):
+    path = encode(ffmpeg, tmp_path / "mjpeg.mov", *VIDEO_SOURCE, "-t", "2", "-c:v", "mjpeg")
+
+    assert_keyframes_match(path, expected_count=60)
+
+
+def test_tail_keyframes_are_cached_and_windowed(ffmpeg, tmp_path):
+    path = encode(ffmpeg, tmp_path / "capture.mp4", *VIDEO_SOURCE, "-t", "30", *H264, "-g", "60",
+                  "-sc_threshold", "0")
+    info = U.probe_media_info(path)
+
+    tail = U.get_tail_keyframes(path, 5.0, info)
+
+    # Last 5 s plus the margin before it, so the keyframe before the in-point is included
+    assert tail == pytest.approx([t for t in ffprobe_keyframes(path) if t >= 30 - 5 - U.KEYFRAME_TAIL_MARGIN])
+    assert U.keyframe_at_or_before(tail, 25.0) == pytest.approx(24.0)
+    assert U.get_tail_keyframes(path, 5.0, info) == tail
@@ -0,0 +1,33 @@
+import json
+import os
+
+import UOVidCompiler as U
+
+
+def write_manifest(folder, name, footage_end, mtime):
+    path = os.path.join(folder, f"{name}.manifest.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": U.MANIFEST_VERSION, "output": f"{name}.mp4", "footage_end": footage_end,
+                   "clips": []}, f)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_latest_manifest_is_chosen_by_footage_end(tmp_path):
+    # Concurrent sessions finish out of order: Session 1 (older footage) is written last
+    write_manifest(tmp_path, "Session2", footage_end=2000.0, mtime=1_000_000)
+    write_manifest(tmp_path, "Session1", footage_end=1000.0, mtime=1_000_100)
+
+    manifest = U.load_latest_manifest(str(tmp_path))
+
+    assert manifest["output"] == "Session2.mp4"
+    assert manifest["output_path"] == os.path.join(str(tmp_path), "Session2.mp4")
+
+
+def test_latest_manifest_skips_unusable_files(tmp_path):
+    write_manifest(tmp_path, "Good", footage_end=500.0, mtime=1_000_000)
+    write_manifest(tmp_path, "Open", footage_end=None, mtime=1_000_200)
+    (tmp_path / "Broken.manifest.json").write_text("{not json")
+
+    assert U.load_latest_manifest(str(tmp_path))["output"] == "Good.mp4"
+    assert U.load_latest_manifest(str(tmp_path / "missing")) is None
@@ -0,0 +1,62 @@
+import subprocess
+
+import pytest
+
+import UOVidCompiler as U
+from conftest import AUDIO_SOURCE, VIDEO_SOURCE, assert_matches_ffprobe, encode
+
+
+@pytest.mark.parametrize("name, options", [
+    ("h264_aac.mkv", ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-ac", "2"]),
+    ("h264_opus.mkv", ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "libopus"]),
+    ("vp9_opus.webm", ["-c:v", "libvpx-vp9", "-deadline", "realtime", "-c:a", "libopus"]),
+    ("h264_flac.mkv", ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "flac"]),
+    ("h264_444.mkv", ["-c:v", "libx264", "-pix_fmt", "yuv444p", "-c:a", "aac"]),
+])
+def test_matroska_info_matches_ffprobe(ffmpeg, tmp_path, name, options):
+    path = encode(ffmpeg, tmp_path / name, *VIDEO_SOURCE, *AUDIO_SOURCE, "-t", "3", *options)
+
+    info = U.read_matroska_info(path)
+
+    assert_matches_ffprobe(info, path)
+    assert info.has_index is True and info.duration_known is True
+
+
+def test_cues_at_front(ffmpeg, tmp_path):
+    # Cues before the clusters are found directly; by default they follow them (via the SeekHead)
+    path = encode(ffmpeg, tmp_path / "cues_front.mkv", *VIDEO_SOURCE, "-t", "2",
+                  "-c:v", "libx264", "-pix_fmt", "yuv420p", "-reserve_index_space", "50000")
+
+    info = U.read_matroska_info(path)
+
+    assert_matches_ffprobe(info, path)
+    assert info.has_index is True
+
+
+def test_audio_only_mka(ffmpeg, tmp_path):
+    path = encode(ffmpeg, tmp_path / "music.mka", *AUDIO_SOURCE, "-t", "3", "-c:a", "libvorbis")
+
+    assert_matches_ffprobe(U.read_matroska_info(path), path)
+
+
+def test_unfinalized_recording_has_no_duration_or_index(ffmpeg, tmp_path):
+    # Written like a live/crashed OBS recording: no Duration, no Cues
+    path = tmp_path / "crashed.mkv"
+    with open(path, "wb") as output:
+        subprocess.run([ffmpeg, "-v", "error", *VIDEO_SOURCE, *AUDIO_SOURCE, "-t", "3",
+                        "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-live", "1", "-f", "matroska", "-"],
+                       check=True, stdout=output, stdin=subprocess.DEVNULL)
+
+    info = U.read_matroska_info(str(path))
+
+    assert info.duration_known is False and info.duration is None
+    assert info.has_index is False
+    assert (info.width, info.height, info.video_codec, info.audio_codec) == (320, 240, "h264", "aac")
+    assert U.needs_seek_repair(str(path), info)
+
+
+def test_not_matroska(tmp_path):
+    path = tmp_path / "fake.mkv"
+    path.write_bytes(b"\x00" * 64)
+
+    assert U.read_native_media_info(str(path)) is None
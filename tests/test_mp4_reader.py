@@ -0,0 +1,71 @@
+import pytest
+
+import UOVidCompiler as U
+from conftest import AUDIO_SOURCE, VIDEO_SOURCE, assert_matches_ffprobe, encode, ffprobe_info
+
+
+@pytest.mark.parametrize("name, options", [
+    ("h264_aac.mp4", ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-ac", "2"]),
+    ("h264_baseline.mp4", ["-c:v", "libx264", "-profile:v", "baseline", "-pix_fmt", "yuv420p", "-c:a", "aac"]),
+    ("moov_first.mp4", ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-movflags", "+faststart"]),
+    ("quicktime.mov", ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-ar", "48000"]),
+    ("hevc.mp4", ["-c:v", "libx265", "-pix_fmt", "yuv420p", "-tag:v", "hvc1", "-c:a", "aac"]),
+    ("mp3_audio.mp4", ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "libmp3lame"]),
+])
+def test_mp4_info_matches_ffprobe(ffmpeg, tmp_path, name, options):
+    path = encode(ffmpeg, tmp_path / name, *VIDEO_SOURCE, *AUDIO_SOURCE, "-t", "3", *options)
+
+    info = U.read_mp4_info(path)
+
+    assert_matches_ffprobe(info, path)
+    assert info.has_index is True
+
+
+def test_mp4_without_audio(ffmpeg, tmp_path):
+    path = encode(ffmpeg, tmp_path / "silent.mp4", *VIDEO_SOURCE, "-t", "2", "-c:v", "libx264", "-pix_fmt", "yuv420p")
+
+    info = U.read_mp4_info(path)
+
+    assert_matches_ffprobe(info, path)
+    assert info.has_audio is False and info.audio_codec is None
+
+
+def test_audio_only_m4a_duration_excludes_priming(ffmpeg, tmp_path):
+    path = encode(ffmpeg, tmp_path / "music.m4a", *AUDIO_SOURCE, "-t", "3", "-c:a", "aac")
+
+    assert_matches_ffprobe(U.read_mp4_info(path), path, duration_tolerance=0.001)
+
+
+@pytest.mark.parametrize("pix_fmt", ["yuv444p", "yuv422p", "yuv420p10le"])
+def test_non_420_h264_is_not_reported_as_420(ffmpeg, tmp_path, pix_fmt):
+    path = encode(ffmpeg, tmp_path / f"{pix_fmt}.mp4", *VIDEO_SOURCE, "-t", "2",
+                  "-c:v", "libx264", "-pix_fmt", pix_fmt)
+
+    info = U.read_mp4_info(path)
+
+    assert ffprobe_info(path).pix_fmt == pix_fmt
+    assert_matches_ffprobe(info, path)
+    assert not U.can_stream_copy(info, "320x240")
+
+
+def test_fragmented_mp4_falls_back_to_ffprobe(ffmpeg, tmp_path):
+    path = encode(ffmpeg, tmp_path / "fragmented.mp4", *VIDEO_SOURCE, *AUDIO_SOURCE, "-t", "3",
+                  "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac",
+                  "-movflags", "frag_keyframe+empty_moov")
+
+    assert U.read_mp4_info(path) is None
+    assert U.read_mp4_keyframes(path) is None
+    info = U.probe_media_info(path)
+    assert U.PROBE_CACHE_STATS["misses"] >= 1
+    probed = ffprobe_info(path)
+    assert (info.width, info.height, info.video_codec, info.pix_fmt, info.duration) == \
+        (probed.width, probed.height, probed.video_codec, probed.pix_fmt, probed.duration)
+
+
+def test_truncated_mp4_is_not_read(ffmpeg, tmp_path):
+    path = encode(ffmpeg, tmp_path / "full.mp4", *VIDEO_SOURCE, "-t", "2", "-c:v", "libx264", "-pix_fmt", "yuv420p")
+    truncated = tmp_path / "truncated.mp4"
+    data = open(path, "rb").read()
+    truncated.write_bytes(data[:len(data) // 2])
+
+    assert U.read_native_media_info(str(truncated)) is None
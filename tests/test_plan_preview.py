@@ -0,0 +1,31 @@
+import os
+import time
+
+import UOVidCompiler as U
+
+
+def test_preview_scan_uses_compile_selection_and_metadata_only(tmp_path, monkeypatch):
+    folder, extra = tmp_path / "gui_folder", tmp_path / "extra"
+    folder.mkdir()
+    extra.mkdir()
+    monkeypatch.setitem(U.CONFIG, "video_folder", str(tmp_path / "configured"))
+    monkeypatch.setitem(U.CONFIG, "extra_video_folders", f"{extra}@2")
+    monkeypatch.setitem(U.CONFIG, "time_window_hours", 2)
+
+    # Catalogued captures an hour apart, none of them seekable - a full walk would remux every one
+    now = time.time()
+    entries = {os.path.abspath(str(folder / f"capture{i}.mp4")): (now - i * 3600 - 1, U.MediaInfo(1280, 720, 60.0, 30.0, has_index=False))
+               for i in range(4)}
+    selections, calls = [], []
+    monkeypatch.setattr(U, "select_captures", lambda roots, quiet=False: selections.append((roots, quiet)) or list(entries))
+    monkeypatch.setattr(U, "catalog_lookup", lambda video_files: entries)
+    monkeypatch.setattr(U, "repair_seekability", lambda *args: calls.append("repair") or (None, None))
+    monkeypatch.setattr(U, "align_footage_start", lambda *args: calls.append("align"))
+
+    captures = U.load_plan_captures(str(folder))
+
+    # The GUI's input folder replaces the configured one; extra folders and since/until go through select_captures
+    assert selections == [([(str(folder), 0.0), (str(extra), 2.0)], True)]
+    # time_window_hours limits the walk: the captures from 2 and 3 hours ago are not visited
+    assert [capture[0] for capture in captures] == list(entries)[:2]
+    assert calls == []
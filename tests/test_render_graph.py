@@ -0,0 +1,39 @@
+import subprocess
+from fractions import Fraction
+
+import UOVidCompiler as U
+from conftest import make_capture
+
+
+def probe_video(path):
+    result = subprocess.run([U.FFPROBE_PATH, "-v", "error", "-select_streams", "v:0", "-count_frames",
+                             "-show_entries", "stream=r_frame_rate,nb_read_frames", "-of", "csv=p=0", path],
+                            check=True, capture_output=True, text=True)
+    rate, frames = result.stdout.strip().split(",")
+    return Fraction(rate), int(frames)
+
+
+def test_graph_render_keeps_output_frame_rate(ffmpeg, tmp_path, monkeypatch):
+    # 25 fps captures: whether the source rate leaked through or the muxer fell back to its
+    # 25 fps default, the output would not be at output_fps
+    fps = U.CONFIG["output_fps"]
+    first = make_capture(ffmpeg, tmp_path / "first.mp4", 6, rate=25)
+    second = make_capture(ffmpeg, tmp_path / "second.mkv", 6, size="1920x1080", rate=25)
+    clips = [(path, 1.0, 4.0, U.probe_media_info(path)) for path in (first, second)]
+    output = str(tmp_path / "graph.mp4")
+
+    commands = []
+    run_ffmpeg_command = U.run_ffmpeg_command
+    def record(command, *args, **kwargs):
+        commands.append(command)
+        return run_ffmpeg_command(command, *args, **kwargs)
+    monkeypatch.setattr(U, "run_ffmpeg_command", record)
+
+    assert U.render_compilation_graph(clips, output, "1280x720", str(tmp_path))
+
+    # Some ffmpeg builds lose the rate after concat, so it must be forced on the output
+    assert f"-r {fps} " in commands[-1]
+    rate, frames = probe_video(output)
+    assert rate == fps
+    assert frames == 8 * fps
+    assert U.probe_media_info(output).fps == fps
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+import UOVidCompiler as U
+
+NOW = 1_700_000_000.0
+# (name, footage end, duration): two captures, a 10-minute capture reaching back to a third, then one alone
+CAPTURES = [
+    ("a0", NOW, 60), ("a1", NOW - 30, 60),
+    ("b0", NOW - 3600, 60), ("b1", NOW - 3650, 600), ("b2", NOW - 4300, 30),
+    ("c0", NOW - 20000, 60),
+]
+
+
+@pytest.fixture
+def captures(tmp_path, monkeypatch):
+    """Catalogued captures without probe data; probes are counted"""
+    paths = {name: os.path.abspath(str(tmp_path / f"{name}.mp4")) for name, _, _ in CAPTURES}
+    entries = {paths[name]: (end, None) for name, end, _ in CAPTURES}
+    durations = {paths[name]: duration for name, _, duration in CAPTURES}
+    probed = []
+    monkeypatch.setattr(U, "catalog_lookup", lambda video_files: entries)
+    monkeypatch.setattr(U, "probe_media_info",
+                        lambda path: probed.append(path) or U.MediaInfo(1280, 720, durations[path], 30.0))
+    monkeypatch.setitem(U.CONFIG, "probe_workers", 1)
+    return paths, probed
+
+
+def test_sessions_split_on_idle_gaps_newest_first(captures):
+    paths, _ = captures
+    names = {path: name for name, path in paths.items()}
+
+    sessions = list(U.iter_sessions(list(paths.values()), 600))
+
+    # b2 ends 50 s before b1's footage starts - same session
+    assert [[names[path] for path in files] for files, _ in sessions] == [["a0", "a1"], ["b0", "b1", "b2"], ["c0"]]
+    assert [start for _, start in sessions] == [NOW - 90, NOW - 4330, NOW - 20060]
+
+
+def test_sessions_walk_stops_with_the_consumer_and_at_the_cutoff(captures):
+    paths, probed = captures
+
+    sessions = U.iter_sessions(list(paths.values()), 600)
+    next(sessions)
+    sessions.close()
+    # The newest session is complete once b0 is reached - the older captures are never probed
+    assert len(probed) < len(paths)
+
+    probed.clear()
+    assert [len(files) for files, _ in U.iter_sessions(list(paths.values()), 600, not_before=NOW - 5000)] == [2, 3]
+    assert paths["c0"] not in probed
+
+
+def test_compile_sessions_submits_each_session(captures, monkeypatch):
+    paths, _ = captures
+    compiled = []
+    monkeypatch.setitem(U.CONFIG, "session_gap_minutes", 10)
+    monkeypatch.setitem(U.CONFIG, "compile_mode", "full")
+    monkeypatch.setitem(U.CONFIG, "time_window_hours", 0)
+    monkeypatch.setitem(U.CONFIG, "use_intro", False)
+    monkeypatch.setattr(U, "create_compilation_video",
+                        lambda files, session=None: compiled.append((len(files), session["label"])) or session["label"])
+
+    outputs = U.compile_sessions(list(paths.values()))
+
+    assert [label.split("_")[0] for label in outputs] == ["Session1", "Session2", "Session3"]
+    assert sorted(count for count, _ in compiled) == [1, 2, 3]
@@ -0,0 +1,50 @@
+import subprocess
+
+import pytest
+
+import UOVidCompiler as U
+from conftest import make_capture
+
+AAC_FRAME = 1024 / 44100
+
+
+def stream_times(path):
+    """{codec_type: (start_time, duration)} from ffprobe"""
+    result = subprocess.run([U.FFPROBE_PATH, "-v", "error", "-show_entries", "stream=codec_type,start_time,duration",
+                             "-of", "csv=p=0", path], check=True, capture_output=True, text=True)
+    times = {}
+    for line in result.stdout.split():
+        codec_type, start, duration = line.split(",")
+        times[codec_type] = (float(start), float(duration))
+    return times
+
+
+def assert_in_sync(path, duration):
+    times = stream_times(path)
+    (video_start, video_duration), (audio_start, audio_duration) = times["video"], times["audio"]
+    assert abs(audio_start - video_start) < AAC_FRAME
+    assert video_duration == pytest.approx(duration, abs=0.05)
+    assert audio_duration == pytest.approx(duration, abs=0.05)
+
+
+@pytest.fixture
+def capture(ffmpeg, tmp_path):
+    # Keyframes every 3 s, already in the 720p30 output profile - clips are smart-cut
+    return make_capture(ffmpeg, tmp_path / "capture.mp4", 20, extra="-g 90 -keyint_min 90 -sc_threshold 0")
+
+
+def test_smart_cut_clip_and_compilation_stay_in_sync(capture, tmp_path, capsys):
+    info = U.probe_media_info(capture)
+    assert U.can_stream_copy(info, "1280x720")
+    first, second = str(tmp_path / "first.mp4"), str(tmp_path / "second.mp4")
+
+    assert U.extract_smart_clip(capture, first, 4.0, 8.0, info, None, "1280x720")
+    assert U.extract_smart_clip(capture, second, 13.5, 6.0, info, None, "1280x720")
+    assert capsys.readouterr().out.count("Smart cut") == 2
+    assert_in_sync(first, 8.0)
+    assert_in_sync(second, 6.0)
+
+    # Audio packets kept from before an in-point would be played by the concat demuxer
+    output = str(tmp_path / "compilation.mp4")
+    assert U.concatenate_videos([first, second], output, None, "1280x720", str(tmp_path))
+    assert_in_sync(output, 14.0)